@@ -0,0 +1,260 @@
+"""
+Batch audits for whole catalogs or sitemaps.
+
+URLs are scheduled through the audit job queue with a batch-wide
+concurrency limit and per-domain politeness limits, and results are
+streamed back as each page finishes, followed by an aggregate report.
+"""
+import asyncio
+import logging
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from backend.config import settings
+from backend.jobs import AuditJobManager, QueueFullError
+from backend.models import AuditResult, AuditStatus
+from backend.sessions import Priority
+from backend.site_fetch import site_request
+from backend.store import AuditStore
+from backend.urls import domain_of, normalize_url, valid_url
+
+logger = logging.getLogger(__name__)
+
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+# Pages listed in the aggregate report's worst_pages
+WORST_PAGES_LIMIT = 10
+
+
+async def fetch_sitemap_urls(sitemap_url: str, limit: int = settings.batch_max_urls) -> List[str]:
+    """
+    Collect page URLs from a sitemap.xml, following one level of
+    sitemap index files.
+    """
+    pending = [sitemap_url]
+    urls: List[str] = []
+
+    while pending and len(urls) < limit:
+        url = pending.pop(0)
+        response = await site_request("GET", url, settings.batch_sitemap_timeout)
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+
+        if root.tag == f"{SITEMAP_NS}sitemapindex":
+            # Only descend from the top-level index
+            if url == sitemap_url:
+                pending.extend(loc.text.strip() for loc in root.iter(f"{SITEMAP_NS}loc") if loc.text)
+            continue
+
+        for loc in root.iter(f"{SITEMAP_NS}loc"):
+            if loc.text:
+                try:
+                    urls.append(valid_url(loc.text.strip()))
+                except ValueError:
+                    logger.warning(f"Skipping invalid URL in sitemap {url}: {loc.text.strip()!r}")
+
+    logger.info(f"Found {len(urls)} URLs in sitemap {sitemap_url}")
+    return urls[:limit]
+
+
+class DomainThrottle:
+    """
+    Per-domain concurrency cap plus a minimum delay between run starts.
+    A domain's state is dropped once nothing holds or waits for it, so a
+    long-lived throttle does not grow with every domain it has seen.
+    """
+
+    def __init__(self, concurrency: int, delay: float):
+        self._concurrency = concurrency
+        self._delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Runs holding or waiting for each domain
+        self._users: Dict[str, int] = {}
+        self._last_start: Dict[str, float] = {}
+
+    @property
+    def domains(self) -> int:
+        return len(self._users)
+
+    async def acquire(self, domain: str) -> None:
+        if domain not in self._users:
+            self._semaphores[domain] = asyncio.Semaphore(self._concurrency)
+            self._locks[domain] = asyncio.Lock()
+            self._users[domain] = 0
+        self._users[domain] += 1
+        try:
+            await self._semaphores[domain].acquire()
+        except BaseException:
+            self._leave(domain)
+            raise
+        try:
+            async with self._locks[domain]:
+                wait = self._last_start.get(domain, 0.0) + self._delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_start[domain] = time.monotonic()
+        except BaseException:
+            self.release(domain)
+            raise
+
+    def release(self, domain: str) -> None:
+        self._semaphores[domain].release()
+        self._leave(domain)
+
+    def _leave(self, domain: str) -> None:
+        self._users[domain] -= 1
+        if self._users[domain]:
+            return
+        del self._users[domain], self._semaphores[domain], self._locks[domain]
+        # Start times only matter within the delay
+        cutoff = time.monotonic() - self._delay
+        for stale in [d for d, started in self._last_start.items() if started <= cutoff and d not in self._users]:
+            del self._last_start[stale]
+
+
+def _summarize(result: AuditResult) -> Dict[str, Any]:
+    return result.summary.model_dump()
+
+
+def issue_type_histogram(results: Iterable[AuditResult]) -> Dict[str, int]:
+    """Issues per error_type/gap_type across results, most common first"""
+    histogram: Counter = Counter()
+    for result in results:
+        histogram.update(issue.error_type for issue in result.technical_failures)
+        histogram.update(issue.error_type for issue in result.contextual_errors)
+        histogram.update(issue.gap_type for issue in result.competitive_gaps)
+    return dict(histogram.most_common())
+
+
+def build_report(items: List[Dict[str, Any]], results: Dict[str, AuditResult]) -> Dict[str, Any]:
+    """Aggregate report over the per-URL batch items"""
+    completed = [item for item in items if item["status"] == AuditStatus.COMPLETED.value]
+
+    worst = sorted(completed, key=lambda item: (item["risk_score"], item["total_issues"]), reverse=True)
+
+    return {
+        "type": "report",
+        "total_urls": len(items),
+        "completed": len(completed),
+        "failed": len(items) - len(completed),
+        "cached": sum(1 for item in completed if item["cached"]),
+        "average_risk_score": round(sum(item["risk_score"] for item in completed) / len(completed), 1) if completed else 0.0,
+        "worst_pages": [
+            {key: item[key] for key in ("url", "audit_id", "risk_score", "total_issues", "critical_count")}
+            for item in worst[:WORST_PAGES_LIMIT]
+        ],
+        "issue_type_histogram": issue_type_histogram(results.values()),
+    }
+
+
+class BatchScheduler:
+    """Runs batches of audits through the job queue with politeness limits"""
+
+    def __init__(
+        self,
+        jobs: AuditJobManager,
+        store: Optional[AuditStore] = None,
+        concurrency: int = settings.batch_concurrency,
+        per_domain_concurrency: int = settings.batch_per_domain_concurrency,
+        per_domain_delay: float = settings.batch_per_domain_delay
+    ):
+        self._jobs = jobs
+        self._store = store
+        self._concurrency = concurrency
+        self._per_domain_concurrency = per_domain_concurrency
+        self._per_domain_delay = per_domain_delay
+
+    async def run(self, urls: List[str], force_refresh: bool = False, tenant: str = "anonymous") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Audit `urls` and yield one item per URL as it finishes, then the
+        aggregate report. Runs are queued at batch priority under `tenant`.
+        """
+        # De-duplicate while keeping the submitted order
+        unique: Dict[str, str] = {}
+        for url in urls:
+            unique.setdefault(normalize_url(url), url)
+        urls = list(unique.values())[:settings.batch_max_urls]
+
+        logger.info(f"Starting batch of {len(urls)} URLs")
+        limit = asyncio.Semaphore(self._concurrency)
+        throttle = DomainThrottle(self._per_domain_concurrency, self._per_domain_delay)
+        finished: asyncio.Queue = asyncio.Queue()
+        results: Dict[str, AuditResult] = {}
+
+        async def audit_one(url: str) -> None:
+            async with limit:
+                item, result = await self._audit(url, force_refresh, throttle, tenant)
+            if result is not None:
+                results[url] = result
+            finished.put_nowait(item)
+
+        tasks = [asyncio.create_task(audit_one(url)) for url in urls]
+        items: List[Dict[str, Any]] = []
+        try:
+            for _ in tasks:
+                item = await finished.get()
+                items.append(item)
+                yield item
+        finally:
+            # Client went away - stop scheduling the rest of the batch
+            for task in tasks:
+                task.cancel()
+
+        report = build_report(items, results)
+        logger.info(f"Batch finished: {report['completed']}/{report['total_urls']} completed")
+        yield report
+
+    async def _audit(self, url: str, force_refresh: bool, throttle: DomainThrottle, tenant: str):
+        return await audit_page(self._jobs, self._store, url, force_refresh, throttle, tenant, Priority.BATCH)
+
+
+async def audit_page(
+    jobs: AuditJobManager,
+    store: Optional[AuditStore],
+    url: str,
+    force_refresh: bool,
+    throttle: DomainThrottle,
+    tenant: str,
+    priority: Priority
+) -> Tuple[Dict[str, Any], Optional[AuditResult]]:
+    """
+    Audit one page of a batch or journey: a fresh stored result, or a run
+    through the job queue under the domain throttle. Returns the result
+    item and the AuditResult (None when the audit failed).
+    """
+    item: Dict[str, Any] = {"type": "result", "url": url, "audit_id": None, "cached": False}
+
+    try:
+        if store is not None and not force_refresh:
+            stored = await store.find_fresh(url, settings.audit_cache_ttl)
+            if stored is not None:
+                item.update(audit_id=stored.audit_id, status=AuditStatus.COMPLETED.value, cached=True)
+                item.update(_summarize(stored.result), result=stored.result.model_dump(mode="json"))
+                return item, stored.result
+
+        domain = domain_of(url)
+        await throttle.acquire(domain)
+        try:
+            job = jobs.submit(url, priority=priority, tenant=tenant)
+            item["audit_id"] = job.audit_id
+            await job.wait()
+        finally:
+            throttle.release(domain)
+
+        if job.status != AuditStatus.COMPLETED:
+            item.update(status=AuditStatus.FAILED.value, error=job.error)
+            return item, None
+
+        item.update(status=AuditStatus.COMPLETED.value)
+        item.update(_summarize(job.result), result=job.result.model_dump(mode="json"))
+        return item, job.result
+
+    except QueueFullError as e:
+        item.update(status=AuditStatus.FAILED.value, error=str(e))
+    except Exception as e:
+        logger.error(f"Audit failed for {url}: {e}")
+        item.update(status=AuditStatus.FAILED.value, error=str(e))
+    return item, None
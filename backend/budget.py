@@ -0,0 +1,101 @@
+"""
+Adaptive step budgets for TinyFish audit runs.
+
+Instead of a fixed `max_steps` and deadline, each run gets a budget from
+the domain's recent runs (steps and seconds they actually needed) or,
+without enough history, from the page's complexity as measured by the
+pre-audit (how many links, images and forms it has). The run itself stops
+client-side once enough issues have streamed in (see
+`settings.audit_stop_after_issues`), matching the prompt's termination
+conditions.
+"""
+import logging
+import math
+from typing import List, Optional
+
+from backend.cache import TTLCache
+from backend.config import settings
+from backend.models import AgentRunStats, PrecheckSummary
+from backend.urls import domain_of
+
+logger = logging.getLogger(__name__)
+
+# Pages with this many links, images and forms get the full step budget
+COMPLEX_PAGE_TARGETS = 150
+
+
+class StepBudget:
+    """max_steps and wall-clock deadline for one agent run"""
+
+    def __init__(self, max_steps: int, deadline: float, basis: str):
+        self.max_steps = max_steps
+        self.deadline = deadline
+        # "history", "complexity" or "default"
+        self.basis = basis
+
+
+def _p90(values: List[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(0.9 * len(ordered))) - 1)]
+
+
+class BudgetPolicy:
+    """Picks step budgets per run and learns from finished runs (per process)"""
+
+    def __init__(
+        self,
+        min_steps: int = settings.audit_budget_min_steps,
+        history_runs: int = settings.audit_budget_history_runs,
+        min_history: int = settings.audit_budget_min_history,
+        headroom: float = settings.audit_budget_headroom,
+        min_deadline: float = settings.audit_budget_min_deadline
+    ):
+        self.min_steps = min_steps
+        self.history_runs = history_runs
+        self.min_history = min_history
+        self.headroom = headroom
+        self.min_deadline = min_deadline
+        # domain -> recent [steps_used, elapsed] pairs, oldest first
+        self._history = TTLCache("budget_history", max_entries=10000, ttl=7 * 24 * 3600.0)
+
+    def budget_for(self, url: str, max_steps: int, precheck: Optional[PrecheckSummary] = None) -> StepBudget:
+        """
+        Budget for a run of at most `max_steps` (the configured ceiling for
+        the goal being used)
+        """
+        deadline = settings.tinyfish_audit_timeout
+        if not settings.audit_budget_enabled:
+            return StepBudget(max_steps, deadline, "default")
+
+        runs = self._history.get(domain_of(url)) or []
+        if len(runs) >= self.min_history:
+            steps = math.ceil(_p90([run[0] for run in runs]) * self.headroom)
+            deadline = min(deadline, max(self.min_deadline, _p90([run[1] for run in runs]) * self.headroom))
+            return StepBudget(self._clamp(steps, max_steps), deadline, "history")
+
+        if precheck is not None:
+            targets = precheck.links_checked + precheck.images_checked + precheck.forms_checked + precheck.targets_skipped
+            steps = math.ceil(max_steps * min(1.0, 0.5 + 0.5 * targets / COMPLEX_PAGE_TARGETS))
+            return StepBudget(self._clamp(steps, max_steps), deadline, "complexity")
+
+        return StepBudget(max_steps, deadline, "default")
+
+    def record(self, url: str, run: AgentRunStats) -> None:
+        """Remember what a finished run needed"""
+        steps, elapsed = run.steps_used, run.elapsed
+        # A run that used up its budget might have needed more; record it as
+        # needing the headroom on top, so budgets that were too small grow back
+        if run.steps_used >= run.max_steps:
+            steps = run.max_steps * self.headroom
+        if run.stopped_early == "deadline":
+            elapsed = run.deadline * self.headroom
+        domain = domain_of(url)
+        runs = list(self._history.get(domain) or [])
+        runs.append([steps, elapsed])
+        self._history.set(domain, runs[-self.history_runs:])
+
+    def _clamp(self, steps: int, max_steps: int) -> int:
+        return max(min(self.min_steps, max_steps), min(steps, max_steps))
+
+
+budget_policy = BudgetPolicy()
@@ -0,0 +1,121 @@
+"""
+Bounded in-memory cache with LRU + TTL eviction
+"""
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate memory footprint as the size of the JSON encoding"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class TTLCache:
+    """
+    LRU cache whose entries also expire after a TTL.
+
+    Bounded by entry count and by the approximate total size of the cached
+    values; whichever limit is hit first evicts the least recently used
+    entries. Each entry may carry its own TTL, e.g. a short one for
+    failures so they are retried soon instead of being served forever.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, max_bytes: int = 0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # key -> (expires_at, size, value), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        size = _estimate_size(value)
+        if self.max_bytes and size > self.max_bytes:
+            logger.warning(f"{self.name} cache: not caching {key} ({size} bytes exceeds limit)")
+            return
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used entries beyond the limits. Expired entries
+        are otherwise removed lazily, on lookup or when they reach the LRU end.
+        """
+        now = time.monotonic()
+        while self._entries:
+            key, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+            elif len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                self._remove(key)
+                self.evictions += 1
+            else:
+                break
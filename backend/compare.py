@@ -0,0 +1,128 @@
+"""
+Competitor comparison audits.
+
+A target site and its competitors are audited concurrently through the job
+queue (reusing fresh stored results), and a side-by-side matrix of severity
+counts, risk scores and issue types is built up as each site completes -
+showing where competitors meet a standard the target misses.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from backend.batch import DomainThrottle, audit_page, issue_type_histogram
+from backend.config import settings
+from backend.jobs import AuditJobManager
+from backend.models import AuditResult, AuditStatus
+from backend.sessions import Priority
+from backend.store import AuditStore
+from backend.urls import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Matrix columns taken from each site's summary
+MATRIX_COLUMNS = ("risk_score", "total_issues", "critical_count", "high_count", "medium_count", "low_count")
+
+
+def matrix_row(item: Dict[str, Any], role: str, result: Optional[AuditResult]) -> Dict[str, Any]:
+    """One site's column of the comparison (None values when its audit failed)"""
+    row: Dict[str, Any] = {
+        "url": item["url"],
+        "role": role,
+        "audit_id": item["audit_id"],
+        "status": item["status"],
+        "cached": item["cached"],
+    }
+    if result is None:
+        row.update({column: None for column in MATRIX_COLUMNS}, issue_types={}, error=item.get("error"))
+    else:
+        summary = result.summary.model_dump()
+        row.update({column: summary[column] for column in MATRIX_COLUMNS}, issue_types=issue_type_histogram([result]))
+    return row
+
+
+def build_comparison(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Comparison over the finished rows (target first, then competitors in request order)"""
+    completed = [row for row in rows if row["status"] == AuditStatus.COMPLETED.value]
+    target = next((row for row in completed if row["role"] == "target"), None)
+    competitors = [row for row in completed if row["role"] == "competitor"]
+    types = sorted({issue_type for row in completed for issue_type in row["issue_types"]})
+
+    comparison: Dict[str, Any] = {
+        "type": "comparison",
+        "sites": rows,
+        "issue_types": types,
+        # Lower risk first
+        "ranking": [row["url"] for row in sorted(completed, key=lambda row: (row["risk_score"], row["total_issues"]))],
+        "completed": len(completed),
+        "failed": len(rows) - len(completed),
+    }
+    if target is not None and competitors:
+        comparison["better_competitors"] = [row["url"] for row in competitors if row["risk_score"] < target["risk_score"]]
+        # Problems the target has that no competitor has - where competitors set the standard
+        comparison["target_only_issue_types"] = [
+            issue_type for issue_type in target["issue_types"]
+            if not any(issue_type in row["issue_types"] for row in competitors)
+        ]
+        comparison["competitor_average_risk_score"] = round(
+            sum(row["risk_score"] for row in competitors) / len(competitors), 1
+        )
+    return comparison
+
+
+class CompareAuditor:
+    """Audits a target site and its competitors concurrently"""
+
+    def __init__(self, jobs: AuditJobManager, store: Optional[AuditStore] = None):
+        self._jobs = jobs
+        self._store = store
+
+    @staticmethod
+    def plan(url: str, competitors: List[str]) -> List[str]:
+        """Competitor URLs without duplicates or the target, capped by COMPARE_MAX_COMPETITORS"""
+        seen = {normalize_url(url)}
+        unique = []
+        for competitor in competitors:
+            key = normalize_url(competitor)
+            if key not in seen:
+                seen.add(key)
+                unique.append(competitor)
+        return unique[:settings.compare_max_competitors]
+
+    async def run(
+        self,
+        url: str,
+        competitors: List[str],
+        force_refresh: bool = False,
+        tenant: str = "anonymous"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield a "site" item with its matrix row as each site finishes, then
+        the full comparison
+        """
+        logger.info(f"Starting comparison of {url} against {len(competitors)} competitors")
+        sites = [(url, "target")] + [(competitor, "competitor") for competitor in competitors]
+        throttle = DomainThrottle(settings.batch_per_domain_concurrency, 0.0)
+        finished: asyncio.Queue = asyncio.Queue()
+        rows: Dict[str, Dict[str, Any]] = {}
+
+        async def audit_one(site_url: str, role: str) -> None:
+            item, result = await audit_page(
+                self._jobs, self._store, site_url, force_refresh, throttle, tenant, Priority.BATCH
+            )
+            finished.put_nowait(matrix_row(item, role, result))
+
+        tasks = [asyncio.create_task(audit_one(site_url, role)) for site_url, role in sites]
+        try:
+            for _ in tasks:
+                row = await finished.get()
+                rows[row["url"]] = row
+                yield {"type": "site", **row}
+        finally:
+            # Client went away - stop the remaining audits
+            for task in tasks:
+                task.cancel()
+
+        comparison = build_comparison([rows[site_url] for site_url, _ in sites])
+        logger.info(f"Comparison of {url} finished: {comparison['completed']}/{len(sites)} sites completed")
+        yield comparison
@@ -6,6 +6,131 @@ class Settings(BaseSettings):
     tinyfish_api_url: str = "https://agent.tinyfish.ai/"
     github_token: str = ""
 
+    # Shared TinyFish HTTP client (connection pool + timeouts)
+    tinyfish_max_connections: int = 20
+    tinyfish_max_keepalive_connections: int = 10
+    tinyfish_keepalive_expiry: float = 30.0
+    tinyfish_http2: bool = True
+    tinyfish_connect_timeout: float = 10.0
+    tinyfish_pool_timeout: float = 30.0
+    tinyfish_audit_timeout: float = 300.0
+    tinyfish_enrichment_timeout: float = 60.0
+    tinyfish_audit_max_steps: int = 100
+    tinyfish_focused_audit_max_steps: int = 50  # when the pre-audit already checked links, images and forms
+    tinyfish_enrichment_max_steps: int = 50
+
+    # Client for customer sites (sitemaps, page fetches), separate from the TinyFish pool
+    site_max_connections: int = 50
+    site_max_keepalive_connections: int = 10
+    site_request_timeout: float = 15.0
+    site_page_timeout: float = 15.0  # the audited page, fetched once for the pre-audit and the content hash
+    site_max_page_bytes: int = 5 * 1024 * 1024  # longer pages are cut off
+    site_allow_private_hosts: bool = False  # only for local testing: allows loopback and private addresses
+
+    # Adaptive audit step budget (backend.budget): max_steps and deadline from
+    # the domain's recent runs, else from page complexity; the settings above
+    # are the ceilings
+    audit_budget_enabled: bool = True
+    audit_budget_min_steps: int = 20
+    audit_budget_history_runs: int = 20  # recent runs kept per domain
+    audit_budget_min_history: int = 3  # runs of a domain needed before its history is used
+    audit_budget_headroom: float = 1.25  # budget = p90 of recent runs x headroom
+    audit_budget_min_deadline: float = 60.0
+    audit_stop_after_issues: int = 5  # end a run client-side once this many issues streamed in (0 = never)
+
+    # Retries and circuit breaker for the TinyFish endpoint
+    tinyfish_retry_attempts: int = 3
+    tinyfish_enrichment_retry_attempts: int = 2
+    tinyfish_retry_base_delay: float = 1.0
+    tinyfish_retry_max_delay: float = 20.0
+    tinyfish_breaker_failure_threshold: int = 5
+    tinyfish_breaker_reset_timeout: float = 30.0
+    # Return what a dropped SSE stream already delivered instead of re-running
+    tinyfish_salvage_partial_streams: bool = True
+
+    # TinyFish session slots, shared by audits and news enrichment
+    tinyfish_max_sessions: int = 6
+    tinyfish_interactive_reserved_sessions: int = 1  # only dashboard audits may use these
+
+    # Audit job queue
+    audit_queue_size: int = 1000  # audits waiting for a session slot
+    audit_job_retention: int = 1000
+
+    # Audit result store
+    audit_store_backend: str = "sqlite"  # "sqlite" or "memory"
+    audit_store_path: str = "audits.db"
+    audit_store_max_entries: int = 10000
+    audit_store_max_age: float = 30 * 24 * 3600.0  # seconds, 0 = keep forever
+    audit_cache_ttl: float = 6 * 3600.0  # serve stored results younger than this
+
+    # Batch audits
+    batch_max_urls: int = 500
+    batch_concurrency: int = 8
+    batch_per_domain_concurrency: int = 2
+    batch_per_domain_delay: float = 1.0  # seconds between run starts on one domain
+    batch_sitemap_timeout: float = 30.0
+
+    # Journey audits (several pages of one site combined into one result)
+    journey_max_pages: int = 8  # including the start page
+    journey_site_concurrency: int = 3  # pages of one site audited at once, across journeys
+
+    # Competitor comparisons
+    compare_max_competitors: int = 5
+
+    # Enrichment providers: deadline (seconds) for each provider's result,
+    # including the wait for a session slot
+    enrichment_news_deadline: float = 45.0
+    enrichment_incidents_deadline: float = 45.0
+    enrichment_competitors_deadline: float = 60.0
+
+    # Enrichment cache (per company name and provider)
+    news_cache_max_entries: int = 1000
+    news_cache_max_bytes: int = 10 * 1024 * 1024
+    news_cache_ttl: float = 3600.0
+    news_cache_error_ttl: float = 60.0  # failed lookups are retried after this
+
+    # State shared between uvicorn workers (news results, single-flight locks,
+    # job status); use "sqlite" when running more than one worker
+    shared_state_backend: str = "memory"  # "memory" or "sqlite"
+    shared_state_path: str = "shared_state.db"
+    shared_state_max_entries: int = 10000  # memory backend; least recently used entries are evicted first
+    shared_state_max_bytes: int = 32 * 1024 * 1024
+    shared_lock_lease: float = 30.0  # seconds; renewed while the holder runs
+    shared_lock_poll_interval: float = 0.5
+    job_status_ttl: float = 3600.0  # how long other workers can see a job's status
+
+    # Scheduled monitoring
+    monitor_enabled: bool = True
+    monitor_concurrency: int = 2  # scheduled audits running at once, across all schedules
+    monitor_jitter: float = 30.0  # random delay (seconds) added to each scheduled start
+    monitor_max_schedules: int = 1000
+
+    # Deterministic pre-audit: link, image and form checks before the agent run
+    precheck_enabled: bool = True
+    precheck_request_timeout: float = 5.0  # each HEAD/GET check
+    precheck_deadline: float = 20.0  # all checks together; unfinished ones are dropped
+    precheck_concurrency: int = 8  # checks in flight per audit
+    precheck_max_running: int = 4  # pre-audits at once across all audits (x PRECHECK_CONCURRENCY <= SITE_MAX_CONNECTIONS)
+    precheck_max_targets: int = 60  # links, images and form actions checked per page
+    precheck_max_findings: int = 10
+
+    # Response serialization
+    response_compress_min_bytes: int = 1024  # smaller bodies are sent uncompressed
+    response_gzip_level: int = 6
+    response_brotli_quality: int = 4
+
+    # Static frontend assets (backend.static_assets)
+    static_fingerprint: bool = True  # false serves frontend files from disk as-is (frontend development)
+    static_max_age: int = 31536000  # for fingerprinted URLs; pages and plain URLs are revalidated by ETag
+    static_gzip_level: int = 9  # compressed once at startup, so the highest levels are affordable
+    static_brotli_quality: int = 11
+
+    # SSE tracing
+    trace_sample_rate: float = 1.0  # fraction of audit runs traced
+    trace_max_records: int = 300  # per trace; oldest records are dropped first
+    trace_retention: int = 200  # traces kept in memory
+    trace_dump_dir: str = ""  # write finished traces here as <audit_id>.json
+
     class Config:
         env_file = ".env"
         case_sensitive = False
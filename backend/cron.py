@@ -0,0 +1,108 @@
+"""
+Minimal cron expressions for monitoring schedules.
+
+Five fields - minute hour day-of-month month day-of-week - each `*`, a
+number, a range `a-b`, a list `a,b` or a step `*/n` / `a-b/n`; day-of-week
+0-7 with 0 and 7 both Sunday. Shortcuts: @hourly, @daily, @weekly,
+@monthly. As in cron, when both day fields are restricted a day matches
+either of them. Times are server-local.
+"""
+from datetime import datetime, timedelta
+from typing import FrozenSet, Optional, Tuple
+
+SHORTCUTS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+# (name, min, max) per field
+FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day of month", 1, 31),
+    ("month", 1, 12),
+    ("day of week", 0, 7),
+)
+
+# Give up looking for a match after this many days (e.g. "0 0 31 2 *")
+SEARCH_DAYS = 5 * 366
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"Invalid step in {name} field: {part!r}")
+
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start_text, end_text = base.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(base)
+            end = high if step_text else start
+
+        if not low <= start <= end <= high:
+            raise ValueError(f"{name} field out of range {low}-{high}: {part!r}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = SHORTCUTS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields, got {len(fields)}: {expression!r}")
+
+        try:
+            parsed = [_parse_field(text, *spec) for text, spec in zip(fields, FIELDS)]
+        except ValueError as e:
+            raise ValueError(f"Invalid cron expression {expression!r}: {e}") from e
+
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        # As in Vixie cron, a day field starting with "*" (including "*/n")
+        # counts as unrestricted for the day-of-month/day-of-week OR rule
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        # Python: Monday=0; cron: Sunday=0
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def _first_time(self, after: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """First (hour, minute) at or after `after` on a matching day"""
+        for hour in sorted(h for h in self.hours if h >= after[0]):
+            first_minute = after[1] if hour == after[0] else 0
+            minutes = [m for m in self.minutes if m >= first_minute]
+            if minutes:
+                return hour, min(minutes)
+        return None
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`"""
+        start = (after + timedelta(minutes=1)).replace(second=0, microsecond=0)
+        day = start.replace(hour=0, minute=0)
+        for offset in range(SEARCH_DAYS):
+            if self._day_matches(day):
+                found = self._first_time((start.hour, start.minute) if offset == 0 else (0, 0))
+                if found is not None:
+                    return day.replace(hour=found[0], minute=found[1])
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
@@ -0,0 +1,95 @@
+"""
+Incremental re-audits: issue fingerprints, audit diffs and page hashes.
+
+An issue's fingerprint is its category, type and normalized location and
+element, so the same problem reported with slightly different wording or
+numbers (prices, counts) matches across runs. A cheap hash of the page's
+visible text and link targets lets a re-audit be skipped when nothing on
+the page changed.
+"""
+import hashlib
+import logging
+import re
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+from backend.models import AuditDiff, AuditResult, IssueChange
+from backend.site_fetch import FetchedPage
+from backend.stream_parser import ISSUE_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+# category -> (type field, element field) identifying an issue
+ISSUE_IDENTITY = {
+    "technical_failures": ("error_type", "element"),
+    "contextual_errors": ("error_type", "content"),
+    "competitive_gaps": ("gap_type", "missing_element"),
+}
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_PUNCTUATION = re.compile(r"[^\w#\s]")
+_SPACE = re.compile(r"\s+")
+
+_HIDDEN = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>", re.S | re.I)
+_COMMENT = re.compile(r"<!--.*?-->", re.S)
+_LINK = re.compile(r"""\b(?:href|src|action)\s*=\s*["']([^"']*)["']""", re.I)
+_TAG = re.compile(r"<[^>]+>")
+
+
+def _normalize(text: str) -> str:
+    text = _NUMBER.sub("#", text.lower())
+    return _SPACE.sub(" ", _PUNCTUATION.sub(" ", text)).strip()
+
+
+def fingerprint(category: str, issue: BaseModel) -> str:
+    type_field, element_field = ISSUE_IDENTITY[category]
+    identity = "|".join((
+        category,
+        getattr(issue, type_field),
+        _normalize(issue.location),
+        _normalize(getattr(issue, element_field)),
+    ))
+    return hashlib.sha1(identity.encode()).hexdigest()[:16]
+
+
+def issue_changes(result: AuditResult) -> Dict[str, IssueChange]:
+    """Issues of a result keyed by fingerprint (repeats collapse into one)"""
+    changes: Dict[str, IssueChange] = {}
+    for category in ISSUE_CATEGORIES:
+        for issue in getattr(result, category):
+            key = fingerprint(category, issue)
+            changes.setdefault(key, IssueChange(fingerprint=key, category=category, issue=issue.model_dump(mode="json")))
+    return changes
+
+
+def diff_results(
+    current: AuditResult,
+    previous: Optional[AuditResult] = None,
+    previous_audit_id: Optional[str] = None,
+    run_skipped: bool = False
+) -> AuditDiff:
+    now = issue_changes(current)
+    before = issue_changes(previous) if previous is not None else {}
+    return AuditDiff(
+        previous_audit_id=previous_audit_id,
+        run_skipped=run_skipped,
+        added=[change for key, change in now.items() if key not in before],
+        resolved=[change for key, change in before.items() if key not in now],
+        unchanged=[change for key, change in now.items() if key in before],
+    )
+
+
+def content_hash(html: str) -> str:
+    """Hash of the visible text plus link/image/form targets of a page"""
+    html = _COMMENT.sub(" ", _HIDDEN.sub(" ", html))
+    targets = " ".join(_LINK.findall(html))
+    text = _SPACE.sub(" ", _TAG.sub(" ", html)).strip()
+    return hashlib.sha256(f"{text}\n{targets}".encode()).hexdigest()
+
+
+def page_content_hash(page: Optional[FetchedPage]) -> Optional[str]:
+    """Hash of a fetched page; None when it could not be fetched"""
+    if page is None or not page.ok:
+        return None
+    return content_hash(page.text)
@@ -1,106 +1,309 @@
 """
-External data enrichment using TinyFish multi-browser capabilities
+External data enrichment using TinyFish multi-browser capabilities.
+
+Enrichment is a pipeline of providers - company news, recent incidents and
+outages, competitor intel - each a TinyFish search run. Providers run
+concurrently, each within its own deadline, and their results are cached
+per company name, so every page of a site shares one set of runs. A slow or
+failing provider only leaves its own section empty.
 """
+import asyncio
+import html
 import json
 import logging
-import httpx
-from typing import Dict, Any, List
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
 from backend.config import settings
+from backend.http_client import get_client, call_timeout
+from backend.metrics import tinyfish_requests_total, tinyfish_runs_in_flight
+from backend.resilience import (
+    CircuitOpenError,
+    StreamDroppedError,
+    UpstreamError,
+    call_with_resilience,
+    enrichment_retry_policy,
+    parse_retry_after,
+)
+from backend.sessions import Priority, SessionScheduler, session_scheduler
+from backend.shared_state import SharedCache
+from backend.singleflight import SharedSingleFlight
 
 logger = logging.getLogger(__name__)
 
+# Items kept per provider
+MAX_ITEMS = 3
 
-async def enrich_audit_with_news(url: str, company_name: str = None) -> Dict[str, Any]:
-    """
-    Enrich audit results with external intelligence:
-    - Company news from DuckDuckGo
-    - Recent incidents/outages
-    - Competitive intelligence
-    """
 
-    # Extract company name from URL if not provided
-    if not company_name:
-        from urllib.parse import urlparse
-        domain = urlparse(url).netloc
-        company_name = domain.replace('www.', '').split('.')[0].title()
-
-    enrichment_data = {
-        "company_name": company_name,
-        "news": [],
-        "incidents": [],
-        "competitive_intel": []
-    }
-
-    # Skip if no API key
-    if not settings.cerebras_api_key:
-        logger.warning("No API key for enrichment")
-        return enrichment_data
-
-    try:
-        # Use TinyFish to search DuckDuckGo for company news
-        async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-            response = await client.post(
-                f"{settings.tinyfish_api_url.rstrip('/')}/v1/automation/run-sse",
-                json={
-                    "url": "https://duckduckgo.com",
-                    "goal": f"""Search for "{company_name} e-commerce website issues" and extract the top 3 recent news articles.
+class EnrichmentProvider:
+    """One TinyFish search whose result list fills a section of the enrichment data"""
+
+    def __init__(self, name: str, field: str, result_key: str, query: str, item_schema: str, deadline: float):
+        self.name = name
+        # Key of the section in the combined enrichment data
+        self.field = field
+        # List in the run's resultJson holding the items
+        self.result_key = result_key
+        self.query = query
+        self.item_schema = item_schema
+        self.deadline = deadline
+
+    def goal(self, company_name: str) -> str:
+        return f"""Search for "{self.query.format(company=company_name)}" and extract the top {MAX_ITEMS} recent results.
 
 OUTPUT SCHEMA:
 {{
-  "articles": [
-    {{
-      "title": "article headline",
-      "source": "publication name",
-      "date": "relative date like '2 days ago'",
-      "summary": "one sentence summary"
-    }}
+  "{self.result_key}": [
+    {self.item_schema}
   ]
 }}
 
-TERMINATION: Stop after finding 3 articles or 30 seconds.
-Return ONLY the JSON object.""",
-                    "max_steps": 50
-                },
-                headers={
-                    "X-API-Key": settings.cerebras_api_key,
-                    "Content-Type": "application/json",
-                    "Accept": "text/event-stream"
-                }
-            )
+TERMINATION: Stop after finding {MAX_ITEMS} results or 30 seconds.
+Return ONLY the JSON object."""
+
+    async def fetch(self, company_name: str) -> List[Dict[str, Any]]:
+        """Run the search with retries; raises on failure"""
+        with tinyfish_runs_in_flight.track(operation=self.name):
+            try:
+                items = await call_with_resilience(lambda: self._search(company_name), enrichment_retry_policy)
+            except CircuitOpenError:
+                tinyfish_requests_total.inc(operation=self.name, outcome="circuit_open")
+                raise
+            except Exception:
+                tinyfish_requests_total.inc(operation=self.name, outcome="error")
+                raise
+        tinyfish_requests_total.inc(operation=self.name, outcome="success")
+        logger.info(f"Found {len(items)} {self.name} results for {company_name}")
+        return items
 
+    async def _search(self, company_name: str) -> List[Dict[str, Any]]:
+        """Single TinyFish DuckDuckGo search; raises classified errors for the retry layer"""
+        items: Optional[List[Dict[str, Any]]] = None
+        completed = False
+
+        client = get_client()
+        async with client.stream(
+            "POST",
+            f"{settings.tinyfish_api_url.rstrip('/')}/v1/automation/run-sse",
+            json={
+                "url": "https://duckduckgo.com",
+                "goal": self.goal(company_name),
+                "max_steps": settings.tinyfish_enrichment_max_steps
+            },
+            headers={
+                "X-API-Key": settings.cerebras_api_key,
+                "Content-Type": "application/json",
+                "Accept": "text/event-stream"
+            },
+            timeout=call_timeout(settings.tinyfish_enrichment_timeout)
+        ) as response:
             if response.status_code != 200:
-                logger.error(f"News search failed: {response.status_code}")
-                return enrichment_data
+                logger.error(f"{self.name} search failed: {response.status_code}")
+                raise UpstreamError(
+                    response.status_code,
+                    f"{self.name} search returned status {response.status_code}",
+                    retry_after=parse_retry_after(response.headers.get("Retry-After"))
+                )
 
             # Parse SSE response
-            result_text = ""
             async for line in response.aiter_lines():
                 if line.startswith("data: "):
-                    data = line[6:]
                     try:
-                        event = json.loads(data)
-                        if event.get("type") == "COMPLETE" and "resultJson" in event:
-                            result_json = event["resultJson"]
-                            if "articles" in result_json:
-                                enrichment_data["news"] = result_json["articles"][:3]
-                            break
+                        event = json.loads(line[6:])
                     except json.JSONDecodeError:
                         continue
+                    if event.get("type") == "COMPLETE" and "resultJson" in event:
+                        completed = True
+                        result_json = event["resultJson"]
+                        if isinstance(result_json, dict) and isinstance(result_json.get(self.result_key), list):
+                            items = result_json[self.result_key][:MAX_ITEMS]
+                        break
+
+        # A run without results is a failure, so it is cached briefly rather
+        # than served as "nothing found" for the full TTL
+        if not completed:
+            raise StreamDroppedError(f"{self.name} search ended before the run completed")
+        if items is None:
+            # Rejected or off-schema; re-running would not help
+            raise ValueError(f"{self.name} search finished without a {self.result_key} list")
+        return items
+
+
+PROVIDERS = [
+    EnrichmentProvider(
+        "news", "news", "articles",
+        query="{company} e-commerce website issues",
+        item_schema='{"title": "article headline", "source": "publication name", '
+                    '"date": "relative date like \'2 days ago\'", "summary": "one sentence summary"}',
+        deadline=settings.enrichment_news_deadline
+    ),
+    EnrichmentProvider(
+        "incidents", "incidents", "incidents",
+        query="{company} website outage OR down OR data breach",
+        item_schema='{"title": "what happened", "source": "publication or status page", '
+                    '"date": "relative date like \'2 days ago\'", "summary": "one sentence on the customer impact"}',
+        deadline=settings.enrichment_incidents_deadline
+    ),
+    EnrichmentProvider(
+        "competitors", "competitive_intel", "competitors",
+        query="{company} competitors alternatives",
+        item_schema='{"name": "competitor name", "url": "competitor website", '
+                    '"note": "one sentence on how it competes"}',
+        deadline=settings.enrichment_competitors_deadline
+    ),
+]
+
+
+def company_name_of(url: str) -> str:
+    """Company name guessed from the URL's domain, e.g. shop.example.com -> Shop"""
+    domain = urlparse(url).netloc or url
+    return domain.replace('www.', '').split('.')[0].title()
 
-        logger.info(f"Found {len(enrichment_data['news'])} news articles for {company_name}")
 
-    except Exception as e:
-        logger.error(f"Enrichment failed: {e}")
+class EnrichmentPipeline:
+    """Runs the providers concurrently with per-provider caching, single-flight and deadlines"""
 
-    return enrichment_data
+    def __init__(
+        self,
+        cache: SharedCache,
+        flight: SharedSingleFlight,
+        providers: List[EnrichmentProvider] = PROVIDERS,
+        sessions: SessionScheduler = session_scheduler,
+        error_ttl: float = settings.news_cache_error_ttl
+    ):
+        self.cache = cache
+        self.flight = flight
+        self.providers = providers
+        self._sessions = sessions
+        self._error_ttl = error_ttl
 
+    @staticmethod
+    def _key(provider: EnrichmentProvider, company_name: str) -> str:
+        return f"{provider.name}:{company_name.lower()}"
 
-async def get_quick_insights(url: str) -> List[str]:
+    async def _fetch(self, provider: EnrichmentProvider, company_name: str, key: str, tenant: str) -> Dict[str, Any]:
+        """Provider run in a lowest-priority session slot; the outcome is cached either way"""
+        try:
+            async with self._sessions.slot(Priority.ENRICHMENT, tenant):
+                section: Dict[str, Any] = {"items": await provider.fetch(company_name)}
+        except Exception as e:
+            logger.error(f"{provider.name} enrichment failed for {company_name}: {e}")
+            section = {"items": [], "error": str(e)}
+
+        # Failures are cached briefly so they are retried rather than served forever
+        ttl = self._error_ttl if "error" in section else None
+        await self.cache.set(key, section, ttl=ttl)
+        return section
+
+    async def run_provider(self, provider: EnrichmentProvider, company_name: str, tenant: str = "anonymous") -> Dict[str, Any]:
+        """
+        One provider's section, from the cache or a run shared with any
+        concurrent request for the same company (in any worker).
+
+        Past the provider's deadline an empty section with an error is
+        returned; the run carries on and caches its result for later
+        requests.
+        """
+        started = time.perf_counter()
+        key = self._key(provider, company_name)
+        section = await self.cache.get(key)
+        cached = section is not None
+        if section is None:
+            try:
+                section = await asyncio.wait_for(
+                    self.flight.do(
+                        key,
+                        lambda: self._fetch(provider, company_name, key, tenant),
+                        lambda: self.cache.get(key)
+                    ),
+                    timeout=provider.deadline
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"{provider.name} enrichment for {company_name} missed its {provider.deadline}s deadline")
+                section = {"items": [], "error": f"No result within {provider.deadline:g}s"}
+        return {
+            "type": "provider",
+            "provider": provider.name,
+            "field": provider.field,
+            "company_name": company_name,
+            "cached": cached,
+            "elapsed": round(time.perf_counter() - started, 2),
+            **section,
+        }
+
+    async def stream(self, url: str, tenant: str = "anonymous", company_name: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each provider's section as it finishes, then the combined data"""
+        company_name = company_name or company_name_of(url)
+        if not settings.cerebras_api_key:
+            logger.warning("No API key for enrichment")
+            yield {"type": "complete", **combine(company_name, [])}
+            return
+
+        tasks = [asyncio.create_task(self.run_provider(provider, company_name, tenant)) for provider in self.providers]
+        sections: List[Dict[str, Any]] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                section = await next_done
+                sections.append(section)
+                yield section
+        finally:
+            # Client went away - stop waiting (shared runs continue and are cached)
+            for task in tasks:
+                task.cancel()
+        yield {"type": "complete", **combine(company_name, sections)}
+
+    async def cached(self, url: str, company_name: Optional[str] = None) -> Dict[str, Any]:
+        """Combined enrichment data from the cache only, without starting runs"""
+        company_name = company_name or company_name_of(url)
+        sections = []
+        for provider in self.providers:
+            section = await self.cache.get(self._key(provider, company_name))
+            if section is not None:
+                sections.append({"provider": provider.name, "field": provider.field, **section})
+        return combine(company_name, sections)
+
+    async def enrich(self, url: str, tenant: str = "anonymous", company_name: Optional[str] = None) -> Dict[str, Any]:
+        """Combined enrichment data once every provider has finished or timed out"""
+        data: Dict[str, Any] = {}
+        async for item in self.stream(url, tenant, company_name):
+            data = item
+        data.pop("type", None)
+        return data
+
+
+def combine(company_name: str, sections: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge provider sections into the enrichment data returned by /api/news"""
+    data: Dict[str, Any] = {"company_name": company_name}
+    errors = {}
+    for provider in PROVIDERS:
+        data[provider.field] = []
+    for section in sections:
+        data[section["field"]] = section["items"]
+        if "error" in section:
+            errors[section["provider"]] = section["error"]
+    if errors:
+        data["errors"] = errors
+    return data
+
+
+async def get_quick_insights(enrichment: Optional[Dict[str, Any]] = None) -> List[str]:
     """
-    Generate quick insights without full enrichment
-    Returns list of relevant industry insights
+    Industry insights, led by company-specific ones when enrichment data
+    for the company is available
     """
-    insights = [
+    insights = []
+    if enrichment:
+        # Insights are rendered as HTML; scraped names are escaped
+        company_name = html.escape(enrichment.get("company_name") or "This company")
+        incidents = enrichment.get("incidents") or []
+        competitors = [html.escape(str(c["name"])) for c in enrichment.get("competitive_intel") or [] if c.get("name")]
+        if incidents:
+            insights.append(f"{company_name} had {len(incidents)} recently reported incident{'s' if len(incidents) > 1 else ''} - agents retry less than humans do")
+        if competitors:
+            insights.append(f"AI agents comparing {company_name} will also check {', '.join(competitors)}")
+
+    insights += [
         "AI shopping assistants (ChatGPT, Google AI) are rapidly gaining adoption",
         "E-commerce sites lose ~40% of AI agent transactions due to poor compatibility",
         "Top sites are investing heavily in agent-friendly experiences"
@@ -0,0 +1,110 @@
+"""
+Shared, pooled HTTP clients: one for all TinyFish calls, and a separate one
+for fetching customer sites (sitemaps, pages), so slow or hostile sites
+never hold TinyFish connection slots.
+"""
+import logging
+from typing import Optional
+import httpx
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+_site_client: Optional[httpx.AsyncClient] = None
+
+# Sent on requests to customer sites
+SITE_USER_AGENT = "Mozilla/5.0 (compatible; AgentReadinessAudit/1.0)"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def create_client() -> httpx.AsyncClient:
+    """
+    Build an AsyncClient with the pool limits and timeouts from Settings.
+    HTTP/2 is only enabled when the optional `h2` package is installed.
+    """
+    http2 = settings.tinyfish_http2
+    if http2 and not _http2_available():
+        logger.warning("TINYFISH_HTTP2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+        http2 = False
+
+    logger.info(
+        f"Creating TinyFish HTTP client (max_connections={settings.tinyfish_max_connections}, "
+        f"keepalive={settings.tinyfish_max_keepalive_connections}, http2={http2})"
+    )
+    return httpx.AsyncClient(
+        http2=http2,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=settings.tinyfish_max_connections,
+            max_keepalive_connections=settings.tinyfish_max_keepalive_connections,
+            keepalive_expiry=settings.tinyfish_keepalive_expiry,
+        ),
+        timeout=call_timeout(settings.tinyfish_audit_timeout),
+    )
+
+
+def call_timeout(read_timeout: float) -> httpx.Timeout:
+    """Per-call timeout: fixed connect/pool budget, caller-specific read budget"""
+    return httpx.Timeout(
+        read_timeout,
+        connect=settings.tinyfish_connect_timeout,
+        pool=settings.tinyfish_pool_timeout,
+    )
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared client.
+
+    Normally opened by the app lifespan in backend.main; created lazily for
+    callers running outside the app (scripts, serverless cold paths).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def site_timeout(timeout: float) -> httpx.Timeout:
+    """Per-call timeout for customer sites: `timeout` for every phase, pool wait included"""
+    return httpx.Timeout(timeout)
+
+
+def get_site_client() -> httpx.AsyncClient:
+    """Return the client for customer sites, created on first use"""
+    global _site_client
+    if _site_client is None or _site_client.is_closed:
+        _site_client = httpx.AsyncClient(
+            follow_redirects=True,
+            headers={"User-Agent": SITE_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=settings.site_max_connections,
+                max_keepalive_connections=settings.site_max_keepalive_connections,
+            ),
+            timeout=site_timeout(settings.site_request_timeout),
+        )
+    return _site_client
+
+
+async def open_client() -> httpx.AsyncClient:
+    """Open the shared client (app startup)"""
+    return get_client()
+
+
+async def close_client() -> None:
+    """Close the shared clients (app shutdown)"""
+    global _client, _site_client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _site_client is not None:
+        await _site_client.aclose()
+        _site_client = None
@@ -0,0 +1,388 @@
+"""
+Asynchronous audit job queue.
+
+Submissions are accepted immediately and run once the session scheduler
+(backend.sessions) grants them a TinyFish slot, in priority order and
+fairly across tenants, so the number of in-flight TinyFish sessions never
+exceeds `settings.tinyfish_max_sessions` regardless of how many audits are
+queued.
+
+With shared state (backend.shared_state), status snapshots are visible to
+every worker and runs of the same URL are single-flighted across workers.
+"""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from fastapi import HTTPException
+
+from backend.config import settings
+from backend.diff import diff_results, page_content_hash
+from backend.metrics import audit_job_seconds
+from backend.models import AuditDiff, AuditResponse, AuditResult, AuditStatus
+from backend.precheck import PrecheckResult, run_precheck
+from backend.site_fetch import FetchedPage, fetch_page
+from backend.sessions import Priority, SessionScheduler, SessionTicket, session_scheduler
+from backend.shared_state import SharedState
+from backend.singleflight import SharedSingleFlight
+from backend.store import AuditStore, StoredAudit
+from backend.urls import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Called as runner(url, on_event=..., audit_id=..., precheck=...) - matches run_audit
+AuditRunner = Callable[..., Awaitable[AuditResult]]
+
+# Events kept per job for replay to late subscribers
+MAX_EVENT_HISTORY = 500
+
+TERMINAL_STATUSES = {AuditStatus.COMPLETED, AuditStatus.FAILED}
+
+
+class QueueFullError(Exception):
+    """Raised when the audit queue cannot accept more submissions"""
+
+
+class AuditJob:
+    """State and progress events for a single queued audit"""
+
+    def __init__(
+        self,
+        url: str,
+        incremental: bool = False,
+        skip_if_unchanged: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "anonymous"
+    ):
+        self.audit_id = str(uuid.uuid4())
+        self.url = url
+        self.priority = priority
+        self.tenant = tenant
+        self.ticket: Optional[SessionTicket] = None
+        self.incremental = incremental
+        self.skip_if_unchanged = skip_if_unchanged
+        self.content_hash: Optional[str] = None
+        # The page, fetched once for the content hash and the pre-audit
+        self.page: Optional[FetchedPage] = None
+        self.diff: Optional[AuditDiff] = None
+        self.persisted = False
+        self.status = AuditStatus.QUEUED
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.result: Optional[AuditResult] = None
+        self.error: Optional[str] = None
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=MAX_EVENT_HISTORY)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._finished = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    async def wait(self) -> "AuditJob":
+        """Wait until the audit completes or fails"""
+        await self._finished.wait()
+        return self
+
+    def publish(self, event_type: str, **data: Any) -> None:
+        """Record an event and fan it out to live subscribers"""
+        event = {"type": event_type, "audit_id": self.audit_id, "status": self.status.value, **data}
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def relay(self, event: Dict[str, Any]) -> None:
+        """EventCallback adapter for progress events from run_audit"""
+        data = dict(event)
+        self.publish(data.pop("type"), **data)
+
+    async def subscribe(self) -> AsyncIterator[Dict[str, Any]]:
+        """Replay past events, then yield live ones until the job finishes"""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        finished = self.done
+        self._subscribers.add(queue)
+        try:
+            while True:
+                if finished and queue.empty():
+                    return
+                event = await queue.get()
+                yield event
+                if event["status"] in {s.value for s in TERMINAL_STATUSES}:
+                    finished = True
+        finally:
+            self._subscribers.discard(queue)
+
+    def to_response(self) -> AuditResponse:
+        return AuditResponse(
+            audit_id=self.audit_id,
+            status=self.status,
+            result=self.result,
+            error=self.error,
+            diff=self.diff
+        )
+
+
+class AuditJobManager:
+    """Runs queued audits as TinyFish session slots become available"""
+
+    def __init__(
+        self,
+        runner: AuditRunner,
+        store: Optional[AuditStore] = None,
+        sessions: SessionScheduler = session_scheduler,
+        state: Optional[SharedState] = None,
+        queue_size: int = settings.audit_queue_size,
+        retention: int = settings.audit_job_retention
+    ):
+        self._runner = runner
+        self._store = store
+        self._sessions = sessions
+        self._state = state
+        self._flight = SharedSingleFlight("audit", state) if state is not None else None
+        self._queue_size = queue_size
+        self._retention = retention
+        self._tasks: Set[asyncio.Task] = set()
+        self._jobs: "OrderedDict[str, AuditJob]" = OrderedDict()
+        # Queued/running job per normalized URL, shared by concurrent submitters
+        self._inflight: Dict[str, AuditJob] = {}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for job in self._inflight.values() if job.status == AuditStatus.QUEUED)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def submit(
+        self,
+        url: str,
+        incremental: bool = False,
+        skip_if_unchanged: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "anonymous"
+    ) -> AuditJob:
+        """
+        Queue an audit and return its job without waiting for it to run.
+
+        If an audit of the same (normalized) URL is already queued or
+        running, that job is returned instead of starting another run (and
+        moved up to `priority` if it is still waiting). Incremental jobs
+        also diff the result against the previous stored audit, and with
+        `skip_if_unchanged` reuse it when the page content hash matches.
+        """
+        key = normalize_url(url)
+        existing = self._inflight.get(key)
+        if existing is not None:
+            logger.info(f"Coalescing audit for {url} into in-flight audit {existing.audit_id}")
+            if existing.status == AuditStatus.QUEUED:
+                # Not started yet - the diff can still be produced for this submitter
+                existing.incremental = existing.incremental or incremental
+                if priority < existing.priority:
+                    existing.priority = priority
+                    if existing.ticket is not None:
+                        self._sessions.promote(existing.ticket, priority)
+            return existing
+
+        if self.queue_depth >= self._queue_size:
+            raise QueueFullError(f"Audit queue is full ({self._queue_size} pending)")
+
+        job = AuditJob(url, incremental=incremental, skip_if_unchanged=skip_if_unchanged, priority=priority, tenant=tenant)
+        self._inflight[key] = job
+        self._jobs[job.audit_id] = job
+        self._evict()
+        job.publish("status", url=url, priority=priority.label)
+
+        task = asyncio.create_task(self._execute(job), name=f"audit-{job.audit_id}")
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"Queued {priority.label} audit {job.audit_id} for {url} (queue depth {self.queue_depth})")
+        return job
+
+    def get(self, audit_id: str) -> Optional[AuditJob]:
+        return self._jobs.get(audit_id)
+
+    async def shared_status(self, audit_id: str) -> Optional[AuditResponse]:
+        """Status of a job running (or recently finished) in another worker"""
+        if self._state is None:
+            return None
+        try:
+            snapshot = await self._state.get(f"job:{audit_id}")
+        except Exception as e:
+            logger.error(f"Shared job status lookup failed for {audit_id}: {e}")
+            return None
+        return AuditResponse.model_validate(snapshot) if snapshot is not None else None
+
+    async def _share(self, job: AuditJob) -> None:
+        if self._state is None:
+            return
+        try:
+            await self._state.set(f"job:{job.audit_id}", job.to_response().model_dump(mode="json"), settings.job_status_ttl)
+        except Exception as e:
+            logger.error(f"Failed to share status of audit {job.audit_id}: {e}")
+
+    def _evict(self) -> None:
+        """Drop the oldest finished jobs beyond the retention limit"""
+        if len(self._jobs) <= self._retention:
+            return
+        for audit_id in list(self._jobs):
+            if len(self._jobs) <= self._retention:
+                break
+            if self._jobs[audit_id].done:
+                del self._jobs[audit_id]
+
+    async def _persist(self, job: AuditJob) -> None:
+        """Save a completed result; storage problems must not fail the audit"""
+        if self._store is None:
+            return
+        try:
+            await self._store.save(job.audit_id, job.url, job.result, content_hash=job.content_hash)
+        except Exception as e:
+            logger.error(f"Failed to store audit {job.audit_id}: {e}")
+
+    async def _fetch_page(self, job: AuditJob) -> Optional[FetchedPage]:
+        """The page for the content hash and the pre-audit; None lets both fall back"""
+        if not (job.incremental or settings.precheck_enabled):
+            return None
+        try:
+            return await fetch_page(job.url)
+        except Exception as e:
+            logger.error(f"Fetching {job.url} failed: {e}")
+            return None
+
+    async def _previous_audit(self, job: AuditJob) -> Optional[StoredAudit]:
+        """Previous stored audit of the URL; also hashes the page so later runs can skip"""
+        job.content_hash = page_content_hash(job.page)
+        if self._store is None:
+            return None
+        try:
+            return await self._store.latest(job.url)
+        except Exception as e:
+            logger.error(f"Previous audit lookup failed for {job.url}: {e}")
+            return None
+
+    def _start(self, job: AuditJob) -> None:
+        job.status = AuditStatus.RUNNING
+        job.started_at = datetime.now()
+        waited = job.ticket.waited if job.ticket is not None else None
+        job.publish("status", queue_wait=round(waited, 2) if waited is not None else None)
+
+    async def _precheck(self, job: AuditJob) -> Optional[PrecheckResult]:
+        """Deterministic link/image/form checks; failures fall back to a full agent audit"""
+        if not settings.precheck_enabled:
+            return None
+        try:
+            precheck = await run_precheck(job.url, job.page)
+        except Exception as e:
+            logger.error(f"Pre-audit failed for {job.url}: {e}")
+            return None
+        if precheck is not None:
+            job.publish("precheck", **precheck.summary().model_dump())
+        return precheck
+
+    async def _run(self, job: AuditJob) -> AuditResult:
+        """TinyFish run in a session slot"""
+        # Local checks run before taking a session slot, so TinyFish
+        # capacity is not held while they run
+        precheck = await self._precheck(job)
+        job.ticket = self._sessions.request(job.priority, job.tenant)
+        await self._sessions.acquire(job.ticket)
+        self._start(job)
+        await self._share(job)
+        result = await self._runner(job.url, on_event=job.relay, audit_id=job.audit_id, precheck=precheck)
+        job.result = result
+        # Persisted before the shared lock is released, so waiting workers find it
+        await self._persist(job)
+        job.persisted = True
+        return result
+
+    async def _recent_result(self, job: AuditJob) -> Optional[AuditResult]:
+        """Result stored by another worker's run of the URL since this job was queued"""
+        if self._store is None:
+            return None
+        try:
+            stored = await self._store.latest(job.url)
+        except Exception as e:
+            logger.error(f"Recent audit lookup failed for {job.url}: {e}")
+            return None
+        if stored is None or stored.created_at < job.created_at:
+            return None
+        logger.info(f"Reusing audit {stored.audit_id} of {job.url} from another worker")
+        return stored.result
+
+    async def _run_shared(self, job: AuditJob) -> AuditResult:
+        if self._flight is None:
+            return await self._run(job)
+        result = await self._flight.do(normalize_url(job.url), lambda: self._run(job), lambda: self._recent_result(job))
+        if job.status == AuditStatus.QUEUED:
+            # Another worker ran it and already stored the result
+            self._start(job)
+            job.persisted = True
+        return result
+
+    async def _execute(self, job: AuditJob) -> None:
+        await self._share(job)
+        try:
+            job.page = await self._fetch_page(job)
+            # Incremental checks run before taking a session slot, so an
+            # unchanged page is answered without occupying TinyFish capacity
+            previous = await self._previous_audit(job) if job.incremental else None
+            if job.skip_if_unchanged and previous is not None and job.content_hash and previous.content_hash == job.content_hash:
+                self._start(job)
+                logger.info(f"Page unchanged since audit {previous.audit_id}; reusing its result for {job.url}")
+                job.result = previous.result
+                job.diff = diff_results(previous.result, previous.result, previous.audit_id, run_skipped=True)
+            else:
+                job.result = await self._run_shared(job)
+                if job.incremental:
+                    job.diff = diff_results(
+                        job.result,
+                        previous.result if previous else None,
+                        previous.audit_id if previous else None
+                    )
+            if job.diff is not None:
+                job.publish(
+                    "diff", added=len(job.diff.added), resolved=len(job.diff.resolved),
+                    unchanged=len(job.diff.unchanged), run_skipped=job.diff.run_skipped
+                )
+            job.status = AuditStatus.COMPLETED
+            logger.info(f"Audit {job.audit_id} completed for {job.url}: {job.result.total_issues} issues found")
+            if not job.persisted:
+                await self._persist(job)
+        except asyncio.CancelledError:
+            job.status = AuditStatus.FAILED
+            job.error = "Audit cancelled"
+            raise
+        except HTTPException as e:
+            job.status = AuditStatus.FAILED
+            job.error = str(e.detail)
+            logger.error(f"Audit {job.audit_id} failed for {job.url}: {job.error}")
+        except Exception as e:
+            job.status = AuditStatus.FAILED
+            job.error = str(e)
+            logger.error(f"Audit {job.audit_id} failed for {job.url}: {job.error}")
+        finally:
+            if job.ticket is not None:
+                self._sessions.release(job.ticket)
+            # Finished jobs are retained; the page body is not needed any more
+            job.page = None
+            job.finished_at = datetime.now()
+            audit_job_seconds.observe(
+                (job.finished_at - (job.started_at or job.created_at)).total_seconds(), outcome=job.status.value
+            )
+            self._inflight.pop(normalize_url(job.url), None)
+            job.publish("status", error=job.error)
+            job._finished.set()
+        await self._share(job)
@@ -0,0 +1,215 @@
+"""
+Multi-page journey audits.
+
+Agent failures happen across flows (home -> product -> cart -> checkout), so
+a journey audits several pages of one site - given, or discovered from the
+start page's links along the shopping flow. Pages run concurrently through
+the job queue under a per-site cap, and their results are combined into one
+site-level AuditResult: issues that recur across pages (header and footer
+problems) are reported once, and a per-page breakdown lists what each page
+contributed.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from backend.batch import DomainThrottle, audit_page
+from backend.config import settings
+from backend.diff import fingerprint
+from backend.jobs import AuditJobManager
+from backend.models import AuditResult, AuditStatus, JourneyPage
+from backend.precheck import extract_targets
+from backend.site_fetch import fetch_page
+from backend.sessions import Priority
+from backend.store import AuditStore
+from backend.stream_parser import ISSUE_CATEGORIES
+from backend.urls import domain_of, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Steps of the shopping flow, in order, and the URL/link-text words that mark them
+JOURNEY_STEPS = (
+    ("collection", ("collection", "category", "catalog", "shop", "/c/")),
+    ("product", ("product", "/p/", "/item", "/dp/")),
+    ("cart", ("cart", "basket", "bag")),
+    ("checkout", ("checkout",)),
+)
+
+# Links to these are not pages worth an agent run
+NON_PAGE_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".zip", ".xml", ".json", ".css", ".js")
+
+
+def _step_of(url: str, label: str) -> Optional[int]:
+    text = f"{urlsplit(url).path} {label}".lower()
+    for index, (_, words) in enumerate(JOURNEY_STEPS):
+        if any(word in text for word in words):
+            return index
+    return None
+
+
+async def discover_pages(url: str, limit: int) -> List[str]:
+    """
+    The start page plus same-site links from it, shopping-flow steps first
+    (one page per step, then the rest of the flow, then other links)
+    """
+    page = await fetch_page(url)
+    if page is None or not page.ok:
+        logger.warning(f"Could not fetch {url} to discover journey pages")
+        return [url]
+
+    seen = {normalize_url(url)}
+    candidates: List[Tuple[Optional[int], str]] = []
+    for target in extract_targets(page.text, page.url):
+        if target.kind != "link" or not target.internal:
+            continue
+        if urlsplit(target.url).path.lower().endswith(NON_PAGE_EXTENSIONS):
+            continue
+        key = normalize_url(target.url)
+        if key not in seen:
+            seen.add(key)
+            candidates.append((_step_of(target.url, target.label), target.url))
+
+    # First page of each step, then further flow pages, then everything else (page order within each)
+    firsts, rest, others = [], [], []
+    steps_taken = set()
+    for step, page in candidates:
+        if step is None:
+            others.append(page)
+        elif step not in steps_taken:
+            steps_taken.add(step)
+            firsts.append((step, page))
+        else:
+            rest.append((step, page))
+    ordered = [page for _, page in sorted(firsts)] + [page for _, page in sorted(rest, key=lambda item: item[0])] + others
+
+    pages = [url] + ordered[:max(0, limit - 1)]
+    logger.info(f"Discovered {len(ordered)} journey candidates on {url}; auditing {len(pages)} pages")
+    return pages
+
+
+def _path(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "") or "/"
+
+
+def combine_pages(url: str, pages: List[Tuple[Dict[str, Any], Optional[AuditResult]]]) -> AuditResult:
+    """
+    Site-level result of a journey: issues found on several pages appear
+    once (located "on every page" or "on N of M pages"), issues of a single
+    page are prefixed with its path. Raises ValueError when no page
+    completed (an empty result would read as a clean site).
+    """
+    completed = [(item, result) for item, result in pages if result is not None]
+    if not completed:
+        raise ValueError("No page of the journey could be audited")
+    # (fingerprint, occurrence on the page) -> category, first issue seen, pages it was found on.
+    # Fingerprints ignore numbers, so "Footer link 1" and "Footer link 2" on one page
+    # stay two issues and match the first and second such issue on other pages.
+    found: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for item, result in completed:
+        occurrences: Dict[str, int] = {}
+        for category in ISSUE_CATEGORIES:
+            for issue in getattr(result, category):
+                key = fingerprint(category, issue)
+                occurrence = occurrences[key] = occurrences.get(key, -1) + 1
+                entry = found.setdefault((key, occurrence), {"category": category, "issue": issue, "pages": []})
+                entry["pages"].append(item["url"])
+
+    data: Dict[str, Any] = {category: [] for category in ISSUE_CATEGORIES}
+    for entry in found.values():
+        issue = entry["issue"].model_dump()
+        count = len(entry["pages"])
+        if count > 1:
+            where = "every page" if count == len(completed) else f"{count} of {len(completed)} pages"
+            issue["location"] = f"{issue['location']} (on {where})"
+        else:
+            issue["location"] = f"{_path(entry['pages'][0])}: {issue['location']}"
+        data[entry["category"]].append(issue)
+
+    breakdown = []
+    for item, result in pages:
+        shared = sum(1 for entry in found.values() if item["url"] in entry["pages"] and len(entry["pages"]) > 1)
+        own = sum(1 for entry in found.values() if entry["pages"] == [item["url"]])
+        breakdown.append(JourneyPage(
+            url=item["url"],
+            audit_id=item["audit_id"],
+            status=item["status"],
+            cached=item["cached"],
+            error=item.get("error"),
+            summary=result.summary if result is not None else None,
+            site_wide_issues=shared,
+            page_issues=own,
+        ))
+
+    return AuditResult(url=url, audit_date=datetime.now(), pages=breakdown, **data)
+
+
+class JourneyAuditor:
+    """Runs journey audits through the job queue with a per-site concurrency cap"""
+
+    def __init__(
+        self,
+        jobs: AuditJobManager,
+        store: Optional[AuditStore] = None,
+        site_concurrency: int = settings.journey_site_concurrency
+    ):
+        self._jobs = jobs
+        self._store = store
+        # Shared by all journeys, so concurrent journeys of one site share the cap
+        self._throttle = DomainThrottle(site_concurrency, 0.0)
+
+    async def plan(self, url: str, pages: List[str], max_pages: Optional[int] = None) -> List[str]:
+        """
+        Pages of the journey: the start page plus the given pages, or
+        discovered ones. Raises ValueError for pages of another site.
+        """
+        limit = min(max_pages or settings.journey_max_pages, settings.journey_max_pages)
+        if not pages:
+            return await discover_pages(url, limit)
+
+        site = domain_of(url)
+        unique: Dict[str, str] = {}
+        for page in [url] + pages:
+            if domain_of(page) != site:
+                raise ValueError(f"{page} is not on {site}")
+            unique.setdefault(normalize_url(page), page)
+        return list(unique.values())[:limit]
+
+    async def run(self, urls: List[str], force_refresh: bool = False, tenant: str = "anonymous") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Audit the journey's pages (the first is the start page) and yield a
+        "page" item as each finishes, then the site-level result.
+        """
+        logger.info(f"Starting journey of {len(urls)} pages from {urls[0]}")
+        finished: asyncio.Queue = asyncio.Queue()
+        outcomes: Dict[str, Tuple[Dict[str, Any], Optional[AuditResult]]] = {}
+
+        async def audit_one(url: str) -> None:
+            outcome = await audit_page(
+                self._jobs, self._store, url, force_refresh, self._throttle, tenant, Priority.BATCH
+            )
+            outcomes[url] = outcome
+            finished.put_nowait(outcome[0])
+
+        tasks = [asyncio.create_task(audit_one(url)) for url in urls]
+        try:
+            for _ in tasks:
+                item = await finished.get()
+                # The full page result is part of the site-level result
+                yield {**{key: value for key, value in item.items() if key != "result"}, "type": "page"}
+        finally:
+            # Client went away - stop the remaining pages
+            for task in tasks:
+                task.cancel()
+
+        try:
+            result = combine_pages(urls[0], [outcomes[url] for url in urls])
+        except ValueError as e:
+            logger.warning(f"Journey from {urls[0]} failed: {e}")
+            yield {"type": "journey", "status": AuditStatus.FAILED.value, "error": str(e), "result": None}
+            return
+        completed = sum(1 for item, _ in outcomes.values() if item["status"] == AuditStatus.COMPLETED.value)
+        logger.info(f"Journey from {urls[0]} finished: {completed}/{len(urls)} pages, {result.total_issues} issues")
+        yield {"type": "journey", "status": AuditStatus.COMPLETED.value, "result": result.model_dump(mode="json")}
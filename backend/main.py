@@ -1,29 +1,120 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-import uuid
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+import json
 import logging
 import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any
+from datetime import datetime
+from typing import Dict, List, Optional
 
-from backend.models import AuditRequest, AuditResponse
+from backend.config import settings
+from backend.models import AuditDiff, AuditHistoryPage, AuditRequest, AuditResponse, AuditStatus, BatchAuditRequest, CompareAuditRequest, JourneyAuditRequest, MonitorSchedule, RequestUrl, ScheduleRequest
 from backend.tinyfish_client import run_audit
-from backend.enrichment import get_quick_insights, enrich_audit_with_news
+from backend.enrichment import EnrichmentPipeline, company_name_of, get_quick_insights
+from backend.http_client import open_client, close_client
+from backend.jobs import AuditJobManager, QueueFullError
+from backend.store import StoredAudit, create_store
+from backend.singleflight import SharedSingleFlight
+from backend.cache import TTLCache
+from backend.shared_state import SharedCache, create_shared_state
+from backend.batch import BatchScheduler, fetch_sitemap_urls
+from backend.journey import JourneyAuditor
+from backend.compare import CompareAuditor
+from backend.resilience import CircuitBreaker, tinyfish_breaker
+from backend.metrics import registry, queue_rejections_total
+from backend.tracing import tracer
+from backend.responses import json_response, ndjson_response
+from backend.diff import diff_results
+from backend.scheduler import MonitorScheduler, create_schedule_store
+from backend.static_assets import StaticAssets
+from backend.sessions import Priority, session_scheduler, tenant_of
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# In-memory cache for background news tasks
-news_tasks: Dict[str, asyncio.Task] = {}
-news_results: Dict[str, Any] = {}
+# State shared with the other uvicorn workers (in-process unless configured)
+shared_state = create_shared_state()
+
+# Background enrichment tasks started by this worker's create_audit, keyed
+# by company name (removed when they finish)
+enrichment_tasks: Dict[str, asyncio.Task] = {}
+
+# Provider results of all workers, keyed by provider and company name
+enrichment_results = SharedCache(
+    TTLCache(
+        "enrichment",
+        max_entries=settings.news_cache_max_entries,
+        ttl=settings.news_cache_ttl,
+        max_bytes=settings.news_cache_max_bytes
+    ),
+    shared_state,
+    prefix="enrichment"
+)
+
+# News, incidents and competitor intel providers; concurrent requests for the
+# same company share one TinyFish run per provider, across workers
+enrichment = EnrichmentPipeline(enrichment_results, SharedSingleFlight("enrichment", shared_state))
+
+# Persistent audit results (also serves as a cache for repeat URLs)
+audit_store = create_store()
+
+# Queued audits, run as TinyFish session slots free up (see backend.sessions)
+audit_jobs = AuditJobManager(run_audit, store=audit_store, state=shared_state)
+
+# Schedules batch audits through the job queue with per-domain limits
+batch_scheduler = BatchScheduler(audit_jobs, store=audit_store)
+
+# Multi-page journeys of one site, with a per-site concurrency cap
+journey_auditor = JourneyAuditor(audit_jobs, store=audit_store)
+
+# Side-by-side audits of a site and its competitors
+compare_auditor = CompareAuditor(audit_jobs, store=audit_store)
+
+# Recurring monitoring audits, dispatched through the job queue
+monitor_scheduler = MonitorScheduler(audit_jobs, create_schedule_store(), state=shared_state)
+
+# Scrape-time gauges for state owned by the components above
+registry.gauge("audit_queue_depth", "Audits waiting for a TinyFish session slot", fn=lambda: audit_jobs.queue_depth)
+registry.gauge("audit_jobs_in_flight", "Queued or running audits", fn=lambda: audit_jobs.in_flight)
+registry.gauge("monitor_schedules", "Monitoring schedules", fn=lambda: monitor_scheduler.schedule_count)
+registry.gauge("monitor_runs_in_flight", "Scheduled audits waiting or running", fn=lambda: monitor_scheduler.runs_in_flight)
+registry.gauge("enrichment_background_tasks", "Background enrichment tasks", fn=lambda: len(enrichment_tasks))
+registry.gauge("enrichment_cache_entries", "Entries in the enrichment cache", fn=lambda: len(enrichment_results))
+registry.counter("enrichment_cache_hits_total", "Enrichment cache hits", fn=lambda: enrichment_results.local.hits)
+registry.counter("enrichment_cache_misses_total", "Enrichment cache misses", fn=lambda: enrichment_results.local.misses)
+registry.counter("enrichment_cache_evictions_total", "Enrichment cache LRU evictions",
+                 fn=lambda: enrichment_results.local.evictions)
+registry.gauge("tinyfish_circuit_open", "1 while the TinyFish circuit breaker is open",
+               fn=lambda: float(tinyfish_breaker.state == CircuitBreaker.OPEN))
+registry.counter("tinyfish_circuit_rejections_total", "Calls rejected by the open circuit",
+                 fn=lambda: tinyfish_breaker.rejected)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared TinyFish HTTP client and background services for the lifetime of the app"""
+    await open_client()
+    if settings.monitor_enabled:
+        await monitor_scheduler.start()
+    try:
+        yield
+    finally:
+        await monitor_scheduler.stop()
+        await audit_jobs.stop()
+        await audit_store.close()
+        await shared_state.close()
+        await close_client()
+
 
 app = FastAPI(
     title="TinyFish Agent Loss Prevention",
     description="Showcase dashboard for TinyFish's AI-powered website audits",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend access
@@ -38,166 +129,431 @@ app.add_middleware(
 # Get the project root directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Mount static files
-app.mount("/static", StaticFiles(directory=BASE_DIR / "frontend" / "static"), name="static")
+# Static files: fingerprinted and precompressed in memory, or straight from disk
+static_assets = StaticAssets(BASE_DIR / "frontend")
+if settings.static_fingerprint:
+    static_assets.build()
+
+    @app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+    async def read_static(path: str, request: Request):
+        """Serve a static asset (immutable under its fingerprinted name)"""
+        return static_assets.asset_response(path, request)
+else:
+    app.mount("/static", StaticFiles(directory=BASE_DIR / "frontend" / "static"), name="static")
+
+
+def _page(name: str, request: Request) -> Response:
+    if settings.static_fingerprint:
+        return static_assets.page_response(name, request)
+    return FileResponse(BASE_DIR / "frontend" / name)
 
 
 @app.get("/")
-async def read_root():
+async def read_root(request: Request):
     """Serve the main dashboard page"""
-    return FileResponse(BASE_DIR / "frontend" / "index.html")
+    return _page("index.html", request)
 
 
 @app.get("/loading")
-async def read_loading():
+async def read_loading(request: Request):
     """Serve the loading page"""
-    return FileResponse(BASE_DIR / "frontend" / "loading.html")
+    return _page("loading.html", request)
 
 
 @app.get("/dashboard")
-async def read_dashboard():
+async def read_dashboard(request: Request):
     """Serve the dashboard page"""
-    return FileResponse(BASE_DIR / "frontend" / "index.html")
+    return _page("index.html", request)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "tinyfish-alp-showcase"}
+    circuit = tinyfish_breaker.snapshot()
+    return {
+        "status": "healthy" if circuit["state"] == CircuitBreaker.CLOSED else "degraded",
+        "service": "tinyfish-alp-showcase",
+        "tinyfish_circuit": circuit,
+        "tinyfish_sessions": session_scheduler.snapshot(),
+        "enrichment_cache": enrichment_results.stats()
+    }
 
 
-@app.post("/api/audit", response_model=AuditResponse)
-async def create_audit(request: AuditRequest):
+def _stored_response(stored: StoredAudit, cached: bool = False, diff: Optional[AuditDiff] = None) -> AuditResponse:
+    return AuditResponse(
+        audit_id=stored.audit_id,
+        status=AuditStatus.COMPLETED,
+        result=stored.result,
+        cached=cached,
+        diff=diff
+    )
+
+
+async def _stored_diff(stored: StoredAudit) -> AuditDiff:
+    """Diff of a stored audit against the audit of the same URL before it"""
+    previous = await audit_store.latest(stored.url, before=stored)
+    return diff_results(
+        stored.result,
+        previous.result if previous else None,
+        previous.audit_id if previous else None
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/api/audit", response_model=AuditResponse, status_code=202)
+async def create_audit(request: AuditRequest, http_request: Request):
     """
-    Trigger a new audit for the provided URL.
+    Queue a new audit for the provided URL.
 
     This endpoint:
-    1. Validates the URL
-    2. Calls TinyFish API with the audit prompt
-    3. Enriches with company news from DuckDuckGo
-    4. Returns the audit results with enrichment data
+    1. Returns a stored result younger than AUDIT_CACHE_TTL (200 OK), unless
+       force_refresh is set
+    2. Otherwise queues the audit on the bounded worker pool
+    3. Starts enrichment (news, incidents, competitors) in the background
+    4. Returns the audit_id immediately (202 Accepted)
+
+    Poll GET /api/audit/{audit_id} or stream GET /api/audit/{audit_id}/events
+    for the result.
     """
+    if not request.force_refresh:
+        try:
+            stored = await audit_store.find_fresh(request.url, settings.audit_cache_ttl)
+        except Exception as e:
+            logger.error(f"Audit store lookup failed for {request.url}: {e}")
+            stored = None
+        if stored is not None:
+            logger.info(f"Serving stored audit {stored.audit_id} for {request.url}")
+            diff = await _stored_diff(stored) if request.incremental else None
+            return json_response(_stored_response(stored, cached=True, diff=diff), http_request)
+
+    logger.info(f"Submitting audit for URL: {request.url}")
+    tenant = tenant_of(http_request)
+
     try:
-        logger.info(f"Starting audit for URL: {request.url}")
-
-        # Generate unique audit ID
-        audit_id = str(uuid.uuid4())
-
-        # Start BOTH audit and news in parallel (TinyFish can handle parallel sessions)
-        logger.info("Starting audit and news enrichment in parallel")
-
-        # Start news task in background immediately
-        async def fetch_and_cache_news():
-            try:
-                news_data = await enrich_audit_with_news(request.url)
-                news_results[request.url] = news_data
-                logger.info(f"News enrichment completed for {request.url}: {len(news_data.get('news', []))} articles")
-            except Exception as e:
-                logger.error(f"News enrichment failed for {request.url}: {e}")
-                news_results[request.url] = {"company_name": "", "news": [], "incidents": [], "competitive_intel": [], "error": str(e)}
-            finally:
-                # Clean up task reference
-                if request.url in news_tasks:
-                    del news_tasks[request.url]
-
-        # Create background task for news
-        news_tasks[request.url] = asyncio.create_task(fetch_and_cache_news())
-
-        # Run audit (will complete while news is still running in background)
-        result = await run_audit(request.url)
-
-        logger.info(f"Audit completed for {request.url}: {result.total_issues} issues found")
-
-        # Return audit results immediately (news is still running in background)
-        result.enrichment = None
-
-        return AuditResponse(
-            audit_id=audit_id,
-            status="completed",
-            result=result
+        job = audit_jobs.submit(
+            request.url, incremental=request.incremental, skip_if_unchanged=request.skip_if_unchanged,
+            priority=Priority.INTERACTIVE, tenant=tenant
         )
-
-    except Exception as e:
-        logger.error(f"Audit failed for {request.url}: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Audit failed: {str(e)}"
+    except QueueFullError as e:
+        queue_rejections_total.inc()
+        logger.warning(f"Rejecting audit for {request.url}: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+
+    # Start enrichment in background immediately (unless already running for
+    # this company); providers with cached results return without a run
+    company_key = company_name_of(request.url).lower()
+    if company_key not in enrichment_tasks:
+        task = asyncio.create_task(enrichment.enrich(request.url, tenant))
+        enrichment_tasks[company_key] = task
+        # Clean up task reference
+        task.add_done_callback(lambda _: enrichment_tasks.pop(company_key, None))
+
+    return json_response(job.to_response(), http_request, status_code=202)
+
+
+@app.get("/api/audit", response_model=AuditHistoryPage)
+async def list_audits(
+    request: Request,
+    domain: Optional[RequestUrl] = Query(default=None, description="Site to list, e.g. example.com"),
+    since: Optional[datetime] = Query(default=None, description="Audits created at or after this time"),
+    until: Optional[datetime] = Query(default=None, description="Audits created before this time"),
+    min_risk_score: Optional[int] = Query(default=None, ge=0, le=100),
+    error_type: Optional[str] = Query(default=None, description="Only audits with this technical/contextual error_type"),
+    gap_type: Optional[str] = Query(default=None, description="Only audits with this competitive gap_type"),
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page")
+):
+    """
+    Stored audit history, newest first, with severity summaries but without
+    result bodies. Page through with `next_cursor`.
+    """
+    try:
+        page = await audit_store.history(
+            domain=domain, since=since, until=until, min_risk_score=min_risk_score,
+            error_type=error_type, gap_type=gap_type, limit=limit, cursor=cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_response(page, request)
+
+
+@app.post("/api/audit/batch")
+async def create_batch_audit(request: BatchAuditRequest, http_request: Request):
+    """
+    Audit a list of URLs and/or every page in a sitemap.xml.
+
+    Streams NDJSON: one "result" line per URL as it finishes, then a final
+    "report" line with the worst pages, an issue-type histogram and the
+    average risk score.
+    """
+    urls = list(request.urls)
+    if request.sitemap_url:
+        try:
+            urls.extend(await fetch_sitemap_urls(request.sitemap_url))
+        except Exception as e:
+            logger.error(f"Failed to read sitemap {request.sitemap_url}: {e}")
+            raise HTTPException(status_code=400, detail=f"Failed to read sitemap: {e}")
+
+    if not urls:
+        raise HTTPException(status_code=400, detail="Provide at least one URL or a sitemap_url")
+
+    return ndjson_response(
+        batch_scheduler.run(urls, force_refresh=request.force_refresh, tenant=tenant_of(http_request)), http_request
+    )
+
+
+@app.post("/api/audit/journey")
+async def create_journey_audit(request: JourneyAuditRequest, http_request: Request):
+    """
+    Audit several pages of one site as a journey (home -> product -> cart ->
+    checkout), given in `pages` or discovered from the start page.
+
+    Streams NDJSON: a "pages" line with the pages being audited, one "page"
+    line per page as it finishes, then a "journey" line with the site-level
+    result (issues recurring across pages reported once, plus a per-page
+    breakdown).
+    """
+    try:
+        urls = await journey_auditor.plan(request.url, request.pages, request.max_pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def items():
+        yield {"type": "pages", "urls": urls}
+        async for item in journey_auditor.run(urls, force_refresh=request.force_refresh, tenant=tenant_of(http_request)):
+            yield item
+
+    return ndjson_response(items(), http_request)
+
+
+@app.post("/api/audit/compare")
+async def create_comparison(request: CompareAuditRequest, http_request: Request):
+    """
+    Audit a site and its competitors concurrently and compare them.
+
+    Streams NDJSON: one "site" line per site as it finishes (its row of the
+    comparison matrix), then a "comparison" line with every row, the
+    ranking by risk score and the issue types only the target has.
+    """
+    competitors = compare_auditor.plan(request.url, request.competitors)
+    if not competitors:
+        raise HTTPException(status_code=400, detail="Provide at least one competitor URL other than the target")
+
+    return ndjson_response(
+        compare_auditor.run(request.url, competitors, force_refresh=request.force_refresh, tenant=tenant_of(http_request)),
+        http_request
+    )
 
 
-@app.get("/api/audit/{audit_id}")
-async def get_audit(audit_id: str):
+@app.get("/api/audit/{audit_id}", response_model=AuditResponse)
+async def get_audit(audit_id: str, request: Request):
     """
-    Retrieve audit results by ID.
+    Retrieve audit status and, once completed, its results.
 
-    For MVP, this is not implemented (no database).
-    In production, this would query stored audit results.
+    Supports If-None-Match, so pollers get 304 until the status changes.
     """
-    raise HTTPException(
-        status_code=501,
-        detail="Audit history not implemented in MVP. Run a new audit instead."
+    job = audit_jobs.get(audit_id)
+    if job is not None:
+        return json_response(job.to_response(), request)
+
+    stored = await audit_store.get(audit_id)
+    if stored is not None:
+        return json_response(_stored_response(stored), request)
+
+    # Queued or running in another worker
+    shared = await audit_jobs.shared_status(audit_id)
+    if shared is None:
+        raise HTTPException(status_code=404, detail=f"Audit {audit_id} not found")
+    return json_response(shared, request)
+
+
+@app.get("/api/audit/{audit_id}/diff", response_model=AuditDiff)
+async def get_audit_diff(audit_id: str, request: Request):
+    """
+    Issues added, resolved and unchanged compared with the previous stored
+    audit of the same URL.
+    """
+    job = audit_jobs.get(audit_id)
+    if job is not None and job.diff is not None:
+        return json_response(job.diff, request)
+
+    stored = await audit_store.get(audit_id)
+    if stored is None:
+        if job is not None and not job.done:
+            raise HTTPException(status_code=409, detail=f"Audit {audit_id} has not finished")
+        raise HTTPException(status_code=404, detail=f"Audit {audit_id} not found")
+    return json_response(await _stored_diff(stored), request)
+
+
+@app.get("/api/audit/{audit_id}/events")
+async def stream_audit_events(audit_id: str):
+    """
+    Stream audit progress as Server-Sent Events until the audit finishes.
+    """
+    job = audit_jobs.get(audit_id)
+    if job is None:
+        stored = await audit_store.get(audit_id)
+        if stored is not None:
+            async def stored_stream():
+                yield f"event: result\ndata: {_stored_response(stored).model_dump_json()}\n\n"
+
+            return StreamingResponse(stored_stream(), media_type="text/event-stream")
+
+        shared = await audit_jobs.shared_status(audit_id)
+        if shared is None:
+            raise HTTPException(status_code=404, detail=f"Audit {audit_id} not found")
+        return StreamingResponse(
+            shared_status_stream(shared),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async def event_stream():
+        async for event in job.subscribe():
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+        # Final snapshot so clients don't need a follow-up request
+        yield f"event: result\ndata: {job.to_response().model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
+async def shared_status_stream(status: AuditResponse):
+    """
+    Status events for an audit running in another worker, polled from
+    shared state. Step and issue events are only streamed by the worker
+    running the audit.
+    """
+    last = None
+    while status.status not in (AuditStatus.COMPLETED, AuditStatus.FAILED):
+        if status.status != last:
+            yield f"event: status\ndata: {status.model_dump_json(include={'audit_id', 'status'})}\n\n"
+            last = status.status
+        await asyncio.sleep(settings.shared_lock_poll_interval)
+        latest = await audit_jobs.shared_status(status.audit_id)
+        if latest is None:
+            break  # snapshot expired
+        status = latest
+    yield f"event: result\ndata: {status.model_dump_json()}\n\n"
+
+
+@app.post("/api/schedules", response_model=MonitorSchedule, status_code=201)
+async def create_schedule(request: ScheduleRequest):
+    """
+    Re-audit a URL on a cron expression (e.g. "0 3 * * *" or "@daily").
+
+    Runs are incremental by default and skip the agent run when the page
+    content is unchanged.
+    """
+    try:
+        return await monitor_scheduler.add(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/schedules", response_model=List[MonitorSchedule])
+async def list_schedules():
+    """All monitoring schedules with their next and last runs"""
+    return await monitor_scheduler.list()
+
+
+@app.get("/api/schedules/{schedule_id}", response_model=MonitorSchedule)
+async def get_schedule(schedule_id: str):
+    schedule = await monitor_scheduler.get(schedule_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail=f"Schedule {schedule_id} not found")
+    return schedule
+
+
+@app.delete("/api/schedules/{schedule_id}", status_code=204)
+async def delete_schedule(schedule_id: str):
+    if not await monitor_scheduler.remove(schedule_id):
+        raise HTTPException(status_code=404, detail=f"Schedule {schedule_id} not found")
+
+
+@app.post("/api/schedules/{schedule_id}/run", response_model=MonitorSchedule, status_code=202)
+async def run_schedule_now(schedule_id: str):
+    """Trigger a scheduled audit now (skipped if its previous run is still in flight)"""
+    schedule = await monitor_scheduler.run_now(schedule_id)
+    if schedule is None:
+        raise HTTPException(status_code=404, detail=f"Schedule {schedule_id} not found")
+    return schedule
+
+
+@app.get("/api/debug/traces/{audit_id}")
+async def get_trace(audit_id: str, request: Request):
+    """SSE trace of a sampled audit run (step timings, event types, byte counts)"""
+    trace = tracer.get(audit_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="No trace for this audit (not sampled or expired)")
+    return json_response(trace, request)
+
+
 @app.get("/api/insights")
-async def get_insights():
+async def get_insights(url: Optional[str] = Query(default=None, description="Lead with insights from this site's cached enrichment")):
     """
     Get quick industry insights about AI agent adoption
     """
-    insights = await get_quick_insights("")
+    cached = await enrichment.cached(url) if url else None
+    insights = await get_quick_insights(cached)
     return {
         "insights": insights,
         "updated": "2026-02-07"
     }
 
 
+@app.get("/api/enrichment/{url:path}")
+async def stream_enrichment(url: str, request: Request):
+    """
+    Stream enrichment for the site's company as Server-Sent Events: one
+    "provider" event per provider (news, incidents, competitors) as it
+    finishes or misses its deadline, then a "complete" event with the
+    combined data.
+    """
+    async def event_stream():
+        async for item in enrichment.stream(url, tenant_of(request)):
+            yield f"event: {item['type']}\ndata: {json.dumps(item, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.get("/api/news/{url:path}")
-async def get_company_news(url: str):
+async def get_company_news(url: str, request: Request):
     """
-    Get company-specific news for a given URL.
+    Get company news, incidents and competitor intel for a given URL.
 
-    This endpoint checks if news is already being fetched in the background
-    (started when audit was triggered). If so, it waits for that task.
-    If not, it starts a new fetch.
+    Cached per company, so every page of a site shares the result. If the
+    providers are already running (e.g. started when the audit was
+    triggered), this waits for those runs; otherwise it starts them. Each
+    provider has its own deadline; sections that miss it come back empty
+    and are listed under "errors".
     """
     try:
         logger.info(f"News request for: {url}")
-
-        # Check if result is already cached
-        if url in news_results:
-            logger.info(f"Returning cached news for {url}")
-            return news_results[url]
-
-        # Check if task is currently running
-        if url in news_tasks:
-            logger.info(f"Waiting for in-progress news task for {url}")
-            await news_tasks[url]
-            return news_results.get(url, {
-                "company_name": "",
-                "news": [],
-                "incidents": [],
-                "competitive_intel": []
-            })
-
-        # No cached result and no running task - start a new fetch
-        logger.info(f"Starting new news fetch for {url}")
-        enrichment_data = await enrich_audit_with_news(url)
-        logger.info(f"News fetch completed: {len(enrichment_data.get('news', []))} articles found")
-
-        # Cache the result
-        news_results[url] = enrichment_data
-        return enrichment_data
+        return json_response(await enrichment.enrich(url, tenant_of(request)), request)
 
     except Exception as e:
         logger.error(f"News fetch failed for {url}: {str(e)}")
         # Return empty data on failure, don't error out
-        return {
+        return json_response({
             "company_name": "",
             "news": [],
             "incidents": [],
             "competitive_intel": [],
             "error": str(e)
-        }
+        }, request)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,211 @@
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4).
+
+Counters, gauges and histograms with optional labels, rendered by the
+/metrics endpoint. Gauges (and counters) may be backed by a callback that
+is read at scrape time, for values owned by other components such as the
+job queue or the news cache.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+INF_LABEL = 'le="+Inf"'
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._fn = fn
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        if self._fn is not None:
+            return [f"{self.name} {_format_value(self._fn())}"]
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Increment while the block runs (e.g. in-flight requests)"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, sum, count)
+        self._series: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None) -> Counter:
+        return self.register(Counter(name, description, labels, fn))
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = (), fn: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, description, labels, fn))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# TinyFish audit runs, per stage (seconds from request start)
+audit_connect_seconds = registry.histogram(
+    "tinyfish_audit_connect_seconds", "Time until TinyFish response headers were received")
+audit_first_event_seconds = registry.histogram(
+    "tinyfish_audit_first_event_seconds", "Time until the first SSE event was received")
+audit_complete_seconds = registry.histogram(
+    "tinyfish_audit_complete_seconds", "Time until the COMPLETE event (or end of stream)")
+audit_parse_seconds = registry.histogram(
+    "tinyfish_audit_parse_seconds", "Time spent parsing streamed audit output",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+audit_validation_seconds = registry.histogram(
+    "tinyfish_audit_validation_seconds", "Time spent validating the AuditResult model",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0))
+audit_sse_events = registry.histogram(
+    "tinyfish_audit_sse_events", "SSE events received per audit run", buckets=COUNT_BUCKETS)
+audit_job_seconds = registry.histogram(
+    "audit_job_duration_seconds", "Audit job duration from start to finish", labels=("outcome",))
+session_wait_seconds = registry.histogram(
+    "tinyfish_session_wait_seconds", "Time waiting for a TinyFish session slot", labels=("priority",),
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0))
+audit_steps = registry.histogram(
+    "tinyfish_audit_steps", "Agent steps used per audit run", buckets=COUNT_BUCKETS)
+precheck_seconds = registry.histogram(
+    "audit_precheck_seconds", "Duration of the deterministic pre-audit target checks")
+
+# Counters
+tinyfish_requests_total = registry.counter(
+    "tinyfish_requests_total", "TinyFish calls by operation and outcome", labels=("operation", "outcome"))
+tinyfish_retries_total = registry.counter(
+    "tinyfish_retries_total", "TinyFish call retries", labels=("operation",))
+tinyfish_run_rejections_total = registry.counter(
+    "tinyfish_run_rejections_total", "Runs rejected by TinyFish (resultJson.rejected)")
+parse_failures_total = registry.counter(
+    "tinyfish_parse_failures_total", "Audit output that could not be fully parsed", labels=("reason",))
+precheck_checks_total = registry.counter(
+    "audit_precheck_checks_total", "Pre-audit target checks by kind and outcome", labels=("kind", "outcome"))
+early_stops_total = registry.counter(
+    "tinyfish_audit_early_stops_total", "Audit runs ended client-side", labels=("reason",))
+queue_rejections_total = registry.counter(
+    "audit_queue_rejections_total", "Audit submissions rejected because the queue was full")
+
+# Gauges
+tinyfish_runs_in_flight = registry.gauge(
+    "tinyfish_runs_in_flight", "TinyFish runs currently streaming", labels=("operation",))
+sessions_in_use = registry.gauge(
+    "tinyfish_sessions_in_use", "TinyFish session slots held", labels=("priority",))
+sessions_waiting = registry.gauge(
+    "tinyfish_sessions_waiting", "Requests waiting for a TinyFish session slot", labels=("priority",))
@@ -1,7 +1,12 @@
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field, model_validator
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
+
+from backend.urls import valid_url
+
+# Submitted URL; unparseable ones (e.g. port 99999) are rejected with a 422
+RequestUrl = Annotated[str, AfterValidator(valid_url)]
 
 
 class IssueSeverity(str, Enum):
@@ -42,6 +47,82 @@ class CompetitiveGap(BaseModel):
     severity: IssueSeverity
 
 
+# Risk score weight per issue
+SEVERITY_WEIGHTS = {
+    IssueSeverity.CRITICAL: 25,
+    IssueSeverity.HIGH: 10,
+    IssueSeverity.MEDIUM: 5,
+    IssueSeverity.LOW: 2,
+}
+
+
+class AuditSummary(BaseModel):
+    """Severity/category counts and risk score, computed once per result"""
+    total_issues: int = 0
+    critical_count: int = 0
+    high_count: int = 0
+    medium_count: int = 0
+    low_count: int = 0
+    risk_score: int = Field(default=0, description="0-100, higher = worse")
+    technical_count: int = 0
+    contextual_count: int = 0
+    competitive_count: int = 0
+
+    @classmethod
+    def of(cls, result: "AuditResult") -> "AuditSummary":
+        counts = {severity: 0 for severity in IssueSeverity}
+        for issues in (result.technical_failures, result.contextual_errors, result.competitive_gaps):
+            for issue in issues:
+                counts[issue.severity] += 1
+        return cls(
+            total_issues=sum(counts.values()),
+            critical_count=counts[IssueSeverity.CRITICAL],
+            high_count=counts[IssueSeverity.HIGH],
+            medium_count=counts[IssueSeverity.MEDIUM],
+            low_count=counts[IssueSeverity.LOW],
+            risk_score=min(100, sum(SEVERITY_WEIGHTS[s] * n for s, n in counts.items())),  # Cap at 100
+            technical_count=len(result.technical_failures),
+            contextual_count=len(result.contextual_errors),
+            competitive_count=len(result.competitive_gaps),
+        )
+
+
+class PrecheckSummary(BaseModel):
+    """What the deterministic pre-audit checked before the agent run"""
+    links_checked: int = 0
+    images_checked: int = 0
+    forms_checked: int = 0
+    targets_skipped: int = Field(
+        default=0, description="Targets over the per-page cap, not checked before the deadline, or with inconclusive checks"
+    )
+    findings: int = 0
+    elapsed: float = Field(default=0.0, description="Seconds spent checking targets")
+
+
+class AgentRunStats(BaseModel):
+    """Steps the TinyFish run used against its budget"""
+    steps_used: int = 0
+    max_steps: int = Field(..., description="Step budget sent to TinyFish")
+    deadline: float = Field(..., description="Seconds the run was allowed")
+    budget_basis: str = Field(default="default", description="history, complexity or default")
+    stopped_early: Optional[str] = Field(
+        default=None, description="issue_limit or deadline when the run was ended client-side"
+    )
+    elapsed: float = 0.0
+
+
+class JourneyPage(BaseModel):
+    """One page of a journey audit"""
+    url: str
+    audit_id: Optional[str] = None
+    status: str = Field(..., description="completed or failed")
+    cached: bool = False
+    error: Optional[str] = None
+    summary: Optional[AuditSummary] = Field(default=None, description="The page's own audit, before de-duplication")
+    site_wide_issues: int = Field(default=0, description="Issues of this page that recur on other pages")
+    page_issues: int = Field(default=0, description="Issues found only on this page")
+
+
 class AuditResult(BaseModel):
     """Complete audit result from TinyFish"""
     url: str
@@ -50,49 +131,141 @@ class AuditResult(BaseModel):
     contextual_errors: List[ContextualError] = Field(default_factory=list)
     competitive_gaps: List[CompetitiveGap] = Field(default_factory=list)
     enrichment: Optional[Dict[str, Any]] = Field(default=None, description="External enrichment data (news, incidents, etc.)")
+    precheck: Optional[PrecheckSummary] = Field(default=None, description="Deterministic link/image/form checks merged into technical_failures")
+    pages: Optional[List[JourneyPage]] = Field(default=None, description="Per-page breakdown of a journey audit")
+    run: Optional[AgentRunStats] = Field(default=None, description="Steps used versus budget for the agent run")
+    summary: AuditSummary = Field(default_factory=AuditSummary, description="Computed from the issue lists on construction")
+
+    @model_validator(mode="after")
+    def _summarize(self) -> "AuditResult":
+        # Always derived from the issues, never trusted from input
+        self.summary = AuditSummary.of(self)
+        return self
 
     @property
     def total_issues(self) -> int:
-        return len(self.technical_failures) + len(self.contextual_errors) + len(self.competitive_gaps)
+        return self.summary.total_issues
 
     @property
     def critical_count(self) -> int:
-        return sum(1 for issue in self.all_issues if issue.severity == IssueSeverity.CRITICAL)
+        return self.summary.critical_count
 
     @property
     def high_count(self) -> int:
-        return sum(1 for issue in self.all_issues if issue.severity == IssueSeverity.HIGH)
+        return self.summary.high_count
 
     @property
     def medium_count(self) -> int:
-        return sum(1 for issue in self.all_issues if issue.severity == IssueSeverity.MEDIUM)
+        return self.summary.medium_count
 
     @property
     def low_count(self) -> int:
-        return sum(1 for issue in self.all_issues if issue.severity == IssueSeverity.LOW)
+        return self.summary.low_count
 
     @property
     def risk_score(self) -> int:
-        """Calculate 0-100 risk score (higher = worse)"""
-        # Weight: critical=25, high=10, medium=5, low=2
-        score = (
-            sum(25 for i in self.all_issues if i.severity == IssueSeverity.CRITICAL) +
-            sum(10 for i in self.all_issues if i.severity == IssueSeverity.HIGH) +
-            sum(5 for i in self.all_issues if i.severity == IssueSeverity.MEDIUM) +
-            sum(2 for i in self.all_issues if i.severity == IssueSeverity.LOW)
-        )
-        return min(100, score)  # Cap at 100
+        """0-100 risk score (higher = worse); weights in SEVERITY_WEIGHTS"""
+        return self.summary.risk_score
 
     @property
     def all_issues(self):
         return self.technical_failures + self.contextual_errors + self.competitive_gaps
 
 
+class AuditStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class AuditRequest(BaseModel):
-    url: str = Field(..., description="URL to audit")
+    url: RequestUrl = Field(..., description="URL to audit")
+    force_refresh: bool = Field(default=False, description="Skip cached results and run a fresh audit")
+    incremental: bool = Field(default=False, description="Report what changed since the previous audit of this URL")
+    skip_if_unchanged: bool = Field(
+        default=False,
+        description="With incremental, reuse the previous result instead of running when the page content is unchanged"
+    )
+
+
+class BatchAuditRequest(BaseModel):
+    urls: List[RequestUrl] = Field(default_factory=list, description="URLs to audit")
+    sitemap_url: Optional[RequestUrl] = Field(default=None, description="sitemap.xml whose URLs are added to the batch")
+    force_refresh: bool = Field(default=False, description="Skip cached results and run fresh audits")
+
+
+class JourneyAuditRequest(BaseModel):
+    url: RequestUrl = Field(..., description="Start page of the journey")
+    pages: List[RequestUrl] = Field(
+        default_factory=list,
+        description="Pages of the same site to audit; discovered from the start page's links when empty"
+    )
+    max_pages: Optional[int] = Field(default=None, ge=1, description="Pages audited including the start page (capped by JOURNEY_MAX_PAGES)")
+    force_refresh: bool = Field(default=False, description="Skip cached results and run fresh audits")
+
+
+class CompareAuditRequest(BaseModel):
+    url: RequestUrl = Field(..., description="Site to compare")
+    competitors: List[RequestUrl] = Field(..., min_length=1, description="Competitor URLs audited alongside it")
+    force_refresh: bool = Field(default=False, description="Skip cached results and run fresh audits")
+
+
+class IssueChange(BaseModel):
+    """An issue in an audit diff, identified by its fingerprint"""
+    fingerprint: str
+    category: str
+    issue: Dict[str, Any]
+
+
+class AuditDiff(BaseModel):
+    """Issues added, resolved and unchanged since the previous audit of the URL"""
+    previous_audit_id: Optional[str] = Field(default=None, description="None when there was no earlier audit")
+    run_skipped: bool = Field(default=False, description="Page content was unchanged, so the previous result was reused")
+    added: List[IssueChange] = Field(default_factory=list)
+    resolved: List[IssueChange] = Field(default_factory=list)
+    unchanged: List[IssueChange] = Field(default_factory=list)
 
 
 class AuditResponse(BaseModel):
     audit_id: str
-    status: str = "completed"
-    result: AuditResult
+    status: AuditStatus = AuditStatus.COMPLETED
+    result: Optional[AuditResult] = None
+    error: Optional[str] = Field(default=None, description="Failure reason when status is 'failed'")
+    cached: bool = Field(default=False, description="Result was served from the audit store")
+    diff: Optional[AuditDiff] = Field(default=None, description="Changes since the previous audit (incremental mode)")
+
+
+class AuditHistoryItem(BaseModel):
+    """Stored audit without its result body, for history listings"""
+    audit_id: str
+    url: str
+    domain: str
+    created_at: datetime
+    summary: AuditSummary
+
+
+class AuditHistoryPage(BaseModel):
+    items: List[AuditHistoryItem] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(default=None, description="Pass as `cursor` for the next (older) page")
+
+
+class ScheduleRequest(BaseModel):
+    url: RequestUrl = Field(..., description="URL to re-audit on the schedule")
+    cron: str = Field(..., description="Cron expression (5 fields, server-local time) or @hourly/@daily/@weekly")
+    incremental: bool = Field(default=True, description="Diff each run against the previous audit")
+    skip_if_unchanged: bool = Field(default=True, description="Skip the agent run when the page content is unchanged")
+    enabled: bool = True
+
+
+class MonitorSchedule(ScheduleRequest):
+    """A persisted monitoring schedule and the outcome of its last run"""
+    schedule_id: str
+    created_at: datetime
+    next_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
+    last_audit_id: Optional[str] = None
+    last_status: Optional[str] = Field(default=None, description="running, completed, failed, or rejected (queue full)")
+    last_error: Optional[str] = None
+    runs: int = 0
+    skipped_runs: int = 0
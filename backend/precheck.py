@@ -0,0 +1,302 @@
+"""
+Deterministic pre-audit checks.
+
+Broken links, missing images and form actions that lead nowhere can be found
+without an agent: the audit's fetched page (see backend.site_fetch) is
+parsed for links, images and forms, and each target is checked with a
+bounded HEAD request (falling back to GET); targets on non-public hosts are
+not requested. At most PRECHECK_MAX_RUNNING pre-audits run at once, so queued
+audits cannot exhaust the customer-site connection pool. The findings are
+merged into the audit's technical_failures, and when most checks were
+conclusive the agent run gets a focused goal and a smaller step budget that
+leave those checks out (see backend.prompts).
+"""
+import asyncio
+import logging
+import time
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from backend.config import settings
+from backend.diff import fingerprint
+from backend.metrics import precheck_checks_total, precheck_seconds
+from backend.models import AuditResult, PrecheckSummary, TechnicalFailure
+from backend.site_fetch import BlockedHostError, FetchedPage, site_request
+from backend.urls import domain_of
+
+logger = logging.getLogger(__name__)
+
+# Landmark elements used to say where on the page a target sits
+LANDMARKS = {"header": "Header", "nav": "Navigation", "main": "Main content", "aside": "Sidebar", "footer": "Footer"}
+
+# Statuses that say the check was blocked rather than that the target is broken
+INCONCLUSIVE_STATUSES = {401, 403, 429}
+
+# Form actions often only accept POST, so only these mean the action is gone
+FORM_BROKEN_STATUSES = {404, 410}
+
+# Checked first when a page has more targets than the cap
+KIND_ORDER = ("form", "link", "image")
+
+# Pre-audits running at once, across all audits
+_running = asyncio.Semaphore(settings.precheck_max_running)
+
+
+class PageTarget:
+    """A link, image or form action found on the page"""
+
+    def __init__(self, kind: str, url: str, label: str, location: str, internal: bool):
+        self.kind = kind
+        self.url = url
+        self.label = label
+        self.location = location
+        # On the audited site (as opposed to an external link)
+        self.internal = internal
+
+
+class _PageExtractor(HTMLParser):
+    """Collects link, image and form targets with their text and landmark"""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.site = domain_of(base_url)
+        self.targets: List[PageTarget] = []
+        self._landmarks: List[str] = []
+        self._link: Optional[Dict[str, Any]] = None
+
+    @property
+    def _location(self) -> str:
+        return LANDMARKS[self._landmarks[-1]] if self._landmarks else "Page body"
+
+    def _add(self, kind: str, raw_url: Optional[str], label: str) -> None:
+        raw_url = (raw_url or "").strip()
+        if not raw_url or raw_url.startswith("#"):
+            return
+        try:
+            url = urljoin(self.base_url, raw_url).split("#", 1)[0]
+            if urlsplit(url).scheme not in ("http", "https"):
+                return  # mailto:, tel:, javascript:, data:
+            internal = domain_of(url) == self.site
+        except ValueError:
+            return  # unparseable, e.g. an out-of-range port
+        label = " ".join(label.split())[:80]
+        self.targets.append(PageTarget(kind, url, label, self._location, internal))
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes = dict(attrs)
+        if tag == "base" and attributes.get("href"):
+            self.base_url = urljoin(self.base_url, attributes["href"])
+        elif tag in LANDMARKS:
+            self._landmarks.append(tag)
+        elif tag == "a":
+            self._link = {"href": attributes.get("href"), "text": "",
+                          "label": attributes.get("aria-label") or attributes.get("title") or ""}
+        elif tag == "img":
+            src = attributes.get("src") or attributes.get("data-src")
+            self._add("image", src, attributes.get("alt") or src or "")
+        elif tag == "form":
+            # No action means the form submits to the page itself
+            if attributes.get("action"):
+                self._add("form", attributes["action"], attributes.get("name") or attributes.get("id") or "form")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in LANDMARKS and tag in self._landmarks:
+            # Close the innermost matching landmark (tolerates unclosed children)
+            del self._landmarks[len(self._landmarks) - 1 - self._landmarks[::-1].index(tag):]
+        elif tag == "a" and self._link is not None:
+            link, self._link = self._link, None
+            self._add("link", link["href"], link["text"].strip() or link["label"] or link["href"] or "")
+
+    def handle_data(self, data: str) -> None:
+        if self._link is not None:
+            self._link["text"] += data
+
+
+def extract_targets(html: str, page_url: str) -> List[PageTarget]:
+    """Unique targets of the page (first occurrence wins)"""
+    extractor = _PageExtractor(page_url)
+    try:
+        extractor.feed(html)
+        extractor.close()
+    except Exception as e:
+        logger.warning(f"HTML of {page_url} could not be fully parsed: {e}")
+    seen = set()
+    targets = []
+    for target in extractor.targets:
+        if (target.kind, target.url) not in seen:
+            seen.add((target.kind, target.url))
+            targets.append(target)
+    return targets
+
+
+class PrecheckResult:
+    """Findings of the pre-audit, as technical_failures issue dicts"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.findings: List[Dict[str, Any]] = []
+        self.checked = {kind: 0 for kind in KIND_ORDER}
+        self.skipped = 0
+        # Checks that timed out, were blocked or missed the deadline (part of skipped)
+        self.inconclusive = 0
+        self.elapsed = 0.0
+
+    @property
+    def focused(self) -> bool:
+        """Whether most checks were conclusive, so the agent can leave them out"""
+        checked = sum(self.checked.values())
+        return checked > 0 and self.inconclusive <= checked
+
+    def summary(self) -> PrecheckSummary:
+        return PrecheckSummary(
+            links_checked=self.checked["link"],
+            images_checked=self.checked["image"],
+            forms_checked=self.checked["form"],
+            targets_skipped=self.skipped,
+            findings=len(self.findings),
+            elapsed=round(self.elapsed, 2),
+        )
+
+
+def _finding(target: PageTarget, failure: str) -> Dict[str, Any]:
+    if target.kind == "image":
+        return {
+            "error_type": "missing_media",
+            "element": f'Image "{target.label}" ({target.url})',
+            "location": target.location,
+            "expected_behavior": "Image loads",
+            "actual_behavior": failure,
+            "transaction_impact": "Agent cannot use the image to confirm the product or option it is buying",
+            "severity": "medium",
+        }
+    if target.kind == "form":
+        return {
+            "error_type": "broken_form",
+            "element": f'Form "{target.label}" submitting to {target.url}',
+            "location": target.location,
+            "expected_behavior": "Form submits to a working endpoint",
+            "actual_behavior": failure,
+            "transaction_impact": "Agent's form submission fails, blocking the step the form is for",
+            "severity": "high",
+        }
+    return {
+        "error_type": "broken_link",
+        "element": f'Link "{target.label}" ({target.url})',
+        "location": target.location,
+        "expected_behavior": "Link opens a working page",
+        "actual_behavior": failure,
+        "transaction_impact": "Agent following the link hits a dead end and may abandon the task",
+        # Broken links within the site break the agent's own navigation
+        "severity": "high" if target.internal else "medium",
+    }
+
+
+async def _check(target: PageTarget) -> Tuple[bool, Optional[str]]:
+    """(whether the check was conclusive, why the target is broken or None when it works)"""
+    timeout = settings.precheck_request_timeout
+    try:
+        response = await site_request("HEAD", target.url, timeout)
+        status = response.status_code
+        if status >= 400:
+            # Many servers mishandle HEAD; confirm with a GET without reading the body
+            response = await site_request("GET", target.url, timeout, stream=True)
+            await response.aclose()
+            status = response.status_code
+    except BlockedHostError:
+        precheck_checks_total.inc(kind=target.kind, outcome="blocked")
+        return False, None
+    except httpx.TimeoutException:
+        # Includes PoolTimeout: our side was busy, the target may be fine
+        precheck_checks_total.inc(kind=target.kind, outcome="timeout")
+        return False, None
+    except httpx.HTTPError as e:
+        precheck_checks_total.inc(kind=target.kind, outcome="error")
+        return True, f"Request failed: {type(e).__name__}"
+
+    broken = status in FORM_BROKEN_STATUSES if target.kind == "form" else (
+        status >= 400 and status not in INCONCLUSIVE_STATUSES
+    )
+    precheck_checks_total.inc(kind=target.kind, outcome="broken" if broken else "ok")
+    if not broken:
+        return True, None
+    reason = httpx.codes.get_reason_phrase(status)
+    return True, f"Returns {status} {reason}".strip()
+
+
+async def run_precheck(url: str, page: Optional[FetchedPage]) -> Optional[PrecheckResult]:
+    """
+    Check the targets of the audit's fetched page.
+
+    Returns None when the page could not be fetched as HTML (bot protection,
+    JS-only responses, network errors, non-public hosts) - the agent then
+    runs the full audit.
+    """
+    if page is None or not page.is_html:
+        reason = "page fetch failed" if page is None else f"status {page.status_code}, {page.content_type}"
+        logger.info(f"Pre-audit skipped for {url}: {reason}")
+        return None
+
+    async with _running:
+        return await _run_checks(url, page)
+
+
+async def _run_checks(url: str, page: FetchedPage) -> PrecheckResult:
+    started = time.perf_counter()
+    result = PrecheckResult(url)
+    targets = extract_targets(page.text, page.url)
+    targets.sort(key=lambda target: (KIND_ORDER.index(target.kind), not target.internal))
+    result.skipped = max(0, len(targets) - settings.precheck_max_targets)
+    targets = targets[:settings.precheck_max_targets]
+
+    limit = asyncio.Semaphore(settings.precheck_concurrency)
+
+    async def check(target: PageTarget) -> Tuple[PageTarget, bool, Optional[str]]:
+        async with limit:
+            return (target, *await _check(target))
+
+    tasks = [asyncio.create_task(check(target)) for target in targets]
+    failures: List[Tuple[PageTarget, str]] = []
+    if tasks:
+        done, pending = await asyncio.wait(tasks, timeout=settings.precheck_deadline)
+        for task in pending:
+            task.cancel()
+        result.inconclusive += len(pending)
+        for task in done:
+            target, conclusive, failure = task.result()
+            if not conclusive:
+                result.inconclusive += 1
+                continue
+            result.checked[target.kind] += 1
+            if failure:
+                failures.append((target, failure))
+        result.skipped += result.inconclusive
+
+    # Keep page order so the report reads top to bottom
+    order = {id(target): index for index, target in enumerate(targets)}
+    failures.sort(key=lambda item: order[id(item[0])])
+    result.findings = [_finding(target, failure) for target, failure in failures[:settings.precheck_max_findings]]
+    result.elapsed = time.perf_counter() - started
+    precheck_seconds.observe(result.elapsed)
+    logger.info(
+        f"Pre-audit of {url}: {sum(result.checked.values())} targets checked, "
+        f"{len(failures)} broken, {result.skipped} skipped ({result.inconclusive} inconclusive) in {result.elapsed:.1f}s"
+    )
+    return result
+
+
+def merge_precheck(result: AuditResult, precheck: PrecheckResult) -> AuditResult:
+    """Add the pre-audit findings to an agent result, dropping issues the agent repeated"""
+    findings = [TechnicalFailure(**finding) for finding in precheck.findings]
+    seen = {fingerprint("technical_failures", issue) for issue in findings}
+    agent_issues = [
+        issue for issue in result.technical_failures
+        if fingerprint("technical_failures", issue) not in seen
+    ]
+    data = result.model_dump(exclude={"summary"})
+    data["technical_failures"] = findings + agent_issues
+    data["precheck"] = precheck.summary()
+    return AuditResult(**data)
@@ -1,3 +1,5 @@
+import hashlib
+
 AUDIT_PROMPT = """
 Analyze this webpage for AI agent compatibility and identify potential issues.
 
@@ -65,3 +67,72 @@ Evaluate this page from an AI agent's perspective during a commercial transactio
 
 **RETURN:** Only the JSON object. No explanatory text before or after.
 """
+
+# Used when the deterministic pre-audit (backend.precheck) has already checked
+# the page's links, images and form targets: the agent only looks for what
+# needs a browser and judgement
+FOCUSED_AUDIT_PROMPT = """
+Analyze this webpage for AI agent compatibility. Links, images and form targets were already checked - do NOT report broken_link or missing_media issues.
+
+**OUTPUT SCHEMA - Return JSON with this EXACT structure:**
+```json
+{
+  "technical_failures": [
+    {
+      "error_type": "dead_cta|broken_form|load_failure",
+      "element": "description of problematic element",
+      "location": "where on page",
+      "expected_behavior": "what should happen",
+      "actual_behavior": "what actually happens",
+      "transaction_impact": "how this causes agent to fail/abandon",
+      "severity": "critical|high|medium|low"
+    }
+  ],
+  "contextual_errors": [
+    {
+      "error_type": "seasonal_mismatch|price_contradiction|availability_mismatch|description_contradiction",
+      "content": "problematic content quote",
+      "location": "where it appears",
+      "why_wrong": "why this is wrong",
+      "agent_confusion": "how agent misinterprets this",
+      "severity": "critical|high|medium|low"
+    }
+  ],
+  "competitive_gaps": [
+    {
+      "gap_type": "missing_pricing|unclear_availability|hidden_checkout|missing_specs",
+      "missing_element": "what's missing",
+      "location": "where it should be",
+      "competitor_standard": "what competitors provide",
+      "agent_impact": "how agent tries to work around this",
+      "severity": "critical|high|medium|low"
+    }
+  ]
+}
+```
+
+**WHAT TO CHECK (from an AI agent's perspective during a purchase):**
+
+1. **Contextual Errors** - Outdated content, price contradictions, availability mismatches
+   - Example: "Holiday Sale" banner in February = seasonal_mismatch (high severity)
+
+2. **Competitive Gaps** - Missing standard e-commerce elements
+   - Example: No shipping cost shown = missing_pricing (high severity)
+
+3. **Interactive Failures** - Only CTAs that do nothing when clicked and forms that fail on submit
+
+**TERMINATION CONDITIONS (Stop when ANY occur):**
+- Found 5+ issues across all categories
+- Read the main content (hero, product details, pricing, CTAs)
+- Spent 40+ seconds analyzing
+
+**EDGE CASES:**
+- No issues found: Return empty arrays []
+- Page load failure: Report as technical_failure with load_failure type
+
+**RETURN:** Only the JSON object. No explanatory text before or after.
+"""
+
+# Identifies the prompts a stored result was produced with, so cached audits
+# are not reused after a prompt changes
+AUDIT_PROMPT_VERSION = hashlib.sha256((AUDIT_PROMPT + FOCUSED_AUDIT_PROMPT).encode()).hexdigest()[:12]
@@ -0,0 +1,231 @@
+"""
+Retries, backoff and circuit breaking for calls to the TinyFish endpoint.
+
+Transient upstream failures (connection errors, dropped streams, 429/502/
+503/504) are retried with exponential backoff and full jitter. Repeated
+upstream failures open a circuit breaker shared by audits and enrichment,
+so callers fail fast instead of hammering a failing upstream.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+
+from backend.config import settings
+from backend.metrics import tinyfish_retries_total
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+
+RETRYABLE_TRANSPORT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.RemoteProtocolError,
+    httpx.ReadError,
+)
+
+
+class UpstreamError(Exception):
+    """Non-success response from TinyFish"""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class StreamDroppedError(Exception):
+    """SSE stream ended abnormally before the run completed"""
+
+
+class RunDeadlineError(Exception):
+    """
+    A run reached its client-side step-budget deadline without audit output.
+    Our own budget ran out, so it is neither retried (a rerun would get the
+    same budget) nor counted against the circuit breaker.
+    """
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit is open"""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, UpstreamError):
+        return exc.status_code in RETRYABLE_STATUS
+    return isinstance(exc, (StreamDroppedError,) + RETRYABLE_TRANSPORT_ERRORS)
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Failures that count against the circuit breaker"""
+    if isinstance(exc, UpstreamError):
+        return exc.status_code >= 500 or exc.status_code == 429
+    if isinstance(exc, httpx.PoolTimeout):
+        # Local pool saturation, not an upstream problem
+        return False
+    return isinstance(exc, (StreamDroppedError, httpx.TransportError))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, name: str, max_attempts: int, base_delay: float, max_delay: float):
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        """Delay before retry number `attempt` (1-based)"""
+        retry_after = getattr(exc, "retry_after", None)
+        if retry_after is not None:
+            return min(self.max_delay, retry_after)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive upstream failures;
+    open -> half-open after `reset_timeout` seconds, letting one trial call
+    through; a successful trial closes the circuit, a failed one reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == self.OPEN or (state == self.HALF_OPEN and self._trial_in_flight):
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} circuit is open; failing fast")
+        if state == self.HALF_OPEN:
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        if self._state != self.CLOSED:
+            logger.info(f"{self.name} circuit closed")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"{self.name} circuit opened after {self._failures} consecutive failures")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot when the call failed for local reasons"""
+        self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        return {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected,
+            "retry_in": round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 1) if state == self.OPEN else 0.0,
+        }
+
+
+# One breaker for the TinyFish endpoint, shared by audits and enrichment
+tinyfish_breaker = CircuitBreaker(
+    "tinyfish",
+    failure_threshold=settings.tinyfish_breaker_failure_threshold,
+    reset_timeout=settings.tinyfish_breaker_reset_timeout
+)
+
+audit_retry_policy = RetryPolicy(
+    "audit",
+    settings.tinyfish_retry_attempts,
+    settings.tinyfish_retry_base_delay,
+    settings.tinyfish_retry_max_delay
+)
+
+enrichment_retry_policy = RetryPolicy(
+    "enrichment",
+    settings.tinyfish_enrichment_retry_attempts,
+    settings.tinyfish_retry_base_delay,
+    settings.tinyfish_retry_max_delay
+)
+
+
+async def call_with_resilience(
+    fn: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    breaker: CircuitBreaker = tinyfish_breaker,
+    on_retry: Optional[Callable[[int, BaseException, float], None]] = None
+) -> T:
+    """
+    Call `fn` through the circuit breaker, retrying transient failures.
+
+    `on_retry(attempt, exc, delay)` is called before each retry.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            if is_upstream_failure(e):
+                breaker.record_failure()
+            elif isinstance(e, UpstreamError):
+                # Upstream answered (e.g. 4xx) - it is reachable
+                breaker.record_success()
+            else:
+                breaker.release_trial()
+
+            if attempt >= policy.max_attempts or not is_retryable(e):
+                raise
+
+            delay = policy.delay(attempt, e)
+            tinyfish_retries_total.inc(operation=policy.name)
+            logger.warning(f"TinyFish call failed ({e!r}); retry {attempt}/{policy.max_attempts - 1} in {delay:.1f}s")
+            if on_retry is not None:
+                on_retry(attempt, e, delay)
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
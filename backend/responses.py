@@ -0,0 +1,133 @@
+"""
+Fast-path JSON responses.
+
+Audit results are validated once when they are built, so responses skip
+FastAPI's response_model round trip: models are dumped straight to bytes by
+pydantic, other payloads go through orjson when it is installed. Bodies
+carry an ETag (answered with 304 on If-None-Match) and large ones are
+compressed with brotli or gzip, depending on what the client accepts.
+"""
+import gzip
+import hashlib
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from backend.config import settings
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is used instead
+    brotli = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode a model or plain JSON-compatible data to bytes, once"""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode()
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. integers beyond 64 bits; fall through
+    return json.dumps(content, default=str).encode()
+
+
+def choose_encoding(request: Optional[Request]) -> Optional[str]:
+    if request is None:
+        return None
+    accepted = {part.split(";")[0].strip().lower() for part in request.headers.get("accept-encoding", "").split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def etag_matches(request: Optional[Request], etag: str) -> bool:
+    """Whether the request's If-None-Match already names this ETag (answer 304)"""
+    if request is None:
+        return False
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.response_brotli_quality)
+    return gzip.compress(body, compresslevel=settings.response_gzip_level)
+
+
+def json_response(
+    content: Any,
+    request: Optional[Request] = None,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    JSON response with ETag/304 handling and compression of bodies over
+    RESPONSE_COMPRESS_MIN_BYTES.
+    """
+    body = dumps(content)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", **(headers or {})}
+
+    if status_code == 200 and etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    if len(body) >= settings.response_compress_min_bytes:
+        encoding = choose_encoding(request)
+        if encoding is not None:
+            body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+    return Response(body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+async def compressed_stream(chunks: AsyncIterator[bytes], encoding: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    Compress a streamed body chunk by chunk, flushing after each one so
+    clients still receive every item as soon as it is produced.
+    """
+    if encoding is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=settings.response_brotli_quality)
+        async for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+        return
+
+    # wbits 31 = gzip container
+    compressor = zlib.compressobj(settings.response_gzip_level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def ndjson_response(items: AsyncIterator[Any], request: Optional[Request] = None) -> StreamingResponse:
+    """
+    Stream items as NDJSON, one line each as it is produced, compressed
+    when the client allows it (batch and comparison reports get large).
+    """
+    async def lines() -> AsyncIterator[bytes]:
+        async for item in items:
+            yield dumps(item) + b"\n"
+
+    encoding = choose_encoding(request)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(compressed_stream(lines(), encoding), media_type="application/x-ndjson", headers=headers)
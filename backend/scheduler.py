@@ -0,0 +1,331 @@
+"""
+In-process scheduler for recurring monitoring audits.
+
+Each schedule re-audits a URL on a cron expression through the audit job
+queue. Scheduled runs share a global concurrency budget, start after a
+random jitter so schedules on the same minute don't hit TinyFish at once,
+and a trigger that fires while the schedule's previous run is still in
+flight is skipped. Triggers missed while the server was down collapse
+into a single run on startup. Schedules are persisted next to the audits.
+
+With several workers, only the one holding the scheduler lease in shared
+state dispatches runs; it picks up schedules added or removed through the
+other workers from the schedule store.
+"""
+import asyncio
+import logging
+import random
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from backend.config import settings
+from backend.cron import CronExpression
+from backend.jobs import AuditJobManager, QueueFullError
+from backend.models import MonitorSchedule, ScheduleRequest
+from backend.sessions import Priority
+from backend.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+# Longest the scheduler loop sleeps before re-checking due schedules
+MAX_SLEEP = 60.0
+
+# Shared lock held by the worker that dispatches scheduled runs
+LEADER_LOCK = "monitor-scheduler"
+
+
+class ScheduleStore:
+    """Schedules as JSON rows in SQLite; with no path they are kept in memory only"""
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS schedules (schedule_id TEXT PRIMARY KEY, schedule_json TEXT NOT NULL)"
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._memory: Dict[str, str] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _run(self, sql: str, params=()) -> list:
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute(self.SCHEMA)
+            with self._conn:
+                return self._conn.execute(sql, params).fetchall()
+
+    async def load(self) -> List[MonitorSchedule]:
+        if self.path is None:
+            rows = list(self._memory.values())
+        else:
+            rows = [row[0] for row in await asyncio.to_thread(self._run, "SELECT schedule_json FROM schedules")]
+        return [MonitorSchedule.model_validate_json(row) for row in rows]
+
+    async def save(self, schedule: MonitorSchedule) -> None:
+        data = schedule.model_dump_json()
+        if self.path is None:
+            self._memory[schedule.schedule_id] = data
+            return
+        await asyncio.to_thread(
+            self._run,
+            "INSERT OR REPLACE INTO schedules (schedule_id, schedule_json) VALUES (?, ?)",
+            (schedule.schedule_id, data)
+        )
+
+    async def delete(self, schedule_id: str) -> None:
+        if self.path is None:
+            self._memory.pop(schedule_id, None)
+            return
+        await asyncio.to_thread(self._run, "DELETE FROM schedules WHERE schedule_id = ?", (schedule_id,))
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_schedule_store(backend: str = settings.audit_store_backend) -> ScheduleStore:
+    """Schedules live in the audit database for the sqlite backend, in memory otherwise"""
+    return ScheduleStore(settings.audit_store_path if backend == "sqlite" else None)
+
+
+class MonitorScheduler:
+    """Dispatches scheduled audits through the job queue"""
+
+    def __init__(
+        self,
+        jobs: AuditJobManager,
+        store: ScheduleStore,
+        concurrency: int = settings.monitor_concurrency,
+        jitter: float = settings.monitor_jitter,
+        max_schedules: int = settings.monitor_max_schedules,
+        state: Optional[SharedState] = None
+    ):
+        self._jobs = jobs
+        self._store = store
+        self._state = state
+        # Without shared state this is the only worker
+        self._leader = state is None
+        self._jitter = jitter
+        self._max_schedules = max_schedules
+        self._budget = asyncio.Semaphore(concurrency)
+        self._schedules: Dict[str, MonitorSchedule] = {}
+        self._crons: Dict[str, CronExpression] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def schedule_count(self) -> int:
+        return len(self._schedules)
+
+    @property
+    def runs_in_flight(self) -> int:
+        return len(self._running)
+
+    async def start(self) -> None:
+        if self._loop_task is not None:
+            return
+        try:
+            stored = await self._store.load()
+        except Exception as e:
+            # e.g. a read-only filesystem; run without persisted schedules
+            logger.error(f"Failed to load schedules: {e}")
+            stored = []
+        for schedule in stored:
+            self._load(schedule)
+        self._loop_task = asyncio.create_task(self._loop(), name="monitor-scheduler")
+        logger.info(f"Started monitor scheduler with {len(self._schedules)} schedules")
+
+    async def stop(self) -> None:
+        tasks = list(self._running.values())
+        if self._loop_task is not None:
+            tasks.append(self._loop_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_task = None
+        if self._state is not None and self._leader:
+            await self._state.release(LEADER_LOCK)
+        await self._store.close()
+
+    async def _current(self) -> Dict[str, MonitorSchedule]:
+        """Schedules as the dispatching worker sees them"""
+        if self._leader or self._store.path is None:
+            return self._schedules
+        # The leader saves run state to the store; read it from there
+        try:
+            stored = await self._store.load()
+        except Exception as e:
+            logger.error(f"Failed to load schedules: {e}")
+            return self._schedules
+        return {schedule.schedule_id: schedule for schedule in stored}
+
+    async def list(self) -> List[MonitorSchedule]:
+        schedules = await self._current()
+        return sorted(schedules.values(), key=lambda schedule: schedule.created_at)
+
+    async def get(self, schedule_id: str) -> Optional[MonitorSchedule]:
+        return (await self._current()).get(schedule_id)
+
+    async def add(self, request: ScheduleRequest) -> MonitorSchedule:
+        """Raises ValueError for invalid cron expressions or when the schedule limit is reached"""
+        if len(self._schedules) >= self._max_schedules:
+            raise ValueError(f"Schedule limit reached ({self._max_schedules})")
+        cron = CronExpression(request.cron)
+
+        now = datetime.now()
+        schedule = MonitorSchedule(
+            **request.model_dump(),
+            schedule_id=str(uuid.uuid4()),
+            created_at=now,
+            next_run_at=cron.next_after(now)
+        )
+        # Saved first so the leader never sees it in memory but not in the store
+        await self._store.save(schedule)
+        self._crons[schedule.schedule_id] = cron
+        self._schedules[schedule.schedule_id] = schedule
+        self._wakeup.set()
+        logger.info(f"Added schedule {schedule.schedule_id} for {schedule.url} ({schedule.cron})")
+        return schedule
+
+    async def remove(self, schedule_id: str) -> bool:
+        if schedule_id not in await self._current():
+            return False
+        await self._store.delete(schedule_id)
+        self._drop(schedule_id)
+        return True
+
+    async def run_now(self, schedule_id: str) -> Optional[MonitorSchedule]:
+        """Dispatch a schedule immediately, without jitter"""
+        schedule = self._schedules.get(schedule_id)
+        if schedule is None and not self._leader:
+            # Added through another worker since this one started
+            stored = (await self._current()).get(schedule_id)
+            schedule = self._load(stored) if stored is not None else None
+        if schedule is not None:
+            self._dispatch(schedule, jitter=False)
+        return schedule
+
+    def _load(self, schedule: MonitorSchedule) -> Optional[MonitorSchedule]:
+        try:
+            self._crons[schedule.schedule_id] = CronExpression(schedule.cron)
+        except ValueError as e:
+            logger.error(f"Ignoring schedule {schedule.schedule_id}: {e}")
+            return None
+        self._schedules[schedule.schedule_id] = schedule
+        if schedule.next_run_at is None:
+            schedule.next_run_at = self._crons[schedule.schedule_id].next_after(datetime.now())
+        return schedule
+
+    def _drop(self, schedule_id: str) -> None:
+        self._schedules.pop(schedule_id, None)
+        self._crons.pop(schedule_id, None)
+        task = self._running.pop(schedule_id, None)
+        if task is not None:
+            # Stops waiting for the run; the audit itself still completes
+            task.cancel()
+
+    async def _lead(self) -> bool:
+        """Take or renew the scheduler lease; a new leader reloads every schedule"""
+        if self._state is None:
+            return True
+        was_leader = self._leader
+        try:
+            self._leader = await self._state.acquire(LEADER_LOCK, MAX_SLEEP * 3)
+        except Exception as e:
+            logger.error(f"Scheduler lease check failed: {e}")
+            self._leader = False
+        if self._leader and self._store.path is not None:
+            await self._refresh(reload=not was_leader)
+        if self._leader and not was_leader:
+            logger.info("This worker now dispatches scheduled audits")
+        return self._leader
+
+    async def _refresh(self, reload: bool) -> None:
+        """Pick up schedules added or removed through other workers"""
+        try:
+            stored = {schedule.schedule_id: schedule for schedule in await self._store.load()}
+        except Exception as e:
+            logger.error(f"Failed to reload schedules: {e}")
+            return
+        for schedule_id in list(self._schedules):
+            if schedule_id not in stored:
+                self._drop(schedule_id)
+        for schedule_id, schedule in stored.items():
+            if reload and schedule_id in self._running:
+                continue
+            if reload or schedule_id not in self._schedules:
+                self._load(schedule)
+
+    async def _loop(self) -> None:
+        while True:
+            # Followers only re-check the lease; the schedules they loaded
+            # are dispatched (and advanced) by the leader, not by them
+            delay = MAX_SLEEP
+            if await self._lead():
+                now = datetime.now()
+                for schedule in list(self._schedules.values()):
+                    if schedule.enabled and schedule.next_run_at is not None and schedule.next_run_at <= now:
+                        self._dispatch(schedule)
+                        await self._save(schedule)
+
+                upcoming = [s.next_run_at for s in self._schedules.values() if s.enabled and s.next_run_at]
+                delay = min([delay] + [(at - datetime.now()).total_seconds() for at in upcoming])
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+
+    def _dispatch(self, schedule: MonitorSchedule, jitter: bool = True) -> None:
+        # Computed from now, so any triggers missed meanwhile collapse into this one
+        schedule.next_run_at = self._crons[schedule.schedule_id].next_after(datetime.now())
+
+        if schedule.schedule_id in self._running:
+            schedule.skipped_runs += 1
+            logger.info(f"Skipping scheduled audit of {schedule.url}: previous run still in flight")
+            return
+
+        delay = random.uniform(0, self._jitter) if jitter else 0.0
+        task = asyncio.create_task(self._run(schedule, delay))
+        self._running[schedule.schedule_id] = task
+        task.add_done_callback(lambda _: self._running.pop(schedule.schedule_id, None))
+
+    async def _run(self, schedule: MonitorSchedule, delay: float) -> None:
+        if delay:
+            await asyncio.sleep(delay)
+
+        async with self._budget:
+            schedule.last_run_at = datetime.now()
+            schedule.runs += 1
+            schedule.last_error = None
+            try:
+                job = self._jobs.submit(
+                    schedule.url, incremental=schedule.incremental, skip_if_unchanged=schedule.skip_if_unchanged,
+                    priority=Priority.SCHEDULED, tenant=f"schedule:{schedule.schedule_id}"
+                )
+            except QueueFullError as e:
+                schedule.last_status = "rejected"
+                schedule.last_error = str(e)
+                logger.warning(f"Scheduled audit of {schedule.url} rejected: {e}")
+            else:
+                schedule.last_audit_id = job.audit_id
+                schedule.last_status = "running"
+                await self._save(schedule)
+                await job.wait()
+                schedule.last_status = job.status.value
+                schedule.last_error = job.error
+
+        await self._save(schedule)
+
+    async def _save(self, schedule: MonitorSchedule) -> None:
+        if schedule.schedule_id not in self._schedules:
+            return  # removed meanwhile
+        try:
+            await self._store.save(schedule)
+        except Exception as e:
+            logger.error(f"Failed to persist schedule {schedule.schedule_id}: {e}")
@@ -0,0 +1,206 @@
+"""
+Priority and fair-share scheduling of TinyFish session slots.
+
+Audits and news enrichment share a global cap on concurrent TinyFish
+sessions. Waiting requests are granted slots by priority class
+(interactive > scheduled > batch > enrichment) and round-robin across
+tenants within a class, so one customer's large batch cannot starve
+another's. A few slots are reserved for interactive audits so dashboard
+users never wait behind a full house of background runs.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+from fastapi import Request
+
+from backend.config import settings
+from backend.metrics import session_wait_seconds, sessions_in_use, sessions_waiting
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower values are served first"""
+    INTERACTIVE = 0
+    SCHEDULED = 1
+    BATCH = 2
+    ENRICHMENT = 3
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+def tenant_of(request: Request) -> str:
+    """Fair-queuing key for a request: its API key (hashed) or client address"""
+    api_key = request.headers.get("X-API-Key")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    return f"ip:{request.client.host}" if request.client else "anonymous"
+
+
+class SessionTicket:
+    """A request for one session slot"""
+
+    WAITING, GRANTED, RELEASED, CANCELLED = "waiting", "granted", "released", "cancelled"
+
+    def __init__(self, priority: Priority, tenant: str):
+        self.priority = priority
+        self.tenant = tenant
+        self.state = self.WAITING
+        self.requested_at = time.monotonic()
+        self.waited: Optional[float] = None
+        self._granted = asyncio.get_running_loop().create_future()
+
+
+class SessionScheduler:
+    """Global TinyFish session cap with priority classes and per-tenant fairness"""
+
+    def __init__(
+        self,
+        capacity: int = settings.tinyfish_max_sessions,
+        interactive_reserved: int = settings.tinyfish_interactive_reserved_sessions
+    ):
+        self.capacity = max(1, capacity)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.capacity - 1)
+        # priority -> tenant -> waiting tickets; tenant order is the round-robin order
+        self._waiting: Dict[Priority, "OrderedDict[str, Deque[SessionTicket]]"] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._in_use: Dict[Priority, int] = {priority: 0 for priority in Priority}
+
+    @property
+    def in_use(self) -> int:
+        return sum(self._in_use.values())
+
+    def waiting(self, priority: Optional[Priority] = None) -> int:
+        priorities = [priority] if priority is not None else list(Priority)
+        return sum(len(queue) for p in priorities for queue in self._waiting[p].values())
+
+    def request(self, priority: Priority, tenant: str) -> SessionTicket:
+        """Queue a ticket; it may be granted immediately"""
+        ticket = SessionTicket(priority, tenant)
+        self._enqueue(ticket)
+        self._grant()
+        return ticket
+
+    async def acquire(self, ticket: SessionTicket) -> None:
+        """Wait until the ticket is granted; cancelling gives up its place (or slot)"""
+        try:
+            await ticket._granted
+        except asyncio.CancelledError:
+            self.cancel(ticket)
+            raise
+
+    def release(self, ticket: SessionTicket) -> None:
+        if ticket.state != SessionTicket.GRANTED:
+            return
+        ticket.state = SessionTicket.RELEASED
+        self._in_use[ticket.priority] -= 1
+        sessions_in_use.dec(priority=ticket.priority.label)
+        self._grant()
+
+    def cancel(self, ticket: SessionTicket) -> None:
+        if ticket.state == SessionTicket.GRANTED:
+            self.release(ticket)
+        elif ticket.state == SessionTicket.WAITING:
+            self._dequeue(ticket)
+            ticket.state = SessionTicket.CANCELLED
+
+    def promote(self, ticket: SessionTicket, priority: Priority) -> None:
+        """Move a waiting ticket to a more urgent class (e.g. a user joined a batch audit)"""
+        if ticket.state != SessionTicket.WAITING or priority >= ticket.priority:
+            return
+        self._dequeue(ticket)
+        ticket.priority = priority
+        self._enqueue(ticket)
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority, tenant: str) -> AsyncIterator[SessionTicket]:
+        """Hold a session slot for the duration of the block"""
+        ticket = self.request(priority, tenant)
+        await self.acquire(ticket)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        classes = {}
+        for priority in Priority:
+            tickets = [ticket for queue in self._waiting[priority].values() for ticket in queue]
+            classes[priority.label] = {
+                "in_use": self._in_use[priority],
+                "waiting": len(tickets),
+                "tenants_waiting": len(self._waiting[priority]),
+                "oldest_wait_seconds": round(max((now - t.requested_at for t in tickets), default=0.0), 2),
+            }
+        return {
+            "capacity": self.capacity,
+            "interactive_reserved": self.interactive_reserved,
+            "in_use": self.in_use,
+            "waiting": self.waiting(),
+            "classes": classes,
+        }
+
+    def _enqueue(self, ticket: SessionTicket) -> None:
+        tenants = self._waiting[ticket.priority]
+        tenants.setdefault(ticket.tenant, deque()).append(ticket)
+        sessions_waiting.inc(priority=ticket.priority.label)
+
+    def _dequeue(self, ticket: SessionTicket) -> None:
+        tenants = self._waiting[ticket.priority]
+        queue = tenants.get(ticket.tenant)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if not queue:
+            del tenants[ticket.tenant]
+        sessions_waiting.dec(priority=ticket.priority.label)
+
+    def _next(self) -> Optional[SessionTicket]:
+        """Head ticket of the most urgent eligible class, rotating through its tenants"""
+        background_limit = self.capacity - self.interactive_reserved
+        for priority in Priority:
+            if priority != Priority.INTERACTIVE and self.in_use >= background_limit:
+                return None
+            tenants = self._waiting[priority]
+            if not tenants:
+                continue
+            tenant, queue = next(iter(tenants.items()))
+            ticket = queue.popleft()
+            if queue:
+                tenants.move_to_end(tenant)
+            else:
+                del tenants[tenant]
+            sessions_waiting.dec(priority=priority.label)
+            return ticket
+        return None
+
+    def _grant(self) -> None:
+        while self.in_use < self.capacity:
+            ticket = self._next()
+            if ticket is None:
+                return
+            if ticket._granted.done():
+                # Waiter was cancelled before it could clean up
+                ticket.state = SessionTicket.CANCELLED
+                continue
+            ticket.state = SessionTicket.GRANTED
+            ticket.waited = time.monotonic() - ticket.requested_at
+            self._in_use[ticket.priority] += 1
+            sessions_in_use.inc(priority=ticket.priority.label)
+            session_wait_seconds.observe(ticket.waited, priority=ticket.priority.label)
+            ticket._granted.set_result(None)
+
+
+# Shared by the audit job queue and news enrichment
+session_scheduler = SessionScheduler()
@@ -0,0 +1,248 @@
+"""
+State shared between uvicorn workers.
+
+Key/value entries with a TTL plus leased locks, behind one interface with
+an in-memory backend (single worker) and a SQLite backend for several
+worker processes on one node. Used for the news results cache,
+cross-worker single-flight of TinyFish runs, audit job status snapshots
+and the monitoring scheduler's leader lease.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from backend.cache import TTLCache
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as a lock owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+# Expired key/value rows are purged every this many writes
+PURGE_EVERY = 200
+
+
+class SharedState(ABC):
+    """Key/value entries (JSON-serializable values) and leased locks"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Value of a live entry, or None"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def acquire(self, name: str, ttl: float, owner: str = WORKER_ID) -> bool:
+        """Take the lock, or extend it if `owner` already holds it; False if held by someone else"""
+
+    @abstractmethod
+    async def release(self, name: str, owner: str = WORKER_ID) -> None:
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemorySharedState(SharedState):
+    """Process-local state; only correct with a single worker"""
+
+    def __init__(
+        self,
+        max_entries: int = settings.shared_state_max_entries,
+        max_bytes: int = settings.shared_state_max_bytes
+    ):
+        # Bounded: most keys (job status snapshots) are written once and rarely
+        # read again, so lazy expiry on lookup alone would never free them
+        self._entries = TTLCache("shared_state", max_entries=max_entries, ttl=settings.job_status_ttl, max_bytes=max_bytes)
+        self._locks: Dict[str, Tuple[str, float]] = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries.set(key, value, ttl)
+
+    async def delete(self, key: str) -> None:
+        self._entries.delete(key)
+
+    async def acquire(self, name: str, ttl: float, owner: str = WORKER_ID) -> bool:
+        now = time.time()
+        holder = self._locks.get(name)
+        if holder is not None and holder[0] != owner and holder[1] > now:
+            return False
+        self._locks[name] = (owner, now + ttl)
+        return True
+
+    async def release(self, name: str, owner: str = WORKER_ID) -> None:
+        holder = self._locks.get(name)
+        if holder is not None and holder[0] == owner:
+            del self._locks[name]
+
+
+class SQLiteSharedState(SharedState):
+    """State in a SQLite file (WAL mode) shared by the workers on one node"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS shared_entries (
+        key TEXT PRIMARY KEY,
+        value_json TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS shared_locks (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = settings.shared_state_path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10.0)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+            logger.info(f"Opened shared state at {self.path}")
+        return self._conn
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value_json FROM shared_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value_json: str, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO shared_entries (key, value_json, expires_at) VALUES (?, ?, ?)",
+                    (key, value_json, now + ttl)
+                )
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    conn.execute("DELETE FROM shared_entries WHERE expires_at <= ?", (now,))
+                    conn.execute("DELETE FROM shared_locks WHERE expires_at <= ?", (now,))
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(sql, params)
+
+    def _acquire(self, name: str, ttl: float, owner: str) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                # Take a free or expired lock, or renew our own; otherwise leave it alone
+                conn.execute(
+                    """
+                    INSERT INTO shared_locks (name, owner, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                    WHERE shared_locks.owner = excluded.owner OR shared_locks.expires_at <= ?
+                    """,
+                    (name, owner, now + ttl, now)
+                )
+                row = conn.execute("SELECT owner FROM shared_locks WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    async def get(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        await asyncio.to_thread(self._set, key, json.dumps(value, default=str), ttl)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self._execute, "DELETE FROM shared_entries WHERE key = ?", (key,))
+
+    async def acquire(self, name: str, ttl: float, owner: str = WORKER_ID) -> bool:
+        return await asyncio.to_thread(self._acquire, name, ttl, owner)
+
+    async def release(self, name: str, owner: str = WORKER_ID) -> None:
+        await asyncio.to_thread(
+            self._execute, "DELETE FROM shared_locks WHERE name = ? AND owner = ?", (name, owner)
+        )
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_shared_state(backend: str = settings.shared_state_backend) -> SharedState:
+    """Build the configured shared state backend ("memory" or "sqlite")"""
+    if backend == "sqlite":
+        return SQLiteSharedState()
+    if backend == "memory":
+        return MemorySharedState()
+    raise ValueError(f"Unknown shared state backend: {backend}")
+
+
+class SharedCache:
+    """
+    A process-local TTLCache in front of shared state.
+
+    Reads hit the local cache first and fall back to the shared entries
+    (filling the local cache); writes go to both, so a result cached by
+    one worker is served by all of them.
+    """
+
+    def __init__(self, local: TTLCache, state: SharedState, prefix: str):
+        self.local = local
+        self.state = state
+        self.prefix = prefix
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        try:
+            entry = await self.state.get(f"{self.prefix}:{key}")
+        except Exception as e:
+            logger.error(f"Shared {self.prefix} lookup failed for {key}: {e}")
+            return None
+        if entry is None:
+            return None
+        # Keep it locally only as long as it lives in the shared state
+        remaining = entry["expires_at"] - time.time()
+        if remaining > 0:
+            self.local.set(key, entry["value"], ttl=remaining)
+        return entry["value"]
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.local.ttl
+        self.local.set(key, value, ttl=ttl)
+        entry = {"value": value, "expires_at": time.time() + ttl}
+        try:
+            await self.state.set(f"{self.prefix}:{key}", entry, ttl)
+        except Exception as e:
+            logger.error(f"Shared {self.prefix} write failed for {key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.local.stats()
@@ -0,0 +1,131 @@
+"""
+Single-flight call de-duplication.
+
+Concurrent callers asking for the same key share one in-flight call and
+its result instead of each starting their own TinyFish run, within one
+process (SingleFlight) or across worker processes (SharedSingleFlight).
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from backend.config import settings
+from backend.shared_state import SharedState
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent async calls by key"""
+
+    def __init__(self, name: str = "call"):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn()` for `key`, or join the call already running for it.
+
+        The shared call is shielded, so one caller cancelling (e.g. a client
+        disconnect) does not cancel it for the others.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            logger.info(f"Joining in-flight {self.name} for {key}")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+
+class SharedSingleFlight:
+    """
+    Single-flight across worker processes via a leased lock in shared state.
+
+    Within a process calls are coalesced by a SingleFlight; across
+    processes the first caller takes the lock (renewed while `fn` runs)
+    and the others poll `lookup` until the holder has published its
+    result, taking over if the holder goes away without one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        state: SharedState,
+        lease: float = settings.shared_lock_lease,
+        poll_interval: float = settings.shared_lock_poll_interval
+    ):
+        self.name = name
+        self._local = SingleFlight(name)
+        self._state = state
+        self._lease = lease
+        self._poll_interval = poll_interval
+
+    @property
+    def in_flight(self) -> int:
+        return self._local.in_flight
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._local
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]], lookup: Callable[[], Awaitable[Optional[T]]]) -> T:
+        """
+        Run `fn()` once across all workers for `key`.
+
+        `fn` must publish its result where `lookup` finds it (e.g. a shared
+        cache); `lookup` returns None until then.
+        """
+        return await self._local.do(key, lambda: self._leader_or_wait(key, fn, lookup))
+
+    async def _leader_or_wait(self, key: str, fn: Callable[[], Awaitable[T]], lookup: Callable[[], Awaitable[Optional[T]]]) -> T:
+        lock = f"flight:{self.name}:{key}"
+        waited = False
+        while True:
+            if await self._state.acquire(lock, self._lease):
+                break
+            if not waited:
+                logger.info(f"Waiting for {self.name} of {key} running in another worker")
+                waited = True
+            await asyncio.sleep(self._poll_interval)
+            result = await lookup()
+            if result is not None:
+                return result
+
+        try:
+            if waited:
+                # The other worker may have published just before releasing
+                result = await lookup()
+                if result is not None:
+                    return result
+            renewal = asyncio.create_task(self._renew(lock))
+            try:
+                return await fn()
+            finally:
+                renewal.cancel()
+        finally:
+            await self._state.release(lock)
+
+    async def _renew(self, lock: str) -> None:
+        while True:
+            await asyncio.sleep(self._lease / 3)
+            try:
+                await self._state.acquire(lock, self._lease)
+            except Exception as e:
+                logger.warning(f"Failed to renew lock {lock}: {e}")
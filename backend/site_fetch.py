@@ -0,0 +1,130 @@
+"""
+Requests to customer sites.
+
+Audited URLs, sitemap URLs and the link targets found on pages are all
+user-controlled, so every request made on their behalf first checks that
+the host resolves only to public addresses - otherwise a submitted URL could
+make the backend probe its own network (loopback, private and link-local
+ranges, cloud metadata endpoints). Redirects are followed hop by hop so each
+hop is checked too.
+
+The audited page itself is fetched once per audit (`fetch_page`) and shared
+by the content hash of incremental re-audits and the pre-audit.
+"""
+import asyncio
+import ipaddress
+import logging
+import socket
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from backend.cache import TTLCache
+from backend.config import settings
+from backend.http_client import get_site_client, site_timeout
+
+logger = logging.getLogger(__name__)
+
+MAX_REDIRECTS = 5
+
+# host -> whether it resolves only to public addresses
+_host_verdicts = TTLCache("site_hosts", max_entries=10000, ttl=300.0)
+
+
+class BlockedHostError(Exception):
+    """The URL's host is not a public internet address"""
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def check_public_url(url: str) -> None:
+    """Raise BlockedHostError unless the URL is http(s) on a publicly routable host"""
+    if settings.site_allow_private_hosts:
+        return
+    parts = urlsplit(url)
+    host = parts.hostname
+    if parts.scheme not in ("http", "https") or not host:
+        raise BlockedHostError(f"Not an http(s) URL: {url}")
+
+    verdict = _host_verdicts.get(host)
+    if verdict is None:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError) as e:
+            raise httpx.ConnectError(f"Cannot resolve {host}: {e}") from e
+        # Every address must be public, or DNS could point one of them inward
+        verdict = bool(infos) and all(_is_public(info[4][0]) for info in infos)
+        _host_verdicts.set(host, verdict)
+    if not verdict:
+        raise BlockedHostError(f"{host} does not resolve to a public address")
+
+
+async def site_request(method: str, url: str, timeout: float, stream: bool = False) -> httpx.Response:
+    """
+    Request through the customer-site client, checking every redirect hop.
+    With `stream` the body is not read; the caller closes the response.
+    """
+    client = get_site_client()
+    for _ in range(MAX_REDIRECTS + 1):
+        await check_public_url(url)
+        request = client.build_request(method, url, timeout=site_timeout(timeout))
+        response = await client.send(request, stream=stream, follow_redirects=False)
+        if not response.is_redirect or response.next_request is None:
+            return response
+        await response.aclose()
+        method, url = response.next_request.method, str(response.next_request.url)
+    raise httpx.TooManyRedirects(f"More than {MAX_REDIRECTS} redirects", request=request)
+
+
+class FetchedPage:
+    """A customer page, fetched once per audit"""
+
+    def __init__(self, url: str, status_code: int, content_type: str, text: str):
+        # After redirects
+        self.url = url
+        self.status_code = status_code
+        self.content_type = content_type
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def is_html(self) -> bool:
+        return self.ok and "html" in self.content_type
+
+
+async def fetch_page(url: str) -> Optional[FetchedPage]:
+    """
+    The page, read up to SITE_MAX_PAGE_BYTES; None when it is blocked or
+    cannot be fetched.
+    """
+    try:
+        response = await site_request("GET", url, settings.site_page_timeout, stream=True)
+        try:
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) >= settings.site_max_page_bytes:
+                    logger.info(f"{url} is larger than {settings.site_max_page_bytes} bytes; using the start of it")
+                    break
+        finally:
+            await response.aclose()
+    except (httpx.HTTPError, BlockedHostError) as e:
+        logger.info(f"Could not fetch {url}: {e!r}")
+        return None
+
+    encoding = response.encoding or "utf-8"
+    return FetchedPage(
+        str(response.url),
+        response.status_code,
+        response.headers.get("content-type", ""),
+        bytes(body[:settings.site_max_page_bytes]).decode(encoding, errors="replace"),
+    )
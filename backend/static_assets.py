@@ -0,0 +1,168 @@
+"""
+Fingerprinted, precompressed frontend assets.
+
+At startup every file under frontend/static is read into memory, its
+references to other assets (`/static/...` URLs and relative `./` or `../`
+imports) are rewritten to content-hashed names such as
+`js/api.3f9c2a1b0d4e.js`, and gzip and brotli variants are compressed once.
+Hashed URLs are served as immutable; the HTML pages and plain asset URLs are
+revalidated by ETag, so after a deploy browsers only download the assets
+that changed. Nothing is written to disk (the Vercel filesystem is
+read-only).
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+import posixpath
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import HTTPException, Request, Response
+
+from backend.config import settings
+from backend.responses import brotli, choose_encoding, etag_matches
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = "/static/"
+
+# Hex digits of the content hash in fingerprinted names
+HASH_LENGTH = 12
+
+# Files whose references to other assets are rewritten
+REWRITTEN_SUFFIXES = (".html", ".js", ".mjs", ".css")
+
+# Quoted or url(...) references to an asset, absolute or relative
+REFERENCE = re.compile(r"""(?<=["'(])(/static/|\.\.?/)([^"'()\s?#]+)""")
+
+
+def _compressible(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type.endswith(("json", "javascript", "xml"))
+
+
+class Asset:
+    """A file's final bytes, their precompressed variants and validators"""
+
+    def __init__(self, path: str, body: bytes):
+        self.path = path
+        self.body = body
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        stem, suffix = posixpath.splitext(path)
+        self.hashed_path = f"{stem}.{digest[:HASH_LENGTH]}{suffix}"
+        # encoding -> body, only kept when smaller than the original
+        self.encoded: Dict[str, bytes] = {}
+        if _compressible(self.media_type) and len(body) >= settings.response_compress_min_bytes:
+            variants = {"gzip": gzip.compress(body, compresslevel=settings.static_gzip_level, mtime=0)}
+            if brotli is not None:
+                variants["br"] = brotli.compress(body, quality=settings.static_brotli_quality)
+            self.encoded = {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+class StaticAssets:
+    """In-memory asset bundle built from the frontend directory"""
+
+    def __init__(self, frontend_dir: Path, pages: Iterable[str] = ("index.html", "loading.html")):
+        self.frontend_dir = frontend_dir
+        self.static_dir = frontend_dir / "static"
+        self.page_names = tuple(pages)
+        # logical path ("js/api.js") -> fingerprinted path ("js/api.<hash>.js")
+        self.manifest: Dict[str, str] = {}
+        # logical and fingerprinted paths -> asset
+        self._assets: Dict[str, Asset] = {}
+        self._pages: Dict[str, Asset] = {}
+
+    def build(self) -> None:
+        """Read, rewrite, hash and compress the assets, then the pages"""
+        started = time.perf_counter()
+        sources = {
+            path.relative_to(self.static_dir).as_posix(): path.read_bytes()
+            for path in sorted(self.static_dir.rglob("*")) if path.is_file()
+        }
+        references = {
+            path: self._references(path, body) & (set(sources) - {path})
+            for path, body in sources.items()
+        }
+
+        # An asset is hashed after the assets it references, so its hash covers
+        # their final URLs. References within an import cycle stay unhashed
+        # (those URLs are still served, revalidated by ETag).
+        pending = set(sources)
+        while pending:
+            ready = sorted(path for path in pending if not references[path] & pending) or sorted(pending)
+            for path in ready:
+                asset = Asset(path, self._rewrite(path, sources[path]))
+                self.manifest[path] = asset.hashed_path
+                self._assets[path] = self._assets[asset.hashed_path] = asset
+            pending -= set(ready)
+
+        for name in self.page_names:
+            self._pages[name] = Asset(name, self._rewrite(None, (self.frontend_dir / name).read_bytes()))
+
+        assets = [self._assets[path] for path in sources] + list(self._pages.values())
+        sizes = {
+            encoding: sum(len(asset.encoded.get(encoding, asset.body)) for asset in assets)
+            for encoding in ("identity", "gzip") + (("br",) if brotli is not None else ())
+        }
+        logger.info(
+            f"Built {len(assets)} static assets in {time.perf_counter() - started:.2f}s "
+            f"({', '.join(f'{encoding} {size} bytes' for encoding, size in sizes.items())})"
+        )
+
+    def asset_response(self, path: str, request: Request) -> Response:
+        """An asset by fingerprinted (immutable) or logical (revalidated) path; 404 if unknown"""
+        asset = self._assets.get(path)
+        if asset is None:
+            raise HTTPException(status_code=404, detail="Not Found")
+        return self._response(asset, request, immutable=path == asset.hashed_path)
+
+    def page_response(self, name: str, request: Request) -> Response:
+        return self._response(self._pages[name], request, immutable=False)
+
+    def _response(self, asset: Asset, request: Request, immutable: bool) -> Response:
+        headers = {
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": f"public, max-age={settings.static_max_age}, immutable" if immutable else "no-cache",
+        }
+        if etag_matches(request, asset.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.body
+        encoding = choose_encoding(request)
+        if encoding in asset.encoded:
+            body = asset.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=asset.media_type, headers=headers)
+
+    def _resolve(self, base: Optional[str], prefix: str, reference: str) -> Optional[str]:
+        """Logical path a reference points to; `base` is the referencing asset (None for pages)"""
+        if prefix == URL_PREFIX:
+            return posixpath.normpath(reference)
+        if base is None:
+            return None
+        path = posixpath.normpath(posixpath.join(posixpath.dirname(base), prefix + reference))
+        return None if path.startswith("..") else path
+
+    def _references(self, path: str, body: bytes) -> Set[str]:
+        if not path.endswith(REWRITTEN_SUFFIXES):
+            return set()
+        text = body.decode("utf-8", errors="replace")
+        return {self._resolve(path, *match.groups()) for match in REFERENCE.finditer(text)} - {None}
+
+    def _rewrite(self, base: Optional[str], body: bytes) -> bytes:
+        """Point references at the fingerprinted URLs of assets already built"""
+        if base is not None and not base.endswith(REWRITTEN_SUFFIXES):
+            return body
+
+        def replace(match: re.Match) -> str:
+            target = self._resolve(base, *match.groups())
+            if target not in self.manifest:
+                return match.group(0)
+            return URL_PREFIX + self.manifest[target]
+
+        return REFERENCE.sub(replace, body.decode("utf-8")).encode("utf-8")
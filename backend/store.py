@@ -0,0 +1,481 @@
+"""
+Persistent audit result store.
+
+Results are keyed by audit ID and by normalized URL + prompt version, so a
+recent audit of the same page can be served without another agent run.
+The backend is pluggable; SQLite is the default.
+
+For history listings, each audit's domain and severity summary are stored
+alongside the result, and the issue types it contains go into an index
+table, so listings never load or scan result bodies.
+"""
+import asyncio
+import base64
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from backend.config import settings
+from backend.models import AuditHistoryItem, AuditHistoryPage, AuditResult, AuditSummary
+from backend.prompts import AUDIT_PROMPT_VERSION
+from backend.urls import domain_of, normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+# Denormalized AuditSummary fields, one column each
+SUMMARY_COLUMNS = tuple(AuditSummary.model_fields)
+
+HISTORY_MAX_LIMIT = 200
+
+
+def cache_key(url: str, prompt_version: str = AUDIT_PROMPT_VERSION) -> str:
+    return f"{normalize_url(url)}|{prompt_version}"
+
+
+def issue_types(result: AuditResult) -> Set[Tuple[str, str]]:
+    """Distinct ("error", error_type) / ("gap", gap_type) pairs in a result"""
+    types = {("error", issue.error_type) for issue in result.technical_failures}
+    types.update(("error", issue.error_type) for issue in result.contextual_errors)
+    types.update(("gap", issue.gap_type) for issue in result.competitive_gaps)
+    return types
+
+
+def encode_cursor(created_at: float, audit_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{created_at!r}|{audit_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Raises ValueError for cursors not produced by encode_cursor"""
+    try:
+        created_at, audit_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return float(created_at), audit_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class StoredAudit(BaseModel):
+    """An audit result as persisted in the store"""
+    audit_id: str
+    url: str
+    created_at: datetime
+    result: AuditResult
+    content_hash: Optional[str] = Field(default=None, description="Page content hash taken before an incremental run")
+
+
+class AuditStore(ABC):
+    """Interface for audit result storage backends"""
+
+    def __init__(self, max_entries: int, max_age: float):
+        self.max_entries = max_entries
+        self.max_age = max_age
+
+    @abstractmethod
+    async def save(self, audit_id: str, url: str, result: AuditResult, content_hash: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, audit_id: str) -> Optional[StoredAudit]:
+        ...
+
+    @abstractmethod
+    async def find_fresh(self, url: str, ttl: float) -> Optional[StoredAudit]:
+        """Most recent audit for the URL (current prompt version) younger than `ttl` seconds"""
+        ...
+
+    @abstractmethod
+    async def latest(self, url: str, before: Optional[StoredAudit] = None) -> Optional[StoredAudit]:
+        """Most recent audit for the URL (current prompt version), optionally the one preceding `before`"""
+        ...
+
+    @abstractmethod
+    async def history(
+        self,
+        domain: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        min_risk_score: Optional[int] = None,
+        error_type: Optional[str] = None,
+        gap_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> AuditHistoryPage:
+        """Audit summaries matching the filters, newest first, without result bodies"""
+        ...
+
+    @abstractmethod
+    async def evict(self) -> int:
+        """Drop entries beyond the size/age limits, returning how many were removed"""
+        ...
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryAuditStore(AuditStore):
+    """Process-local store, mainly for development and tests"""
+
+    def __init__(self, max_entries: int = settings.audit_store_max_entries, max_age: float = settings.audit_store_max_age):
+        super().__init__(max_entries, max_age)
+        self._audits: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def save(self, audit_id: str, url: str, result: AuditResult, content_hash: Optional[str] = None) -> None:
+        self._audits[audit_id] = (cache_key(url), time.time(), url, result, content_hash)
+        await self.evict()
+
+    async def get(self, audit_id: str) -> Optional[StoredAudit]:
+        entry = self._audits.get(audit_id)
+        if entry is None:
+            return None
+        _, created, url, result, content_hash = entry
+        return StoredAudit(
+            audit_id=audit_id, url=url, created_at=datetime.fromtimestamp(created),
+            result=result, content_hash=content_hash
+        )
+
+    async def find_fresh(self, url: str, ttl: float) -> Optional[StoredAudit]:
+        key = cache_key(url)
+        cutoff = time.time() - ttl
+        for audit_id in reversed(self._audits):
+            entry_key, created, _, _, _ = self._audits[audit_id]
+            if created < cutoff:
+                break
+            if entry_key == key:
+                return await self.get(audit_id)
+        return None
+
+    async def latest(self, url: str, before: Optional[StoredAudit] = None) -> Optional[StoredAudit]:
+        key = cache_key(url)
+        reached = before is None
+        for audit_id in reversed(self._audits):
+            if not reached:
+                reached = audit_id == before.audit_id
+                continue
+            if self._audits[audit_id][0] == key:
+                return await self.get(audit_id)
+        return None
+
+    async def history(
+        self,
+        domain: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        min_risk_score: Optional[int] = None,
+        error_type: Optional[str] = None,
+        gap_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> AuditHistoryPage:
+        limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+        after = decode_cursor(cursor) if cursor else None
+        matches = []
+        for audit_id, (_, created, url, result, _) in self._audits.items():
+            if after is not None and (created, audit_id) >= after:
+                continue
+            if domain and domain_of(url) != domain_of(domain):
+                continue
+            if since and created < since.timestamp():
+                continue
+            if until and created >= until.timestamp():
+                continue
+            if min_risk_score is not None and result.risk_score < min_risk_score:
+                continue
+            types = issue_types(result)
+            if error_type and ("error", error_type) not in types:
+                continue
+            if gap_type and ("gap", gap_type) not in types:
+                continue
+            matches.append((created, audit_id, url, result))
+
+        matches.sort(reverse=True)
+        page = matches[:limit]
+        return AuditHistoryPage(
+            items=[
+                AuditHistoryItem(
+                    audit_id=audit_id, url=url, domain=domain_of(url),
+                    created_at=datetime.fromtimestamp(created), summary=result.summary
+                )
+                for created, audit_id, url, result in page
+            ],
+            next_cursor=encode_cursor(page[-1][0], page[-1][1]) if len(matches) > limit else None
+        )
+
+    async def evict(self) -> int:
+        removed = 0
+        cutoff = time.time() - self.max_age if self.max_age > 0 else None
+        while self._audits:
+            audit_id, (_, created, _, _, _) = next(iter(self._audits.items()))
+            if len(self._audits) > self.max_entries or (cutoff and created < cutoff):
+                del self._audits[audit_id]
+                removed += 1
+            else:
+                break
+        return removed
+
+
+class SQLiteAuditStore(AuditStore):
+    """SQLite-backed store; queries run in a worker thread"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS audits (
+        audit_id TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        cache_key TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        result_json TEXT NOT NULL,
+        content_hash TEXT
+    );
+    CREATE TABLE IF NOT EXISTS audit_issue_types (
+        audit_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        issue_type TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        PRIMARY KEY (kind, issue_type, created_at, audit_id)
+    ) WITHOUT ROWID;
+    """
+
+    # Created after _migrate, which adds the history columns to older databases
+    INDEXES = """
+    CREATE INDEX IF NOT EXISTS idx_audits_cache_key ON audits (cache_key, created_at);
+    CREATE INDEX IF NOT EXISTS idx_audits_created_at ON audits (created_at, audit_id);
+    CREATE INDEX IF NOT EXISTS idx_audits_domain ON audits (domain, created_at, audit_id);
+    CREATE INDEX IF NOT EXISTS idx_audits_risk_score ON audits (risk_score, created_at);
+    CREATE INDEX IF NOT EXISTS idx_audit_issue_types_audit_id ON audit_issue_types (audit_id);
+    """
+
+    HISTORY_COLUMNS = ("domain",) + SUMMARY_COLUMNS
+
+    AUDIT_COLUMNS = "audit_id, url, created_at, result_json, content_hash"
+
+    def __init__(
+        self,
+        path: str = settings.audit_store_path,
+        max_entries: int = settings.audit_store_max_entries,
+        max_age: float = settings.audit_store_max_age
+    ):
+        super().__init__(max_entries, max_age)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(self.SCHEMA)
+            self._migrate(self._conn)
+            self._conn.executescript(self.INDEXES)
+            logger.info(f"Opened audit store at {self.path}")
+        return self._conn
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Add columns missing from a pre-existing audits table and backfill history columns"""
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(audits)")}
+        if "content_hash" not in existing:
+            with conn:
+                conn.execute("ALTER TABLE audits ADD COLUMN content_hash TEXT")
+
+        missing = [column for column in self.HISTORY_COLUMNS if column not in existing]
+        if not missing:
+            return
+
+        with conn:
+            for column in missing:
+                kind = "TEXT NOT NULL DEFAULT ''" if column == "domain" else "INTEGER NOT NULL DEFAULT 0"
+                conn.execute(f"ALTER TABLE audits ADD COLUMN {column} {kind}")
+            rows = conn.execute("SELECT audit_id, url, created_at, result_json FROM audits").fetchall()
+            for audit_id, url, created_at, result_json in rows:
+                result = AuditResult.model_validate_json(result_json)
+                self._write_index(conn, audit_id, url, created_at, result)
+        logger.info(f"Backfilled history columns for {len(rows)} stored audits")
+
+    @classmethod
+    def _write_index(cls, conn: sqlite3.Connection, audit_id: str, url: str, created_at: float, result: AuditResult) -> None:
+        summary = result.summary.model_dump()
+        conn.execute(
+            f"UPDATE audits SET {', '.join(f'{column} = ?' for column in cls.HISTORY_COLUMNS)} WHERE audit_id = ?",
+            (domain_of(url), *(summary[column] for column in SUMMARY_COLUMNS), audit_id)
+        )
+        conn.execute("DELETE FROM audit_issue_types WHERE audit_id = ?", (audit_id,))
+        conn.executemany(
+            "INSERT OR IGNORE INTO audit_issue_types (audit_id, kind, issue_type, created_at) VALUES (?, ?, ?, ?)",
+            [(audit_id, kind, issue_type, created_at) for kind, issue_type in issue_types(result)]
+        )
+
+    def _run(self, fn, *args):
+        with self._lock:
+            return fn(self._connect(), *args)
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(self._run, fn, *args)
+
+    @staticmethod
+    def _row_to_audit(row) -> Optional[StoredAudit]:
+        if row is None:
+            return None
+        audit_id, url, created_at, result_json, content_hash = row
+        return StoredAudit(
+            audit_id=audit_id,
+            url=url,
+            created_at=datetime.fromtimestamp(created_at),
+            result=AuditResult.model_validate_json(result_json),
+            content_hash=content_hash
+        )
+
+    async def save(self, audit_id: str, url: str, result: AuditResult, content_hash: Optional[str] = None) -> None:
+        def _save(conn, created_at, result_json):
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO audits (audit_id, url, cache_key, created_at, result_json, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (audit_id, url, cache_key(url), created_at, result_json, content_hash)
+                )
+                self._write_index(conn, audit_id, url, created_at, result)
+
+        await self._call(_save, time.time(), result.model_dump_json())
+        await self.evict()
+
+    async def get(self, audit_id: str) -> Optional[StoredAudit]:
+        def _get(conn):
+            return conn.execute(
+                f"SELECT {self.AUDIT_COLUMNS} FROM audits WHERE audit_id = ?",
+                (audit_id,)
+            ).fetchone()
+
+        return self._row_to_audit(await self._call(_get))
+
+    async def find_fresh(self, url: str, ttl: float) -> Optional[StoredAudit]:
+        def _find(conn):
+            return conn.execute(
+                f"SELECT {self.AUDIT_COLUMNS} FROM audits "
+                "WHERE cache_key = ? AND created_at >= ? ORDER BY created_at DESC LIMIT 1",
+                (cache_key(url), time.time() - ttl)
+            ).fetchone()
+
+        return self._row_to_audit(await self._call(_find))
+
+    async def latest(self, url: str, before: Optional[StoredAudit] = None) -> Optional[StoredAudit]:
+        def _latest(conn):
+            if before is None:
+                return conn.execute(
+                    f"SELECT {self.AUDIT_COLUMNS} FROM audits WHERE cache_key = ? ORDER BY created_at DESC LIMIT 1",
+                    (cache_key(url),)
+                ).fetchone()
+            # Compare against the stored timestamp, not the rounded datetime
+            return conn.execute(
+                f"SELECT {self.AUDIT_COLUMNS} FROM audits WHERE cache_key = ? AND created_at < "
+                "(SELECT created_at FROM audits WHERE audit_id = ?) ORDER BY created_at DESC LIMIT 1",
+                (cache_key(url), before.audit_id)
+            ).fetchone()
+
+        return self._row_to_audit(await self._call(_latest))
+
+    async def history(
+        self,
+        domain: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        min_risk_score: Optional[int] = None,
+        error_type: Optional[str] = None,
+        gap_type: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> AuditHistoryPage:
+        limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+        joins: List[str] = []
+        where: List[str] = []
+        params: List[Any] = []
+
+        for kind, issue_type in (("error", error_type), ("gap", gap_type)):
+            if issue_type:
+                alias = f"t_{kind}"
+                joins.append(
+                    f"JOIN audit_issue_types {alias} ON {alias}.audit_id = a.audit_id "
+                    f"AND {alias}.kind = ? AND {alias}.issue_type = ?"
+                )
+                params.extend((kind, issue_type))
+        if domain:
+            where.append("a.domain = ?")
+            params.append(domain_of(domain))
+        if since:
+            where.append("a.created_at >= ?")
+            params.append(since.timestamp())
+        if until:
+            where.append("a.created_at < ?")
+            params.append(until.timestamp())
+        if min_risk_score is not None:
+            where.append("a.risk_score >= ?")
+            params.append(min_risk_score)
+        if cursor:
+            created_at, audit_id = decode_cursor(cursor)
+            where.append("(a.created_at < ? OR (a.created_at = ? AND a.audit_id < ?))")
+            params.extend((created_at, created_at, audit_id))
+
+        sql = (
+            f"SELECT a.audit_id, a.url, a.created_at, {', '.join(f'a.{c}' for c in self.HISTORY_COLUMNS)} "
+            f"FROM audits a {' '.join(joins)} "
+            f"{'WHERE ' + ' AND '.join(where) if where else ''} "
+            f"ORDER BY a.created_at DESC, a.audit_id DESC LIMIT ?"
+        )
+        params.append(limit + 1)
+
+        def _history(conn):
+            return conn.execute(sql, params).fetchall()
+
+        rows = await self._call(_history)
+        items = [
+            AuditHistoryItem(
+                audit_id=audit_id, url=url, domain=row_domain,
+                created_at=datetime.fromtimestamp(created_at),
+                summary=AuditSummary(**dict(zip(SUMMARY_COLUMNS, counts)))
+            )
+            for audit_id, url, created_at, row_domain, *counts in rows[:limit]
+        ]
+        next_cursor = encode_cursor(rows[limit - 1][2], rows[limit - 1][0]) if len(rows) > limit else None
+        return AuditHistoryPage(items=items, next_cursor=next_cursor)
+
+    async def evict(self) -> int:
+        def _evict(conn):
+            with conn:
+                removed = 0
+                if self.max_age > 0:
+                    removed += conn.execute(
+                        "DELETE FROM audits WHERE created_at < ?", (time.time() - self.max_age,)
+                    ).rowcount
+                removed += conn.execute(
+                    "DELETE FROM audits WHERE audit_id NOT IN "
+                    "(SELECT audit_id FROM audits ORDER BY created_at DESC LIMIT ?)",
+                    (self.max_entries,)
+                ).rowcount
+                if removed:
+                    conn.execute(
+                        "DELETE FROM audit_issue_types WHERE audit_id NOT IN (SELECT audit_id FROM audits)"
+                    )
+                return removed
+
+        removed = await self._call(_evict)
+        if removed:
+            logger.info(f"Evicted {removed} stored audits")
+        return removed
+
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_store(backend: str = settings.audit_store_backend) -> AuditStore:
+    """Build the configured store backend ("sqlite" or "memory")"""
+    if backend == "sqlite":
+        return SQLiteAuditStore()
+    if backend == "memory":
+        return MemoryAuditStore()
+    raise ValueError(f"Unknown audit store backend: {backend}")
@@ -0,0 +1,163 @@
+"""
+Incremental parser for TinyFish audit output.
+
+TinyFish may stream the audit JSON in pieces (`output`/`message` events),
+wrapped in prose or split across several JSON blobs. The parser scans each
+chunk once as it arrives, emits every issue object inside a
+technical_failures / contextual_errors / competitive_gaps array as soon as
+it closes, and keeps complete top-level JSON documents for the final result.
+"""
+import io
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ISSUE_CATEGORIES = ("technical_failures", "contextual_errors", "competitive_gaps")
+
+
+class _Frame:
+    """An open JSON object or array"""
+    __slots__ = ("is_object", "key", "start", "expect_key", "last_key")
+
+    def __init__(self, is_object: bool, key: Optional[str], start: int):
+        self.is_object = is_object
+        self.key = key  # key this container is the value of, if any
+        self.start = start
+        self.expect_key = is_object
+        self.last_key: Optional[str] = None
+
+
+class IncrementalAuditParser:
+    """Streaming extractor for audit JSON embedded in free text"""
+
+    def __init__(self):
+        self._buf = io.StringIO()
+        self._offset = 0  # absolute position of the first char in _buf
+        self._pos = 0  # absolute position after the last fed char
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self.documents: List[Dict[str, Any]] = []
+        self.issues: Dict[str, List[Dict[str, Any]]] = {category: [] for category in ISSUE_CATEGORIES}
+        self.malformed = 0
+        self.chars = 0
+
+    def _slice(self, start: int, end: int) -> str:
+        self._buf.seek(start - self._offset)
+        text = self._buf.read(end - start)
+        self._buf.seek(0, io.SEEK_END)
+        return text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Consume a chunk and return the (category, issue) pairs completed by it.
+        """
+        if not chunk:
+            return []
+
+        base = self._pos
+        self._buf.write(chunk)
+        self._pos += len(chunk)
+        self.chars += len(chunk)
+        completed: List[Tuple[str, Dict[str, Any]]] = []
+        stack = self._stack
+
+        for i, ch in enumerate(chunk):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    top = stack[-1]
+                    if top.is_object and top.expect_key:
+                        top.last_key = self._slice(self._string_start + 1, base + i)
+                continue
+
+            if not stack:
+                # Prose between documents is skipped
+                if ch == "{":
+                    stack.append(_Frame(True, None, base + i))
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = base + i
+            elif ch == ":":
+                stack[-1].expect_key = False
+            elif ch == ",":
+                if stack[-1].is_object:
+                    stack[-1].expect_key = True
+            elif ch == "{" or ch == "[":
+                parent = stack[-1]
+                key = parent.last_key if parent.is_object else None
+                stack.append(_Frame(ch == "{", key, base + i))
+            elif ch == "}" or ch == "]":
+                frame = stack.pop()
+                if not frame.is_object:
+                    continue
+                if stack:
+                    parent = stack[-1]
+                    if not parent.is_object and parent.key in self.issues:
+                        issue = self._load(frame.start, base + i + 1)
+                        if isinstance(issue, dict):
+                            self.issues[parent.key].append(issue)
+                            completed.append((parent.key, issue))
+                else:
+                    document = self._load(frame.start, base + i + 1)
+                    if isinstance(document, dict):
+                        self.documents.append(document)
+                    # Nothing open any more - drop the consumed text
+                    self._buf = io.StringIO()
+                    self._buf.write(chunk[i + 1:])
+                    self._offset = base + i + 1
+
+        if not stack:
+            self._buf = io.StringIO()
+            self._offset = self._pos
+
+        return completed
+
+    def _load(self, start: int, end: int) -> Any:
+        try:
+            return json.loads(self._slice(start, end))
+        except json.JSONDecodeError:
+            self.malformed += 1
+            return None
+
+    def audit_data(self) -> Optional[Dict[str, Any]]:
+        """
+        Best audit payload seen so far.
+
+        Documents holding issue categories are merged (identical issues
+        repeated across blobs are kept once); without any, the individually
+        parsed issues are used (e.g. when the enclosing document was
+        malformed or truncated), else the last document of any shape.
+        """
+        audit_documents = [d for d in self.documents if any(c in d for c in ISSUE_CATEGORIES)]
+        if len(audit_documents) == 1:
+            return audit_documents[0]
+        if audit_documents:
+            merged: Dict[str, Any] = {}
+            for document in audit_documents:
+                merged.update({k: v for k, v in document.items() if k not in ISSUE_CATEGORIES})
+            for category in ISSUE_CATEGORIES:
+                seen = set()
+                merged[category] = []
+                for document in audit_documents:
+                    for issue in document.get(category) or []:
+                        fingerprint = json.dumps(issue, sort_keys=True)
+                        if fingerprint not in seen:
+                            seen.add(fingerprint)
+                            merged[category].append(issue)
+            return merged
+
+        if any(self.issues.values()):
+            logger.warning(f"Recovered {sum(len(v) for v in self.issues.values())} issues from incomplete audit JSON")
+            return {category: list(issues) for category, issues in self.issues.items()}
+
+        return self.documents[-1] if self.documents else None
@@ -1,68 +1,124 @@
+import asyncio
 import json
 import logging
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional, Set
 import httpx
 from fastapi import HTTPException
-from backend.models import AuditResult
-from backend.prompts import AUDIT_PROMPT
+from backend.models import AgentRunStats, AuditResult
+from backend.prompts import AUDIT_PROMPT, FOCUSED_AUDIT_PROMPT
+from backend.precheck import PrecheckResult, merge_precheck
+from backend.budget import StepBudget, budget_policy
 from backend.config import settings
+from backend.http_client import get_client, call_timeout
+from backend.tracing import AuditTrace, tracer
+from backend.stream_parser import IncrementalAuditParser, ISSUE_CATEGORIES
+from backend.metrics import (
+    audit_complete_seconds,
+    audit_connect_seconds,
+    audit_first_event_seconds,
+    audit_parse_seconds,
+    audit_sse_events,
+    audit_steps,
+    audit_validation_seconds,
+    early_stops_total,
+    parse_failures_total,
+    tinyfish_requests_total,
+    tinyfish_run_rejections_total,
+    tinyfish_runs_in_flight,
+)
+from backend.resilience import (
+    CircuitOpenError,
+    RunDeadlineError,
+    StreamDroppedError,
+    UpstreamError,
+    audit_retry_policy,
+    call_with_resilience,
+    parse_retry_after,
+)
 
 logger = logging.getLogger(__name__)
 
+# Receives progress events ("step", "issue", "rejected") while a run streams
+EventCallback = Callable[[Dict[str, Any]], None]
 
-def parse_tinyfish_response(result: str, url: str) -> Dict[str, Any]:
-    """
-    Parse TinyFish research tool response into structured audit data.
+# Upstream fields that describe what the agent is doing, in order of preference
+STEP_DETAIL_FIELDS = ("purpose", "message", "action", "status")
 
-    The TinyFish research tool returns a string that may contain JSON.
-    We need to extract and parse the JSON response.
-    """
+# Fields that mark an event as an agent step (result text fragments have neither)
+STEP_FIELDS = ("step", "purpose")
+
+
+def _emit(on_event: Optional[EventCallback], event: Dict[str, Any]) -> None:
+    """Forward a progress event without letting a listener break the run"""
+    if on_event is None:
+        return
     try:
-        # Try to find JSON in the response
-        # Look for the first { and last } to extract JSON
-        start_idx = result.find('{')
-        end_idx = result.rfind('}')
-
-        if start_idx == -1 or end_idx == -1:
-            logger.warning("No JSON found in TinyFish response, returning empty audit")
-            return {
-                "url": url,
-                "audit_date": datetime.now(),
-                "technical_failures": [],
-                "contextual_errors": [],
-                "competitive_gaps": []
-            }
+        on_event(event)
+    except Exception as e:
+        logger.warning(f"Progress listener failed: {e}")
 
-        json_str = result[start_idx:end_idx + 1]
-        audit_data = json.loads(json_str)
 
-        # Add URL and audit date
-        audit_data["url"] = url
-        audit_data["audit_date"] = datetime.now()
+def _step_detail(event: Dict[str, Any]) -> str:
+    for field in STEP_DETAIL_FIELDS:
+        value = event.get(field)
+        if isinstance(value, str) and value.strip():
+            return value[:200]
+    return ""
 
-        return audit_data
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Failed to parse TinyFish JSON response: {e}")
-        # Return empty audit on parse failure
-        return {
-            "url": url,
-            "audit_date": datetime.now(),
-            "technical_failures": [],
-            "contextual_errors": [],
-            "competitive_gaps": []
-        }
-    except Exception as e:
-        logger.error(f"Unexpected error parsing TinyFish response: {e}")
-        return {
-            "url": url,
-            "audit_date": datetime.now(),
+def _emit_issue(on_event: Optional[EventCallback], emitted: Set[str], category: str, issue: Any) -> None:
+    """Send an issue event unless the same issue was already sent for this run"""
+    key = category + json.dumps(issue, sort_keys=True, default=str)
+    if key not in emitted:
+        emitted.add(key)
+        _emit(on_event, {"type": "issue", "category": category, "issue": issue})
+
+
+def _emit_issues(on_event: Optional[EventCallback], emitted: Set[str], audit_data: Dict[str, Any]) -> None:
+    for category in ISSUE_CATEGORIES:
+        for issue in audit_data.get(category) or []:
+            _emit_issue(on_event, emitted, category, issue)
+
+
+def build_audit_data(parsed: Optional[Dict[str, Any]], url: str) -> Dict[str, Any]:
+    """Add URL and audit date to parsed audit JSON, or return an empty audit"""
+    if parsed is None:
+        logger.warning("No JSON found in TinyFish response, returning empty audit")
+        parsed = {
             "technical_failures": [],
             "contextual_errors": [],
             "competitive_gaps": []
         }
 
+    audit_data = dict(parsed)
+    audit_data["url"] = url
+    audit_data["audit_date"] = datetime.now()
+    return audit_data
+
+
+def parse_tinyfish_response(result: str, url: str) -> Dict[str, Any]:
+    """
+    Parse TinyFish research tool response into structured audit data.
+
+    The TinyFish research tool returns a string that may contain JSON,
+    possibly surrounded by prose or split across several JSON blobs.
+    """
+    parser = IncrementalAuditParser()
+    parser.feed(result)
+    parsed = parser.audit_data()
+    _record_parse_failures(parser, parsed)
+    return build_audit_data(parsed, url)
+
+
+def _record_parse_failures(parser: IncrementalAuditParser, parsed: Optional[Dict[str, Any]]) -> None:
+    if parser.malformed:
+        logger.error(f"Skipped {parser.malformed} malformed JSON fragments in TinyFish response")
+        parse_failures_total.inc(reason="malformed")
+    if parsed is None:
+        parse_failures_total.inc(reason="no_json")
+
 
 async def run_audit_mock(url: str) -> AuditResult:
     """
@@ -133,93 +189,295 @@ async def run_audit_mock(url: str) -> AuditResult:
     return AuditResult(**audit_data)
 
 
-async def run_audit(url: str) -> AuditResult:
+async def run_audit(
+    url: str,
+    on_event: Optional[EventCallback] = None,
+    audit_id: Optional[str] = None,
+    precheck: Optional[PrecheckResult] = None
+) -> AuditResult:
     """
     Use TinyFish/Mino API to audit a URL.
     Requires CEREBRAS_API_KEY environment variable (used as MINO_API_KEY).
     Raises exception if API call fails - no fallback to mock data.
+
+    If `on_event` is given it is called with each agent step and each issue
+    as soon as it is available, before the final AuditResult is built.
+
+    Transient failures are retried with backoff (see backend.resilience);
+    while the TinyFish circuit is open this fails fast with a 503.
+
+    Sampled runs are traced under `audit_id` (see backend.tracing).
+
+    With a `precheck` (see backend.precheck) its findings are reported
+    first and merged into the result, and when most of its checks were
+    conclusive the agent gets the focused goal and the smaller step ceiling.
+
+    `max_steps` and the run's deadline come from backend.budget, and the
+    run is ended client-side once `settings.audit_stop_after_issues` issues
+    have streamed in; `result.run` reports steps used versus budget.
     """
     # Check for API key
     if not settings.cerebras_api_key:
         raise ValueError("CEREBRAS_API_KEY not configured. Please set your Mino API key.")
 
-    # Build the audit task - TinyFish will automatically visit the URL we pass
-    # No need to repeat "Visit {url}" since the url parameter handles navigation
-    audit_task = AUDIT_PROMPT
+    trace = tracer.start(url, audit_id)
+
+    goal, max_steps = AUDIT_PROMPT, settings.tinyfish_audit_max_steps
+    if precheck is not None:
+        # Mostly inconclusive checks (timeouts, blocked hosts) would leave links
+        # and images unchecked; the agent then checks them itself
+        if precheck.focused:
+            goal, max_steps = FOCUSED_AUDIT_PROMPT, settings.tinyfish_focused_audit_max_steps
+        trace.record(
+            "precheck", findings=len(precheck.findings), elapsed=round(precheck.elapsed, 2), focused=precheck.focused
+        )
+        for issue in precheck.findings:
+            _emit(on_event, {"type": "issue", "category": "technical_failures", "issue": issue})
+    budget = budget_policy.budget_for(url, max_steps, precheck.summary() if precheck is not None else None)
+    trace.record("budget", max_steps=budget.max_steps, deadline=round(budget.deadline, 1), basis=budget.basis)
+
+    def on_retry(attempt: int, exc: BaseException, delay: float) -> None:
+        trace.record("retry", attempt=attempt, reason=repr(exc), delay=round(delay, 2))
+        _emit(on_event, {"type": "retry", "attempt": attempt, "reason": str(exc) or repr(exc), "delay": round(delay, 1)})
+
+    try:
+        with tinyfish_runs_in_flight.track(operation="audit"):
+            result = await call_with_resilience(
+                lambda: _run_audit_once(url, on_event, trace, goal, budget), audit_retry_policy, on_retry=on_retry
+            )
+    except CircuitOpenError as e:
+        tinyfish_requests_total.inc(operation="audit", outcome="circuit_open")
+        tracer.finish(trace, "circuit_open")
+        raise HTTPException(status_code=503, detail=f"TinyFish temporarily unavailable: {e}")
+    except RunDeadlineError as e:
+        tinyfish_requests_total.inc(operation="audit", outcome="deadline")
+        tracer.finish(trace, "deadline")
+        raise HTTPException(status_code=504, detail=str(e))
+    except (UpstreamError, StreamDroppedError) as e:
+        tinyfish_requests_total.inc(operation="audit", outcome="error")
+        tracer.finish(trace, "error")
+        raise HTTPException(status_code=502, detail=f"TinyFish API error: {e}")
+    except httpx.TransportError as e:
+        tinyfish_requests_total.inc(operation="audit", outcome="error")
+        tracer.finish(trace, "error")
+        raise HTTPException(status_code=502, detail=f"TinyFish connection error: {e!r}")
+    except Exception:
+        tracer.finish(trace, "error")
+        raise
+
+    tinyfish_requests_total.inc(operation="audit", outcome="success")
+    tracer.finish(trace, "success")
+    if precheck is not None:
+        result = merge_precheck(result, precheck)
+    return result
+
+
+async def _run_audit_once(
+    url: str,
+    on_event: Optional[EventCallback],
+    trace: AuditTrace,
+    goal: str = AUDIT_PROMPT,
+    budget: Optional[StepBudget] = None
+) -> AuditResult:
+    """Single TinyFish run; raises classified errors for the retry layer"""
+    budget = budget or StepBudget(settings.tinyfish_audit_max_steps, settings.tinyfish_audit_timeout, "default")
+    # TinyFish will automatically visit the URL we pass, so the goal does
+    # not need to repeat "Visit {url}"
 
     logger.info(f"Calling TinyFish/Mino API for URL: {url}")
 
-    async with httpx.AsyncClient(timeout=300.0, follow_redirects=True) as client:  # 5 minute timeout
-        # Call TinyFish/Mino automation endpoint (SSE streaming)
-        api_url = f"{settings.tinyfish_api_url.rstrip('/')}/v1/automation/run-sse"
-
-        async with client.stream(
-            "POST",
-            api_url,
-            json={
-                "url": url,
-                "goal": audit_task,
-                "max_steps": 100
-            },
-            headers={
-                "X-API-Key": settings.cerebras_api_key,
-                "Content-Type": "application/json",
-                "Accept": "text/event-stream"
-            }
-        ) as response:
-            if response.status_code != 200:
-                error_text = await response.aread()
-                error_msg = f"TinyFish API returned status {response.status_code}: {error_text.decode()}"
-                logger.error(error_msg)
-                raise HTTPException(status_code=502, detail=f"TinyFish API error: {error_msg}")
-
-            # Read SSE stream and collect final result
-            result_text = ""
-            raw_events = []
-            async for line in response.aiter_lines():
-                if line.strip():
-                    raw_events.append(line)
-                    logger.info(f"SSE line: {line[:300]}")  # Log first 300 chars for debugging
-
-                if line.startswith("data: "):
-                    data = line[6:]  # Remove "data: " prefix
-                    if data.strip() and data != "[DONE]":
-                        try:
-                            event = json.loads(data)
-                            logger.info(f"Parsed event type: {event.get('type')}")
-
-                            # Handle COMPLETE event with resultJson
-                            if event.get("type") == "COMPLETE":
-                                if "resultJson" in event:
-                                    result_json = event["resultJson"]
-                                    # Check for rejection
-                                    if "rejected" in result_json:
-                                        logger.warning(f"Run rejected: {result_json['rejected']}")
-                                    else:
-                                        # The resultJson IS the audit result!
-                                        # It contains technical_failures, contextual_errors, competitive_gaps
-                                        result_text = json.dumps(result_json)
-                                        logger.info(f"Got audit result with {len(result_text)} chars")
-                            # Collect other result formats
-                            elif "result" in event:
-                                result_text = event["result"]
-                            elif "output" in event:
-                                result_text += event["output"]
-                            elif "message" in event:
-                                result_text += event["message"]
-                        except json.JSONDecodeError:
-                            # Might be plain text
-                            result_text += data
-
-            logger.info(f"Collected {len(raw_events)} SSE events, result length: {len(result_text)}")
-            if result_text:
-                logger.info(f"Result preview: {result_text[:500]}")
-
-        result = {"result": result_text}
-
-    # Parse the response
-    result_text = result.get("result", "") if isinstance(result, dict) else str(result)
-    audit_data = parse_tinyfish_response(result_text, url)
-
-    logger.info(f"TinyFish audit completed for {url}")
-    return AuditResult(**audit_data)
+    client = get_client()
+    started = time.perf_counter()
+    # Covers stalled streams too, not just the time between events
+    deadline_at = asyncio.get_running_loop().time() + budget.deadline
+    trace.record("attempt")
+
+    # Call TinyFish/Mino automation endpoint (SSE streaming)
+    api_url = f"{settings.tinyfish_api_url.rstrip('/')}/v1/automation/run-sse"
+
+    async with client.stream(
+        "POST",
+        api_url,
+        json={
+            "url": url,
+            "goal": goal,
+            "max_steps": budget.max_steps
+        },
+        headers={
+            "X-API-Key": settings.cerebras_api_key,
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"
+        },
+        timeout=call_timeout(settings.tinyfish_audit_timeout)
+    ) as response:
+        audit_connect_seconds.observe(time.perf_counter() - started)
+        trace.record("connected", status=response.status_code)
+        if response.status_code != 200:
+            error_text = await response.aread()
+            error_msg = f"TinyFish API returned status {response.status_code}: {error_text.decode()}"
+            logger.error(error_msg)
+            raise UpstreamError(
+                response.status_code,
+                error_msg,
+                retry_after=parse_retry_after(response.headers.get("Retry-After"))
+            )
+
+        # Read SSE stream; streamed text is parsed incrementally so issues
+        # are emitted as soon as each one is complete
+        parser = IncrementalAuditParser()
+        debug = logger.isEnabledFor(logging.DEBUG)
+        result_json: Optional[Dict[str, Any]] = None
+        events = 0
+        step = 0
+        # Issues already sent to on_event; the final payload repeats streamed ones
+        emitted: Set[str] = set()
+        completed_at: Optional[float] = None
+        parse_seconds = 0.0
+        # Issues parsed from streamed text, and why the run was ended client-side
+        streamed = 0
+        stopped_early: Optional[str] = None
+
+        def feed(text: Any) -> None:
+            nonlocal parse_seconds, streamed
+            if not isinstance(text, str):
+                text = json.dumps(text)
+            parse_started = time.perf_counter()
+            completed = parser.feed(text)
+            parse_seconds += time.perf_counter() - parse_started
+            for category, issue in completed:
+                _emit_issue(on_event, emitted, category, issue)
+            streamed += len(completed)
+            if completed:
+                trace.record("issues", count=len(completed))
+
+        try:
+            async with asyncio.timeout_at(deadline_at):
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    if not events:
+                        audit_first_event_seconds.observe(time.perf_counter() - started)
+                    events += 1
+
+                    if not line.startswith("data: "):
+                        trace.event(None, len(line))
+                    else:
+                        data = line[6:]  # Remove "data: " prefix
+                        if data.strip() and data != "[DONE]":
+                            try:
+                                event = json.loads(data)
+                                trace.event(event.get("type"), len(line))
+                                if debug:
+                                    logger.debug(f"SSE event {event.get('type')}: {line[:300]}")
+
+                                if event.get("type") != "COMPLETE" and any(field in event for field in STEP_FIELDS):
+                                    step += 1
+                                    _emit(on_event, {
+                                        "type": "step",
+                                        "step": step,
+                                        "max_steps": budget.max_steps,
+                                        "upstream_type": event.get("type"),
+                                        "detail": _step_detail(event)
+                                    })
+
+                                # Handle COMPLETE event with resultJson
+                                if event.get("type") == "COMPLETE":
+                                    completed_at = time.perf_counter()
+                                    if "resultJson" in event:
+                                        # Check for rejection
+                                        if "rejected" in event["resultJson"]:
+                                            logger.warning(f"Run rejected: {event['resultJson']['rejected']}")
+                                            trace.record("rejected")
+                                            tinyfish_run_rejections_total.inc()
+                                            _emit(on_event, {"type": "rejected", "reason": str(event["resultJson"]["rejected"])})
+                                        else:
+                                            # The resultJson IS the audit result!
+                                            # It contains technical_failures, contextual_errors, competitive_gaps
+                                            result_json = event["resultJson"]
+                                            trace.record("result", keys=len(result_json))
+                                            _emit_issues(on_event, emitted, result_json)
+                                # Collect other result formats
+                                elif "result" in event:
+                                    # A full result replaces anything streamed so far
+                                    parser = IncrementalAuditParser()
+                                    streamed = 0
+                                    feed(event["result"])
+                                elif "output" in event:
+                                    feed(event["output"])
+                                elif "message" in event:
+                                    feed(event["message"])
+                            except json.JSONDecodeError:
+                                # A truncated event; feeding it to the parser would leave
+                                # an unterminated string open and swallow everything after it
+                                trace.event(None, len(line))
+                                parser.malformed += 1
+                        else:
+                            trace.event(data.strip() or None, len(line))
+
+                    # The prompt's termination condition, enforced client-side so the
+                    # run doesn't keep spending steps after it is met
+                    if result_json is None and 0 < settings.audit_stop_after_issues <= streamed:
+                        stopped_early = "issue_limit"
+                        break
+        except TimeoutError:
+            # The step budget's deadline passed
+            stopped_early = "deadline"
+        except (httpx.RemoteProtocolError, httpx.ReadError, httpx.ReadTimeout) as e:
+            partial = result_json if result_json is not None else parser.audit_data()
+            trace.record("stream_dropped", error=repr(e), steps=step)
+            if partial is not None and settings.tinyfish_salvage_partial_streams:
+                logger.warning(f"TinyFish stream dropped after {step} steps ({e!r}); keeping partial result")
+            elif isinstance(e, httpx.ReadTimeout):
+                raise
+            else:
+                # Nothing usable yet - let the retry layer re-run the audit
+                raise StreamDroppedError(f"TinyFish stream dropped after {step} steps: {e!r}") from e
+        if stopped_early:
+            logger.info(f"Stopping TinyFish run for {url} after {step} steps: {stopped_early} ({streamed} issues)")
+            trace.record("early_stop", reason=stopped_early, steps=step, issues=streamed)
+            early_stops_total.inc(reason=stopped_early)
+
+        audit_complete_seconds.observe((completed_at or time.perf_counter()) - started)
+        audit_sse_events.observe(events)
+        trace.record(
+            "stream_end", events=events, steps=step, chars=parser.chars,
+            documents=len(parser.documents), malformed=parser.malformed
+        )
+
+    # Prefer the structured COMPLETE payload, then whatever the stream yielded
+    if result_json is None:
+        parse_started = time.perf_counter()
+        parsed = parser.audit_data()
+        parse_seconds += time.perf_counter() - parse_started
+        _record_parse_failures(parser, parsed)
+    else:
+        parsed = result_json
+    audit_parse_seconds.observe(parse_seconds)
+    trace.record("parsed", parse_ms=round(parse_seconds * 1000, 2))
+
+    run = AgentRunStats(
+        steps_used=step,
+        max_steps=budget.max_steps,
+        deadline=round(budget.deadline, 1),
+        budget_basis=budget.basis,
+        stopped_early=stopped_early,
+        elapsed=round(time.perf_counter() - started, 2),
+    )
+    audit_steps.observe(step)
+    budget_policy.record(url, run)
+    if parsed is None and stopped_early:
+        # An empty audit here would be reported (and cached) as a clean site
+        raise RunDeadlineError(
+            f"TinyFish run stopped at its {budget.deadline:.0f}s deadline after {step} steps without audit output"
+        )
+
+    audit_data = build_audit_data(parsed, url)
+    _emit_issues(on_event, emitted, audit_data)
+    audit_data["run"] = run
+
+    with audit_validation_seconds.time():
+        result = AuditResult(**audit_data)
+    trace.record("validated", issues=result.total_issues)
+
+    logger.info(f"TinyFish audit completed for {url} ({events} SSE events, {step}/{budget.max_steps} steps)")
+    return result
@@ -0,0 +1,145 @@
+"""
+Structured, sampled tracing of TinyFish SSE runs.
+
+Instead of logging every SSE line, each sampled audit keeps a compact trace:
+one record per event (offset, event type, byte count) in a bounded ring
+buffer, plus per-run totals. Recent traces are kept in memory and can
+optionally be dumped to disk as <audit_id>.json when the run finishes.
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuditTrace:
+    """Trace of one audit run (all attempts)"""
+
+    def __init__(self, trace_id: str, url: str, max_records: int):
+        self.trace_id = trace_id
+        self.url = url
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.records: deque = deque(maxlen=max_records)
+        self.dropped = 0
+        self.events = 0
+        self.bytes = 0
+        self.event_types: Counter = Counter()
+        self.outcome: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._start) * 1000, 2)
+
+    def record(self, kind: str, **fields: Any) -> None:
+        if len(self.records) == self.records.maxlen:
+            self.dropped += 1
+        self.records.append({"t_ms": self.elapsed_ms(), "kind": kind, **fields})
+
+    def event(self, upstream_type: Optional[str], size: int) -> None:
+        """One SSE line from TinyFish"""
+        self.events += 1
+        self.bytes += size
+        self.event_types[upstream_type or "text"] += 1
+        self.record("event", type=upstream_type, bytes=size)
+
+    def finish(self, outcome: str) -> None:
+        self.outcome = outcome
+        self.duration_ms = self.elapsed_ms()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "url": self.url,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": self.duration_ms,
+            "outcome": self.outcome,
+            "events": self.events,
+            "bytes": self.bytes,
+            "event_types": dict(self.event_types),
+            "dropped_records": self.dropped,
+            "records": list(self.records),
+        }
+
+
+class _NullTrace(AuditTrace):
+    """Stand-in for runs that were not sampled; records nothing"""
+
+    def __init__(self):
+        super().__init__("", "", max_records=0)
+
+    def record(self, kind: str, **fields: Any) -> None:
+        pass
+
+    def event(self, upstream_type: Optional[str], size: int) -> None:
+        self.events += 1
+        self.bytes += size
+
+    def finish(self, outcome: str) -> None:
+        pass
+
+
+class Tracer:
+    """Samples audit runs and keeps the most recent traces"""
+
+    def __init__(
+        self,
+        sample_rate: float = settings.trace_sample_rate,
+        max_records: int = settings.trace_max_records,
+        retention: int = settings.trace_retention,
+        dump_dir: str = settings.trace_dump_dir
+    ):
+        self.sample_rate = sample_rate
+        self.max_records = max_records
+        self.retention = retention
+        self.dump_dir = Path(dump_dir) if dump_dir else None
+        self._traces: "OrderedDict[str, AuditTrace]" = OrderedDict()
+
+    def start(self, url: str, trace_id: Optional[str] = None) -> AuditTrace:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return _NullTrace()
+        return AuditTrace(trace_id or str(uuid.uuid4()), url, self.max_records)
+
+    def finish(self, trace: AuditTrace, outcome: str) -> None:
+        if isinstance(trace, _NullTrace):
+            return
+        trace.finish(outcome)
+        self._traces[trace.trace_id] = trace
+        self._traces.move_to_end(trace.trace_id)
+        while len(self._traces) > self.retention:
+            self._traces.popitem(last=False)
+
+        if self.dump_dir is not None:
+            # Off the event loop; a lost dump only costs debuggability
+            asyncio.get_running_loop().run_in_executor(None, self._dump, trace.trace_id, trace.to_dict())
+
+    def _dump(self, trace_id: str, data: Dict[str, Any]) -> None:
+        try:
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+            (self.dump_dir / f"{trace_id}.json").write_text(json.dumps(data))
+        except OSError as e:
+            logger.warning(f"Could not write trace {trace_id}: {e}")
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        trace = self._traces.get(trace_id)
+        if trace is not None:
+            return trace.to_dict()
+        if self.dump_dir is not None:
+            # Only plain ids map to files in the dump directory
+            path = self.dump_dir / f"{Path(trace_id).name}.json"
+            if path.is_file():
+                return json.loads(path.read_text())
+        return None
+
+
+tracer = Tracer()
@@ -0,0 +1,47 @@
+"""
+URL helpers shared by the audit store and request de-duplication
+"""
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys.
+
+    Lowercases scheme and host, drops default ports, fragments and a
+    trailing slash, and sorts query parameters so equivalent URLs map to
+    the same key. Raises ValueError for URLs that cannot be parsed (such as
+    an out-of-range port).
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError as e:
+        raise ValueError(f"Invalid URL {url!r}: {e}") from e
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def valid_url(url: str) -> str:
+    """The URL unchanged if it can be normalized; request models validate with this"""
+    normalize_url(url)
+    return url
+
+
+def domain_of(url: str) -> str:
+    """Site a URL belongs to, for grouping audit history (www. is ignored)"""
+    host = urlsplit(normalize_url(url)).netloc
+    return host[4:] if host.startswith("www.") else host
@@ -0,0 +1,239 @@
+"""
+Local stand-in for the TinyFish `/v1/automation/run-sse` endpoint.
+
+Streams synthetic (or recorded) agent runs so the backend's HTTP/SSE path
+can be exercised and benchmarked without a real TinyFish account. Point
+the backend at it with TINYFISH_API_URL=http://127.0.0.1:8100.
+
+    python -m benchmarks.fake_tinyfish --port 8100 --steps 20 --step-delay 0.05 \\
+        --issues 12 --error-rate 0.05 --malformed-rate 0.1
+
+Runs whose target URL mentions duckduckgo get a news, incidents or
+competitors payload depending on the goal, like the enrichment searches.
+
+It also serves a small fixture shop under /site/ - pages with working and
+broken links, images and a form - for the backend's pre-audit checks.
+"""
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# 1x1 transparent PNG for fixture images
+PIXEL = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c63000100000500010d0a2db40000000049454e44ae426082"
+)
+
+
+class Scenario:
+    """How the stand-in behaves; set from the command line"""
+
+    def __init__(
+        self,
+        steps: int = 10,
+        step_delay: float = 0.05,
+        connect_delay: float = 0.0,
+        issues: int = 9,
+        padding: int = 0,
+        result_chunks: int = 0,
+        error_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        reject_rate: float = 0.0,
+        replay: Optional[str] = None,
+        site_links: int = 8,
+        site_broken: int = 2
+    ):
+        self.steps = steps
+        self.step_delay = step_delay
+        self.connect_delay = connect_delay
+        self.issues = issues
+        self.padding = padding
+        self.result_chunks = result_chunks
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.malformed_rate = malformed_rate
+        self.reject_rate = reject_rate
+        self.recorded = load_recording(replay) if replay else None
+        self.site_links = site_links
+        self.site_broken = site_broken
+
+
+def load_recording(path: str) -> List[str]:
+    """SSE events from a recorded stream (blank-line separated `data:` blocks)"""
+    with open(path) as f:
+        return [block.strip() + "\n\n" for block in f.read().split("\n\n") if block.strip()]
+
+
+def audit_payload(issues: int, padding: int) -> Dict[str, Any]:
+    pad = " " + "x" * padding if padding else ""
+    per_category = [issues // 3 + (1 if i < issues % 3 else 0) for i in range(3)]
+    return {
+        "technical_failures": [{
+            "error_type": "broken_link", "element": f"Footer link {i}", "location": "Footer navigation",
+            "expected_behavior": "Opens the returns policy" + pad, "actual_behavior": "404 Not Found" + pad,
+            "transaction_impact": "Agent cannot verify the returns policy" + pad, "severity": SEVERITIES[i % 4],
+        } for i in range(per_category[0])],
+        "contextual_errors": [{
+            "error_type": "seasonal_mismatch", "content": f"Holiday banner {i}", "location": "Hero section",
+            "why_wrong": "Promotion ended weeks ago" + pad, "agent_confusion": "Agent applies an expired discount" + pad,
+            "severity": SEVERITIES[(i + 1) % 4],
+        } for i in range(per_category[1])],
+        "competitive_gaps": [{
+            "gap_type": "missing_schema", "missing_element": f"Product schema {i}", "location": "Product page",
+            "competitor_standard": "Structured price and availability" + pad,
+            "agent_impact": "Agent scrapes prices from text" + pad, "severity": SEVERITIES[(i + 2) % 4],
+        } for i in range(per_category[2])],
+    }
+
+
+def enrichment_payload(goal: str) -> Dict[str, Any]:
+    if '"competitors"' in goal:
+        return {"competitors": [
+            {"name": f"Competitor {i}", "url": f"https://competitor{i}.example.com", "note": "Sells the same range."}
+            for i in range(5)
+        ]}
+    if '"incidents"' in goal:
+        return {"incidents": [
+            {"title": f"Checkout outage {i}", "source": "Status page", "date": "3 days ago",
+             "summary": "Orders failed for an hour."}
+            for i in range(2)
+        ]}
+    return {"articles": [
+        {"title": f"Company news {i}", "url": f"https://news.example.com/{i}", "source": "Example News",
+         "date": "2026-02-01", "summary": "Short summary of the article."}
+        for i in range(5)
+    ]}
+
+
+def site_page(page: str, links: int, broken: int) -> str:
+    """Fixture shop page: product, cart and checkout links, `broken` dead links, a missing image and a form"""
+    nav = "".join(f'<a href="/site/{page}/product/{i}">Product {i}</a>' for i in range(links))
+    dead = "".join(f'<a href="/site/missing/{i}">Old offer {i}</a>' for i in range(broken))
+    missing_image = '<img src="/site/missing.png" alt="Hero banner">' if broken else ""
+    return f"""<!doctype html>
+<html><head><title>Fixture shop {page}</title></head>
+<body>
+<header><nav>{nav}<a href="/site/cart">Cart</a><a href="/site/checkout">Checkout</a></nav></header>
+<main>
+<h1>Fixture product {page}</h1>
+<img src="/site/product.png" alt="Product photo">{missing_image}
+<p>Price: $49.99</p>
+<form name="search" action="/site/search" method="get"><input name="q"><button>Search</button></form>
+</main>
+<footer>{dead}<a href="mailto:help@example.com">Contact</a></footer>
+</body></html>"""
+
+
+def sse(event: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+def synthesize(scenario: Scenario, url: str, goal: str = "") -> List[str]:
+    events = [sse({"type": "STARTED", "runId": "fake"})]
+    for step in range(1, scenario.steps + 1):
+        if random.random() < scenario.malformed_rate:
+            events.append('data: {"type": "STEP", "purpose": "truncated\n\n')
+        else:
+            events.append(sse({"type": "STEP", "step": step, "purpose": f"Inspect section {step}", "url": url}))
+
+    if "duckduckgo" in url:
+        result: Dict[str, Any] = enrichment_payload(goal)
+    elif random.random() < scenario.reject_rate:
+        return events + [sse({"type": "COMPLETE", "resultJson": {"rejected": "Site blocked automation"}})]
+    else:
+        result = audit_payload(scenario.issues, scenario.padding)
+
+    if scenario.result_chunks:
+        # Stream the result as text fragments instead of a structured resultJson
+        text = "Audit finished. Result: " + json.dumps(result)
+        size = -(-len(text) // scenario.result_chunks)
+        events.extend(sse({"type": "STEP", "output": text[i:i + size]}) for i in range(0, len(text), size))
+        return events + [sse({"type": "COMPLETE"})]
+    return events + [sse({"type": "COMPLETE", "resultJson": result})]
+
+
+def create_app(scenario: Scenario) -> FastAPI:
+    app = FastAPI(title="TinyFish stand-in")
+    app.state.runs = 0
+
+    @app.post("/v1/automation/run-sse")
+    async def run_sse(request: Request):
+        body = await request.json()
+        app.state.runs += 1
+        if scenario.connect_delay:
+            await asyncio.sleep(scenario.connect_delay)
+        if random.random() < scenario.error_rate:
+            return JSONResponse({"error": "stand-in overloaded"}, status_code=503, headers={"Retry-After": "1"})
+
+        events = scenario.recorded or synthesize(scenario, body.get("url", ""), body.get("goal", ""))
+        drop_at = random.randrange(1, len(events)) if len(events) > 1 and random.random() < scenario.drop_rate else None
+
+        async def stream():
+            for index, event in enumerate(events):
+                if index == drop_at:
+                    # Abort the response mid-stream, like a dropped connection
+                    raise ConnectionAbortedError("stand-in dropped the stream")
+                if scenario.step_delay:
+                    await asyncio.sleep(scenario.step_delay)
+                yield event
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.api_route("/site/{path:path}", methods=["GET", "HEAD"])
+    async def site(path: str):
+        if path.startswith("missing"):
+            return Response(status_code=404)
+        if path.endswith(".png"):
+            return Response(PIXEL, media_type="image/png")
+        return HTMLResponse(site_page(path, scenario.site_links, scenario.site_broken))
+
+    @app.get("/stats")
+    async def stats():
+        return {"runs": app.state.runs}
+
+    return app
+
+
+def add_scenario_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--steps", type=int, default=10, help="agent steps streamed per run")
+    parser.add_argument("--step-delay", type=float, default=0.05, help="seconds between events")
+    parser.add_argument("--connect-delay", type=float, default=0.0, help="seconds before response headers")
+    parser.add_argument("--issues", type=int, default=9, help="issues in each audit result")
+    parser.add_argument("--padding", type=int, default=0, help="extra characters per issue text field")
+    parser.add_argument("--result-chunks", type=int, default=0,
+                        help="stream the result as this many text fragments instead of resultJson")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of runs answered with 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of streams cut off mid-way")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of step events with broken JSON")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of audits rejected by the agent")
+    parser.add_argument("--replay", help="replay this recorded SSE stream for every run")
+    parser.add_argument("--site-links", type=int, default=8, help="working links per fixture site page")
+    parser.add_argument("--site-broken", type=int, default=2, help="broken links per fixture site page")
+
+
+def scenario_from_args(args: argparse.Namespace) -> Scenario:
+    return Scenario(
+        steps=args.steps, step_delay=args.step_delay, connect_delay=args.connect_delay, issues=args.issues,
+        padding=args.padding, result_chunks=args.result_chunks, error_rate=args.error_rate,
+        drop_rate=args.drop_rate, malformed_rate=args.malformed_rate, reject_rate=args.reject_rate,
+        replay=args.replay, site_links=args.site_links, site_broken=args.site_broken
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local TinyFish SSE stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_scenario_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(scenario_from_args(args)), host=args.host, port=args.port, log_level="warning")
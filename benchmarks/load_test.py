@@ -0,0 +1,236 @@
+"""
+Load test for the audit, news, batch and static paths against the TinyFish stand-in.
+
+Starts benchmarks.fake_tinyfish and the backend (uvicorn) as subprocesses,
+drives each path at increasing concurrency and reports throughput,
+p50/p99 latency and the backend's peak memory. Audits use unique pages of
+the stand-in's fixture site and force_refresh, so every request is a full
+run through the pre-audit checks and the SSE path.
+
+    python -m benchmarks.load_test --concurrency 1,4,16,64 --requests 64 \\
+        --paths audit,news,batch --steps 20 --step-delay 0.02
+
+Scenario options (--steps, --error-rate, --malformed-rate, ...) are passed
+to the stand-in; see `python -m benchmarks.fake_tinyfish --help`.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+
+from benchmarks.fake_tinyfish import add_scenario_arguments
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process in MB (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def scenario_argv(args: argparse.Namespace) -> List[str]:
+    argv = []
+    for name in ("steps", "step_delay", "connect_delay", "issues", "padding", "result_chunks",
+                 "error_rate", "drop_rate", "malformed_rate", "reject_rate", "replay", "site_links", "site_broken"):
+        value = getattr(args, name)
+        if value is not None:
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+    return argv
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, backend_pid: int, batch_size: int, site_url: str):
+        self.client = client
+        self.site_url = site_url
+        self.backend_pid = backend_pid
+        self.batch_size = batch_size
+        self.run_id = uuid.uuid4().hex[:8]
+        self.counter = 0
+
+    def unique_url(self) -> str:
+        self.counter += 1
+        return f"https://shop-{self.run_id}-{self.counter}.example.com/p/{self.counter}"
+
+    def unique_page(self) -> str:
+        """Page of the stand-in's fixture site, so the pre-audit has real targets to check"""
+        self.counter += 1
+        return f"{self.site_url}/site/{self.run_id}-{self.counter}"
+
+    async def audit(self) -> bool:
+        response = await self.client.post("/api/audit", json={"url": self.unique_page(), "force_refresh": True})
+        if response.status_code not in (200, 202):
+            return False
+        audit_id = response.json()["audit_id"]
+        event_type = None
+        async with self.client.stream("GET", f"/api/audit/{audit_id}/events") as events:
+            async for line in events.aiter_lines():
+                if line.startswith("event: "):
+                    event_type = line[7:]
+                elif event_type == "result" and line.startswith("data: "):
+                    return json.loads(line[6:])["status"] == "completed"
+        return False
+
+    async def news(self) -> bool:
+        response = await self.client.get(f"/api/news/{quote(self.unique_url(), safe='')}")
+        return response.status_code == 200 and not response.json().get("errors")
+
+    async def batch(self) -> bool:
+        urls = [self.unique_url() for _ in range(self.batch_size)]
+        async with self.client.stream("POST", "/api/audit/batch", json={"urls": urls, "force_refresh": True}) as response:
+            async for line in response.aiter_lines():
+                item = json.loads(line) if line.strip() else {}
+                if item.get("type") == "report":
+                    return item["completed"] == len(urls)
+        return False
+
+    async def static(self) -> bool:
+        """A first dashboard visit: the page, then every asset it references"""
+        headers = {"Accept-Encoding": "gzip, br"}
+        page = await self.client.get("/", headers=headers)
+        if page.status_code != 200:
+            return False
+        for url in re.findall(r'"(/static/[^"]+)"', page.text):
+            if (await self.client.get(url, headers=headers)).status_code != 200:
+                return False
+        return True
+
+    async def run_level(self, operation: Callable[[], Awaitable[bool]], concurrency: int, requests: int) -> Dict[str, float]:
+        limit = asyncio.Semaphore(concurrency)
+        latencies: List[float] = []
+        failures = 0
+        peak = rss_mb(self.backend_pid) or 0.0
+        sampling = True
+
+        async def sample_memory() -> None:
+            nonlocal peak
+            while sampling:
+                peak = max(peak, rss_mb(self.backend_pid) or 0.0)
+                await asyncio.sleep(0.1)
+
+        async def one() -> None:
+            nonlocal failures
+            async with limit:
+                start = time.perf_counter()
+                try:
+                    ok = await operation()
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                failures += 0 if ok else 1
+
+        sampler = asyncio.create_task(sample_memory())
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        sampling = False
+        await sampler
+
+        return {
+            "concurrency": concurrency,
+            "requests": requests,
+            "failures": failures,
+            "throughput": requests / elapsed,
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "peak_rss": peak,
+        }
+
+
+async def main(args: argparse.Namespace) -> None:
+    fake_port, backend_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        "TINYFISH_API_URL": f"http://127.0.0.1:{fake_port}",
+        "CEREBRAS_API_KEY": "load-test",
+        "AUDIT_STORE_BACKEND": "memory",
+        "TINYFISH_MAX_SESSIONS": str(args.sessions),
+        "AUDIT_QUEUE_SIZE": "100000",
+        "MONITOR_ENABLED": "false",
+        "TINYFISH_RETRY_BASE_DELAY": "0.1",
+        # The fixture site is on loopback
+        "SITE_ALLOW_PRIVATE_HOSTS": "true",
+    }
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_tinyfish", "--port", str(fake_port), *scenario_argv(args)],
+        cwd=ROOT
+    )
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(backend_port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    try:
+        await wait_ready(f"http://127.0.0.1:{fake_port}/stats")
+        await wait_ready(f"http://127.0.0.1:{backend_port}/health")
+
+        levels = [int(level) for level in args.concurrency.split(",")]
+        limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{backend_port}", limits=limits, timeout=600) as client:
+            test = LoadTest(client, backend.pid, args.batch_size, f"http://127.0.0.1:{fake_port}")
+            print(f"backend sessions={args.sessions}, idle rss={rss_mb(backend.pid) or 0:.1f} MB")
+            print(f"{'path':<8}{'conc':>6}{'reqs':>6}{'fail':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+            for path in args.paths.split(","):
+                operation = getattr(test, path)
+                for level in levels:
+                    requests = max(level, args.requests if path != "batch" else max(1, args.requests // args.batch_size))
+                    row = await test.run_level(operation, level, requests)
+                    print(
+                        f"{path:<8}{row['concurrency']:>6}{row['requests']:>6}{row['failures']:>6}"
+                        f"{row['throughput']:>10.1f}{row['p50']:>10.1f}{row['p99']:>10.1f}{row['peak_rss']:>10.1f}"
+                    )
+    finally:
+        for process in (backend, fake):
+            process.terminate()
+            process.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", default="audit,news,batch", help="comma-separated: audit, news, batch, static")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="requests per level (batches use requests / batch size)")
+    parser.add_argument("--batch-size", type=int, default=8, help="URLs per batch request")
+    parser.add_argument("--sessions", type=int, default=16, help="TINYFISH_MAX_SESSIONS for the backend")
+    add_scenario_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
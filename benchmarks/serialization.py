@@ -0,0 +1,125 @@
+"""
+Serialization benchmark: FastAPI's response_model path vs backend.responses.
+
+Run from the project root:
+
+    python -m benchmarks.serialization [--issues 30] [--batch 500] [--rounds 200]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend import responses
+from backend.models import AuditResponse, AuditResult, AuditStatus
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+
+def make_result(issues: int) -> AuditResult:
+    per_category = max(1, issues // 3)
+    return AuditResult(
+        url="https://shop.example.com/p/1",
+        audit_date=datetime.now(),
+        technical_failures=[{
+            "error_type": "broken_link", "element": f"Link {i}", "location": "Footer navigation",
+            "expected_behavior": "Opens the returns policy page", "actual_behavior": "404 Not Found",
+            "transaction_impact": "Agent cannot verify the returns policy and abandons checkout",
+            "severity": SEVERITIES[i % 4],
+        } for i in range(per_category)],
+        contextual_errors=[{
+            "error_type": "seasonal_mismatch", "content": f"Holiday banner {i}", "location": "Hero section",
+            "why_wrong": "Promotion ended weeks ago", "agent_confusion": "Agent applies an expired discount",
+            "severity": SEVERITIES[(i + 1) % 4],
+        } for i in range(per_category)],
+        competitive_gaps=[{
+            "gap_type": "missing_schema", "missing_element": f"Product schema {i}", "location": "Product page",
+            "competitor_standard": "Structured price and availability", "agent_impact": "Agent scrapes prices from text",
+            "severity": SEVERITIES[(i + 2) % 4],
+        } for i in range(per_category)],
+    )
+
+
+def make_news(articles: int = 20) -> Dict[str, Any]:
+    return {
+        "company_name": "Example Shop",
+        "news": [{
+            "title": f"Example Shop announces update {i}", "url": f"https://news.example.com/{i}",
+            "source": "Example News", "date": "2026-02-01", "summary": "A short summary of the article. " * 4,
+        } for i in range(articles)],
+        "incidents": [],
+        "competitive_intel": [],
+    }
+
+
+def bench(fn: Callable[[], Any], rounds: int) -> float:
+    """Mean milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+async def bench_async(fn: Callable[[], Any], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+async def main(issues: int, batch: int, rounds: int) -> None:
+    response = AuditResponse(audit_id="bench", status=AuditStatus.COMPLETED, result=make_result(issues))
+    field = create_model_field(name="Response_bench", type_=AuditResponse, mode="serialization")
+
+    async def current_audit() -> bytes:
+        # What FastAPI does for a route declared with response_model=AuditResponse
+        content = await serialize_response(field=field, response_content=response)
+        return JSONResponse(content).body
+
+    news = make_news()
+    items: List[Dict[str, Any]] = [
+        {"type": "result", "url": f"https://shop.example.com/p/{i}", "audit_id": str(i), "status": "completed",
+         "cached": False, **response.result.summary.model_dump(), "result": response.result.model_dump(mode="json")}
+        for i in range(batch)
+    ]
+
+    rows = [
+        ("audit response", await bench_async(current_audit, rounds), bench(lambda: responses.dumps(response), rounds)),
+        ("news payload", bench(lambda: JSONResponse(jsonable_encoder(news)).body, rounds),
+         bench(lambda: responses.dumps(news), rounds)),
+        (f"batch ndjson ({batch} items)",
+         bench(lambda: b"".join(json.dumps(item, default=str).encode() + b"\n" for item in items), max(1, rounds // 20)),
+         bench(lambda: b"".join(responses.dumps(item) + b"\n" for item in items), max(1, rounds // 20))),
+    ]
+
+    print(f"orjson: {'yes' if responses.orjson else 'no'}, brotli: {'yes' if responses.brotli else 'no'}")
+    print(f"{'payload':<28}{'current ms':>12}{'fast ms':>12}{'speedup':>10}")
+    for name, current, fast in rows:
+        print(f"{name:<28}{current:>12.3f}{fast:>12.3f}{current / fast:>9.1f}x")
+
+    body = b"".join(responses.dumps(item) + b"\n" for item in items)
+    print(f"\nbatch body: {len(body)} bytes")
+    for level in (1, 6, 9):
+        took = bench(lambda: gzip.compress(body, compresslevel=level), 3)
+        print(f"  gzip -{level}: {len(gzip.compress(body, compresslevel=level))} bytes, {took:.1f} ms")
+    if responses.brotli is not None:
+        for quality in (1, 4, 11):
+            took = bench(lambda: responses.brotli.compress(body, quality=quality), 3)
+            print(f"  brotli q{quality}: {len(responses.brotli.compress(body, quality=quality))} bytes, {took:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--issues", type=int, default=30, help="issues per audit result")
+    parser.add_argument("--batch", type=int, default=500, help="items in the batch payload")
+    parser.add_argument("--rounds", type=int, default=200, help="iterations per measurement")
+    args = parser.parse_args()
+    asyncio.run(main(args.issues, args.batch, args.rounds))
@@ -20,7 +20,7 @@ export async function fetchExampleAudit() {
 }
 
 /**
- * Submit a new audit request
+ * Submit a new audit request and wait for it to finish
  */
 export async function submitAudit(url) {
   try {
@@ -37,7 +37,8 @@ export async function submitAudit(url) {
       throw new Error(errorData.detail || 'Audit request failed');
     }
 
-    const data = await response.json();
+    const job = await response.json();
+    const data = await waitForAudit(job.audit_id);
     return processAuditData(data.result);
   } catch (error) {
     console.error('Error submitting audit:', error);
@@ -46,7 +47,110 @@ export async function submitAudit(url) {
 }
 
 /**
- * Process audit data and compute metrics
+ * Poll a queued audit until it completes or fails
+ */
+export async function waitForAudit(auditId, intervalMs = 2000) {
+  while (true) {
+    const response = await fetch(`${API_BASE_URL}/api/audit/${auditId}`);
+    if (!response.ok) {
+      const errorData = await response.json();
+      throw new Error(errorData.detail || 'Failed to fetch audit status');
+    }
+
+    const data = await response.json();
+    if (data.status === 'completed') {
+      return data;
+    }
+    if (data.status === 'failed') {
+      throw new Error(data.error || 'Audit failed');
+    }
+
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+}
+
+/**
+ * Fetch a finished audit by ID
+ */
+export async function fetchAudit(auditId) {
+  const data = await waitForAudit(auditId);
+  return processAuditData(data.result);
+}
+
+/**
+ * Start an audit and stream its progress.
+ *
+ * handlers.onStep(event)   - agent step ({ step, max_steps, upstream_type, detail })
+ * handlers.onIssue(event)  - issue found ({ category, issue })
+ * handlers.onStatus(event) - status change ({ status, error })
+ * handlers.onRetry(event)  - run is being retried after a transient failure ({ attempt, reason, delay })
+ * handlers.onPrecheck(event) - link/image/form checks done ({ links_checked, images_checked, forms_checked, findings, ... })
+ *
+ * Resolves with the audit ID once the audit completes.
+ */
+export async function streamAudit(url, handlers = {}) {
+  const response = await fetch(`${API_BASE_URL}/api/audit`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ url }),
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.detail || 'Audit request failed');
+  }
+
+  const job = await response.json();
+
+  // Served from the audit store - nothing to stream
+  if (job.status === 'completed') {
+    return job.audit_id;
+  }
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE_URL}/api/audit/${job.audit_id}/events`);
+
+    source.addEventListener('step', e => handlers.onStep?.(JSON.parse(e.data)));
+    source.addEventListener('issue', e => handlers.onIssue?.(JSON.parse(e.data)));
+    source.addEventListener('status', e => handlers.onStatus?.(JSON.parse(e.data)));
+    source.addEventListener('retry', e => handlers.onRetry?.(JSON.parse(e.data)));
+    source.addEventListener('precheck', e => handlers.onPrecheck?.(JSON.parse(e.data)));
+    source.addEventListener('result', e => {
+      source.close();
+      const data = JSON.parse(e.data);
+      if (data.status === 'completed') {
+        resolve(job.audit_id);
+      } else {
+        reject(new Error(data.error || 'Audit failed'));
+      }
+    });
+    source.onerror = () => {
+      // Stream dropped (proxy timeout etc.) - fall back to polling
+      source.close();
+      waitForAudit(job.audit_id).then(() => resolve(job.audit_id), reject);
+    };
+  });
+}
+
+/**
+ * List stored audits, newest first (severity summaries only, no result bodies)
+ */
+export async function fetchAuditHistory(params = {}) {
+  const query = new URLSearchParams(
+    Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== '')
+  );
+  const response = await fetch(`${API_BASE_URL}/api/audit?${query}`);
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.detail || 'Failed to fetch audit history');
+  }
+  return response.json();
+}
+
+/**
+ * Shape audit data for rendering, using the summary computed by the backend
  */
 function processAuditData(data) {
   const allIssues = [
@@ -54,38 +158,48 @@ function processAuditData(data) {
     ...(data.contextual_errors || []),
     ...(data.competitive_gaps || [])
   ];
-
-  // Count by severity
-  const criticalCount = allIssues.filter(i => i.severity === 'critical').length;
-  const highCount = allIssues.filter(i => i.severity === 'high').length;
-  const mediumCount = allIssues.filter(i => i.severity === 'medium').length;
-  const lowCount = allIssues.filter(i => i.severity === 'low').length;
-
-  // Calculate risk score (critical=25, high=10, medium=5, low=2)
-  const riskScore = Math.min(100,
-    criticalCount * 25 +
-    highCount * 10 +
-    mediumCount * 5 +
-    lowCount * 2
-  );
+  const summary = data.summary || summarizeIssues(data, allIssues);
 
   return {
     ...data,
     metrics: {
-      totalIssues: allIssues.length,
-      criticalCount,
-      highCount,
-      mediumCount,
-      lowCount,
-      riskScore,
-      technicalCount: (data.technical_failures || []).length,
-      contextualCount: (data.contextual_errors || []).length,
-      competitiveCount: (data.competitive_gaps || []).length
+      totalIssues: summary.total_issues,
+      criticalCount: summary.critical_count,
+      highCount: summary.high_count,
+      mediumCount: summary.medium_count,
+      lowCount: summary.low_count,
+      riskScore: summary.risk_score,
+      technicalCount: summary.technical_count,
+      contextualCount: summary.contextual_count,
+      competitiveCount: summary.competitive_count
     },
     allIssues
   };
 }
 
+/**
+ * Single-pass fallback for audit data without a backend summary
+ * (same weights as backend/models.py: critical=25, high=10, medium=5, low=2)
+ */
+function summarizeIssues(data, allIssues) {
+  const counts = { critical: 0, high: 0, medium: 0, low: 0 };
+  for (const issue of allIssues) {
+    if (issue.severity in counts) counts[issue.severity]++;
+  }
+
+  return {
+    total_issues: allIssues.length,
+    critical_count: counts.critical,
+    high_count: counts.high,
+    medium_count: counts.medium,
+    low_count: counts.low,
+    risk_score: Math.min(100, counts.critical * 25 + counts.high * 10 + counts.medium * 5 + counts.low * 2),
+    technical_count: (data.technical_failures || []).length,
+    contextual_count: (data.contextual_errors || []).length,
+    competitive_count: (data.competitive_gaps || []).length
+  };
+}
+
 /**
  * Format date for display
  */
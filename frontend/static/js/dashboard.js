@@ -1,6 +1,6 @@
 // Main dashboard logic
 
-import { fetchExampleAudit, submitAudit, formatDate } from './api.js';
+import { fetchExampleAudit, fetchAudit, fetchAuditHistory, formatDate } from './api.js';
 import { createCategoryChart, createSeverityChart } from './charts.js';
 
 let currentAuditData = null;
@@ -12,9 +12,16 @@ let severityChart = null;
  */
 export async function initDashboard() {
   try {
-    // Load example audit data by default
-    currentAuditData = await fetchExampleAudit();
-    renderDashboard(currentAuditData, true);
+    // Show a finished live audit if we were redirected from the loading page,
+    // otherwise load example audit data by default
+    const auditId = new URLSearchParams(window.location.search).get('audit_id');
+    if (auditId) {
+      currentAuditData = await fetchAudit(auditId);
+      renderDashboard(currentAuditData, false);
+    } else {
+      currentAuditData = await fetchExampleAudit();
+      renderDashboard(currentAuditData, true);
+    }
 
     // Load industry insights
     loadIndustryInsights();
@@ -28,9 +35,61 @@ export async function initDashboard() {
 }
 
 /**
- * Load company news asynchronously (separate API call)
+ * Section headings and item rendering for each enrichment provider
  */
-async function loadCompanyNews(url) {
+const ENRICHMENT_SECTIONS = {
+  news: {
+    title: 'Recent News',
+    render: article => `
+      <div style="font-weight: 500; color: var(--purple-900); margin-bottom: 0.25rem;">
+        ${escapeHtml(article.title)}
+      </div>
+      <div style="font-size: 0.75rem; color: var(--purple-700); opacity: 0.8;">
+        ${escapeHtml(article.source)} • ${escapeHtml(article.date || 'Recent')}
+      </div>
+      ${article.summary ? `
+        <div style="font-size: 0.75rem; color: var(--purple-900); opacity: 0.8; margin-top: 0.25rem;">
+          ${escapeHtml(article.summary)}
+        </div>
+      ` : ''}
+    `
+  },
+  incidents: {
+    title: 'Recent Incidents',
+    render: incident => `
+      <div style="font-weight: 500; color: var(--purple-900); margin-bottom: 0.25rem;">
+        ${escapeHtml(incident.title)}
+      </div>
+      <div style="font-size: 0.75rem; color: var(--purple-700); opacity: 0.8;">
+        ${escapeHtml(incident.source)} • ${escapeHtml(incident.date || 'Recent')}
+      </div>
+      ${incident.summary ? `
+        <div style="font-size: 0.75rem; color: var(--purple-900); opacity: 0.8; margin-top: 0.25rem;">
+          ${escapeHtml(incident.summary)}
+        </div>
+      ` : ''}
+    `
+  },
+  competitors: {
+    title: 'Competitors',
+    render: competitor => `
+      <div style="font-weight: 500; color: var(--purple-900); margin-bottom: 0.25rem;">
+        ${escapeHtml(competitor.name)}
+      </div>
+      ${competitor.note ? `
+        <div style="font-size: 0.75rem; color: var(--purple-900); opacity: 0.8;">
+          ${escapeHtml(competitor.note)}
+        </div>
+      ` : ''}
+    `
+  }
+};
+
+/**
+ * Load company enrichment asynchronously (separate streaming API call).
+ * Each provider's section is rendered as soon as it arrives.
+ */
+function loadCompanyNews(url) {
   const insightsEl = document.getElementById('industry-insights');
   if (!insightsEl) return;
 
@@ -42,47 +101,53 @@ async function loadCompanyNews(url) {
     </div>
   `;
 
-  try {
-    // Encode URL for path parameter
-    const encodedUrl = encodeURIComponent(url);
-    const response = await fetch(`/api/news/${encodedUrl}`);
-    const enrichmentData = await response.json();
-
-    // Display news if available
-    if (enrichmentData.news && enrichmentData.news.length > 0) {
-      const companyName = enrichmentData.company_name || 'Company';
+  const source = new EventSource(`/api/enrichment/${encodeURIComponent(url)}`);
+  let rendered = 0;
+
+  source.addEventListener('provider', event => {
+    const section = JSON.parse(event.data);
+    const layout = ENRICHMENT_SECTIONS[section.provider];
+    if (!layout || !section.items || section.items.length === 0) return;
+
+    if (rendered === 0) {
       insightsEl.innerHTML = `
-        <h4 style="font-size: 0.813rem; font-weight: 600; margin-bottom: 0.5rem; color: var(--purple-700);">
-          Recent News: ${escapeHtml(companyName)}
-        </h4>
-        <ul style="list-style: none; padding: 0; margin: 0;">
-          ${enrichmentData.news.map(article => `
-            <li style="padding: 0.5rem 0; border-bottom: 1px solid rgba(124, 58, 237, 0.1);">
-              <div style="font-weight: 500; color: var(--purple-900); margin-bottom: 0.25rem;">
-                ${escapeHtml(article.title)}
-              </div>
-              <div style="font-size: 0.75rem; color: var(--purple-700); opacity: 0.8;">
-                ${escapeHtml(article.source)} • ${escapeHtml(article.date || 'Recent')}
-              </div>
-              ${article.summary ? `
-                <div style="font-size: 0.75rem; color: var(--purple-900); opacity: 0.8; margin-top: 0.25rem;">
-                  ${escapeHtml(article.summary)}
-                </div>
-              ` : ''}
-            </li>
-          `).join('')}
-        </ul>
         <p style="font-size: 0.688rem; margin-top: 0.75rem; opacity: 0.7;">Powered by TinyFish + DuckDuckGo</p>
       `;
-    } else {
-      // No news found, show generic insights
-      await loadIndustryInsights();
     }
-  } catch (error) {
-    console.error('Failed to load company news:', error);
+    rendered++;
+
+    const sectionEl = document.createElement('div');
+    sectionEl.innerHTML = `
+      <h4 style="font-size: 0.813rem; font-weight: 600; margin-bottom: 0.5rem; color: var(--purple-700);">
+        ${layout.title}: ${escapeHtml(section.company_name || 'Company')}
+      </h4>
+      <ul style="list-style: none; padding: 0; margin: 0 0 0.75rem 0;">
+        ${section.items.map(item => `
+          <li style="padding: 0.5rem 0; border-bottom: 1px solid rgba(124, 58, 237, 0.1);">
+            ${layout.render(item)}
+          </li>
+        `).join('')}
+      </ul>
+    `;
+    insightsEl.insertBefore(sectionEl, insightsEl.lastElementChild);
+  });
+
+  source.addEventListener('complete', () => {
+    source.close();
+    if (rendered === 0) {
+      // Nothing found, show generic insights
+      loadIndustryInsights();
+    }
+  });
+
+  source.onerror = () => {
+    source.close();
+    console.error('Failed to load company news');
     // Fallback to generic insights on error
-    await loadIndustryInsights();
-  }
+    if (rendered === 0) {
+      loadIndustryInsights();
+    }
+  };
 }
 
 /**
@@ -173,31 +238,8 @@ async function handleAuditSubmit(e) {
     url = 'https://' + url;
   }
 
-  try {
-    // Show loading state
-    showLoading();
-
-    // Submit audit
-    const auditData = await submitAudit(url);
-
-    // Hide loading state
-    hideLoading();
-
-    // Render new results
-    currentAuditData = auditData;
-    renderDashboard(auditData, false);
-
-    // Clear input
-    urlInput.value = '';
-
-    // Scroll to results
-    document.getElementById('dashboard-content').scrollIntoView({
-      behavior: 'smooth'
-    });
-  } catch (error) {
-    hideLoading();
-    showError(`Audit failed: ${error.message}`);
-  }
+  // Live progress is streamed on the loading page, which redirects back here
+  window.location.href = `/loading?url=${encodeURIComponent(url)}`;
 }
 
 /**
@@ -207,6 +249,11 @@ function renderDashboard(data, isExample) {
   // Update header
   renderHeader(data, isExample);
 
+  // Earlier audits of the same site
+  if (!isExample && data.url) {
+    loadAuditHistory(data.url);
+  }
+
   // Render hero metrics
   renderMetrics(data);
 
@@ -266,6 +313,34 @@ function renderHeader(data, isExample) {
   `;
 }
 
+/**
+ * Show previous audits of this site below the header
+ */
+async function loadAuditHistory(url) {
+  const headerEl = document.getElementById('audit-header');
+  if (!headerEl) return;
+
+  const currentId = new URLSearchParams(window.location.search).get('audit_id');
+  try {
+    const page = await fetchAuditHistory({ domain: new URL(url).hostname, limit: 6 });
+    const previous = page.items.filter(item => item.audit_id !== currentId).slice(0, 5);
+    if (previous.length === 0) return;
+
+    headerEl.insertAdjacentHTML('beforeend', `
+      <div class="text-center mb-2" style="font-size: 0.75rem;">
+        <span class="text-secondary">Previous audits:</span>
+        ${previous.map(item => `
+          <a href="/dashboard?audit_id=${encodeURIComponent(item.audit_id)}" style="margin-left: 0.5rem;">
+            ${formatDate(item.created_at)} • risk ${item.summary.risk_score} • ${item.summary.total_issues} issues
+          </a>
+        `).join('')}
+      </div>
+    `);
+  } catch (error) {
+    console.error('Failed to load audit history:', error);
+  }
+}
+
 /**
  * Render hero metrics
  */
@@ -719,46 +794,6 @@ function copyToClipboard(text, event) {
   });
 }
 
-/**
- * Show loading state
- */
-function showLoading() {
-  const dashboardContent = document.getElementById('dashboard-content');
-  if (dashboardContent) {
-    dashboardContent.style.opacity = '0.5';
-    dashboardContent.style.pointerEvents = 'none';
-  }
-
-  // Show loading spinner
-  const loadingEl = document.createElement('div');
-  loadingEl.id = 'loading-overlay';
-  loadingEl.innerHTML = `
-    <div style="text-align: center; padding: 3rem;">
-      <div class="spinner"></div>
-      <p style="margin-top: 1rem; color: var(--color-text-secondary);">
-        Running audit... This may take up to 5 minutes.
-      </p>
-    </div>
-  `;
-  document.getElementById('audit-form').after(loadingEl);
-}
-
-/**
- * Hide loading state
- */
-function hideLoading() {
-  const dashboardContent = document.getElementById('dashboard-content');
-  if (dashboardContent) {
-    dashboardContent.style.opacity = '1';
-    dashboardContent.style.pointerEvents = 'auto';
-  }
-
-  const loadingEl = document.getElementById('loading-overlay');
-  if (loadingEl) {
-    loadingEl.remove();
-  }
-}
-
 /**
  * Show error message
  */
@@ -0,0 +1,88 @@
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import pytest
+from fastapi import Request
+
+from backend import http_client, site_fetch
+from backend.cache import TTLCache
+from backend.config import settings
+from backend.jobs import AuditJobManager
+from backend.models import AuditResult
+from backend.sessions import SessionScheduler
+
+AUDIT = {
+    "technical_failures": [{
+        "error_type": "broken_link", "element": "Footer link", "location": "Footer",
+        "expected_behavior": "Opens the page", "actual_behavior": "404 Not Found",
+        "transaction_impact": "Agent hits a dead end", "severity": "high",
+    }],
+    "contextual_errors": [{
+        "error_type": "seasonal_mismatch", "content": "Holiday banner", "location": "Hero",
+        "why_wrong": "Promotion ended", "agent_confusion": "Agent applies an expired discount", "severity": "medium",
+    }],
+    "competitive_gaps": [],
+}
+
+
+def sse(event: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+@pytest.fixture
+def tinyfish_stream(monkeypatch) -> Callable[[List[str]], None]:
+    """Answer TinyFish calls with the given raw SSE blocks"""
+
+    def install(blocks: List[str]) -> None:
+        body = "".join(blocks)
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text=body))
+        monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=transport))
+
+    return install
+
+
+@pytest.fixture
+def site(monkeypatch) -> Callable[[Callable[[httpx.Request], httpx.Response], Dict[str, bool]], None]:
+    """Answer customer-site requests with `handler`; `hosts` maps host -> resolves to public addresses"""
+
+    def install(handler: Callable[[httpx.Request], httpx.Response], hosts: Dict[str, bool]) -> None:
+        verdicts = TTLCache("test_site_hosts", max_entries=100, ttl=60.0)
+        for host, public in hosts.items():
+            verdicts.set(host, public)
+        monkeypatch.setattr(site_fetch, "_host_verdicts", verdicts)
+        monkeypatch.setattr(http_client, "_site_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    return install
+
+
+def http_request(**headers: str) -> Request:
+    """GET request with the given headers (underscores become dashes)"""
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def audit_result(url: str, **issues: List[Dict[str, Any]]) -> AuditResult:
+    return AuditResult(url=url, audit_date=datetime(2026, 1, 1), **issues)
+
+
+@pytest.fixture
+def audit_jobs(monkeypatch) -> Callable[[Dict[str, Optional[AuditResult]]], AuditJobManager]:
+    """
+    Job manager whose runs return the given result per URL (None fails
+    the run); created inside the test's event loop
+    """
+    monkeypatch.setattr(settings, "precheck_enabled", False)
+
+    def create(results: Dict[str, Optional[AuditResult]]) -> AuditJobManager:
+        async def runner(url: str, **kwargs: Any) -> AuditResult:
+            await asyncio.sleep(0)
+            if results.get(url) is None:
+                raise RuntimeError(f"TinyFish run failed for {url}")
+            return results[url]
+
+        return AuditJobManager(runner, sessions=SessionScheduler(capacity=4, interactive_reserved=0))
+
+    return create
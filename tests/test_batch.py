@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+
+from backend.batch import BatchScheduler, fetch_sitemap_urls
+from backend.store import MemoryAuditStore
+from tests.conftest import AUDIT, audit_result
+
+HOME, CART, ABOUT = "https://shop.example/", "https://shop.example/cart", "https://shop.example/about"
+
+
+def urlset(*urls: str) -> str:
+    locs = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</urlset>'
+
+
+def test_batch_streams_items_then_report(audit_jobs):
+    async def scenario():
+        jobs = audit_jobs({HOME: audit_result(HOME, **AUDIT), CART: audit_result(CART)})
+        scheduler = BatchScheduler(jobs, per_domain_concurrency=2, per_domain_delay=0)
+        # The repeated home page is audited once
+        return [line async for line in scheduler.run([HOME, CART, "https://SHOP.example", ABOUT])]
+
+    lines = asyncio.run(scenario())
+    items, report = lines[:-1], lines[-1]
+
+    assert sorted((item["url"], item["status"]) for item in items) == [
+        (HOME, "completed"), (ABOUT, "failed"), (CART, "completed"),
+    ]
+    assert report["type"] == "report"
+    assert (report["total_urls"], report["completed"], report["failed"]) == (3, 2, 1)
+    assert [page["url"] for page in report["worst_pages"]] == [HOME, CART]
+    assert report["issue_type_histogram"] == {"broken_link": 1, "seasonal_mismatch": 1}
+
+
+def test_batch_reuses_fresh_stored_audits(audit_jobs):
+    async def scenario():
+        store = MemoryAuditStore()
+        await store.save("stored", HOME, audit_result(HOME, **AUDIT))
+        scheduler = BatchScheduler(audit_jobs({}), store=store, per_domain_delay=0)
+        return [line async for line in scheduler.run([HOME])]
+
+    item, report = asyncio.run(scenario())
+
+    assert (item["audit_id"], item["cached"], item["total_issues"]) == ("stored", True, 2)
+    assert report["cached"] == 1
+
+
+def test_sitemap_index_is_followed_one_level(site):
+    documents = {
+        "/sitemap.xml": (
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            "<sitemap><loc>https://shop.example/pages.xml</loc></sitemap></sitemapindex>"
+        ),
+        "/pages.xml": urlset(HOME, "https://shop.example:99999/", CART, ABOUT),
+    }
+    site(lambda request: httpx.Response(200, text=documents[request.url.path]), {"shop.example": True})
+
+    urls = asyncio.run(fetch_sitemap_urls("https://shop.example/sitemap.xml", limit=2))
+
+    assert urls == [HOME, CART]
@@ -0,0 +1,43 @@
+from backend.budget import BudgetPolicy
+from backend.models import AgentRunStats, PrecheckSummary
+
+
+def run(steps: int, elapsed: float, max_steps: int = 60, stopped_early=None) -> AgentRunStats:
+    return AgentRunStats(steps_used=steps, max_steps=max_steps, deadline=300.0, elapsed=elapsed, stopped_early=stopped_early)
+
+
+def test_default_without_history_or_precheck():
+    budget = BudgetPolicy(min_steps=5).budget_for("https://shop.example/", 60)
+
+    assert (budget.max_steps, budget.deadline, budget.basis) == (60, 300.0, "default")
+
+
+def test_complexity_scales_with_page_targets():
+    policy = BudgetPolicy(min_steps=5)
+
+    simple = policy.budget_for("https://shop.example/", 60, PrecheckSummary(links_checked=0))
+    complex_ = policy.budget_for("https://shop.example/", 60, PrecheckSummary(links_checked=140, targets_skipped=60))
+
+    assert (simple.max_steps, simple.basis) == (30, "complexity")
+    assert complex_.max_steps == 60
+
+
+def test_history_uses_p90_with_headroom_per_domain():
+    policy = BudgetPolicy(min_steps=5, min_history=3, headroom=1.25, min_deadline=60.0)
+    for steps, elapsed in [(10, 40.0), (12, 50.0), (16, 100.0)]:
+        policy.record("https://shop.example/p", run(steps, elapsed))
+
+    budget = policy.budget_for("https://www.shop.example/other", 60)
+
+    assert (budget.max_steps, budget.deadline, budget.basis) == (20, 125.0, "history")
+    assert policy.budget_for("https://elsewhere.example/", 60).basis == "default"
+
+
+def test_exhausted_runs_grow_the_budget_back():
+    policy = BudgetPolicy(min_steps=5, min_history=1, headroom=1.25, min_deadline=60.0)
+    policy.record("https://shop.example/", run(20, 250.0, max_steps=20, stopped_early="deadline"))
+
+    budget = policy.budget_for("https://shop.example/", 60)
+
+    assert budget.max_steps == 32  # 20 recorded as 25, plus headroom
+    assert budget.deadline == 300.0  # capped by TINYFISH_AUDIT_TIMEOUT
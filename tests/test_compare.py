@@ -0,0 +1,41 @@
+import asyncio
+
+from backend.batch import issue_type_histogram
+from backend.compare import CompareAuditor
+from tests.conftest import AUDIT, audit_result
+
+TARGET, RIVAL, DOWN = "https://target.example", "https://rival.example", "https://down.example"
+
+LINK = AUDIT["technical_failures"][0]
+CTA = {**LINK, "error_type": "dead_cta"}
+
+
+def test_issue_type_histogram():
+    results = [audit_result(TARGET, **AUDIT), audit_result(RIVAL, technical_failures=[LINK, LINK])]
+
+    assert issue_type_histogram(results) == {"broken_link": 3, "seasonal_mismatch": 1}
+
+
+def test_plan_drops_the_target_and_duplicates():
+    assert CompareAuditor.plan(TARGET, [RIVAL, "https://TARGET.example/", "https://rival.example/"]) == [RIVAL]
+
+
+def test_comparison_matrix(audit_jobs):
+    results = {
+        TARGET: audit_result(TARGET, technical_failures=[LINK, CTA]),
+        RIVAL: audit_result(RIVAL),
+    }
+
+    async def scenario():
+        auditor = CompareAuditor(audit_jobs(results))
+        return [line async for line in auditor.run(TARGET, [RIVAL, DOWN])]
+
+    lines = asyncio.run(scenario())
+    comparison = lines[-1]
+
+    assert sorted(line["url"] for line in lines[:-1]) == [DOWN, RIVAL, TARGET]
+    assert [row["issue_types"] for row in comparison["sites"]] == [{"broken_link": 1, "dead_cta": 1}, {}, {}]
+    assert comparison["ranking"] == [RIVAL, TARGET]
+    assert (comparison["completed"], comparison["failed"]) == (2, 1)
+    assert comparison["better_competitors"] == [RIVAL]
+    assert comparison["target_only_issue_types"] == ["broken_link", "dead_cta"]
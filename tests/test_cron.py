@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from backend.cron import CronExpression
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("@hourly", datetime(2026, 3, 1, 10, 0), datetime(2026, 3, 1, 11, 0)),
+    ("*/15 * * * *", datetime(2026, 3, 1, 10, 7, 30), datetime(2026, 3, 1, 10, 15)),
+    ("0 3 * * *", datetime(2026, 3, 1, 3, 0), datetime(2026, 3, 2, 3, 0)),
+    ("30 9 * * 1-5", datetime(2026, 3, 6, 10, 0), datetime(2026, 3, 9, 9, 30)),  # Friday -> Monday
+    ("0 0 * * 7", datetime(2026, 3, 2, 0, 0), datetime(2026, 3, 8, 0, 0)),  # 7 is Sunday
+    ("0 0 31 * *", datetime(2026, 4, 1, 0, 0), datetime(2026, 5, 31, 0, 0)),
+    # Both day fields restricted: either matches
+    ("0 12 1 * 0", datetime(2026, 3, 2, 0, 0), datetime(2026, 3, 8, 12, 0)),
+    # A "*/n" day field is not a restriction: every other day that is a Monday
+    ("0 0 */2 * 1", datetime(2026, 3, 1, 0, 0), datetime(2026, 3, 9, 0, 0)),
+])
+def test_next_after(expression, after, expected):
+    assert CronExpression(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *", "a * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_expression_that_never_matches():
+    with pytest.raises(ValueError, match="never matches"):
+        CronExpression("0 0 31 2 *").next_after(datetime(2026, 1, 1))
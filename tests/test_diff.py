@@ -0,0 +1,46 @@
+from backend.diff import content_hash, diff_results
+from tests.conftest import AUDIT, audit_result
+
+URL = "https://shop.example/"
+
+
+def broken_link(element: str, actual: str = "404 Not Found", location: str = "Footer") -> dict:
+    return {**AUDIT["technical_failures"][0], "element": element, "location": location, "actual_behavior": actual}
+
+
+def test_rewording_keeps_the_fingerprint():
+    before = audit_result(URL, technical_failures=[broken_link("Footer link (3 items)")])
+    after = audit_result(URL, technical_failures=[broken_link("footer link, 12 items", actual="Page not found")])
+
+    diff = diff_results(after, before, previous_audit_id="prev")
+
+    assert diff.previous_audit_id == "prev"
+    assert not diff.added and not diff.resolved
+    assert len(diff.unchanged) == 1
+
+
+def test_added_and_resolved_issues():
+    before = audit_result(URL, **AUDIT)
+    after = audit_result(URL, technical_failures=AUDIT["technical_failures"] + [broken_link("Cart button", location="Header")])
+
+    diff = diff_results(after, before)
+
+    assert [change.issue["element"] for change in diff.added] == ["Cart button"]
+    assert [change.category for change in diff.resolved] == ["contextual_errors"]
+    assert [change.category for change in diff.unchanged] == ["technical_failures"]
+
+
+def test_first_audit_reports_everything_as_added():
+    diff = diff_results(audit_result(URL, **AUDIT))
+
+    assert len(diff.added) == 2
+    assert not diff.resolved and not diff.unchanged
+
+
+def test_content_hash_ignores_markup_and_scripts():
+    page = '<p>Sale <b>today</b></p><a href="/cart">Cart</a><script>track(1)</script>'
+    restyled = '<div class="x">Sale today</div><!-- v2 --><a class="y" href="/cart">Cart</a><script>track(2)</script>'
+
+    assert content_hash(page) == content_hash(restyled)
+    assert content_hash(page) != content_hash(page.replace("/cart", "/basket"))
+    assert content_hash(page) != content_hash(page.replace("today", "tomorrow"))
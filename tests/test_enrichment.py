@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from backend import resilience
+from backend.cache import TTLCache
+from backend.enrichment import PROVIDERS, EnrichmentPipeline
+from backend.shared_state import MemorySharedState, SharedCache
+from backend.singleflight import SharedSingleFlight
+from tests.conftest import sse
+
+NEWS = PROVIDERS[0]
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(resilience.enrichment_retry_policy, "base_delay", 0.0)
+    state = MemorySharedState()
+    cache = SharedCache(TTLCache("test", max_entries=100, ttl=3600), state, prefix="test")
+    return EnrichmentPipeline(cache, SharedSingleFlight("test", state), providers=[NEWS], error_ttl=0)
+
+
+def test_results_are_returned(tinyfish_stream, pipeline):
+    tinyfish_stream([sse({"type": "COMPLETE", "resultJson": {"articles": [{"title": "Outage"}]}})])
+
+    section = asyncio.run(pipeline.run_provider(NEWS, "Shop"))
+
+    assert section["items"] == [{"title": "Outage"}]
+    assert "error" not in section
+
+
+@pytest.mark.parametrize("blocks", [
+    [sse({"type": "STEP", "step": 1, "purpose": "Search"})],
+    [sse({"type": "COMPLETE", "resultJson": {"rejected": "Blocked"}})],
+])
+def test_failed_search_is_an_error_and_not_cached(tinyfish_stream, pipeline, blocks):
+    tinyfish_stream(blocks)
+
+    section = asyncio.run(pipeline.run_provider(NEWS, "Shop"))
+
+    assert section["items"] == []
+    assert section["error"]
+    # Cached with the (zero) error TTL, so the next request runs the search again
+    assert asyncio.run(pipeline.cache.get(pipeline._key(NEWS, "Shop"))) is None
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from backend import http_client
+from backend.config import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(monkeypatch):
+    monkeypatch.setattr(http_client, "_client", None)
+    monkeypatch.setattr(http_client, "_site_client", None)
+    yield
+    asyncio.run(http_client.close_client())
+
+
+def test_tinyfish_client_is_shared_until_closed():
+    async def scenario():
+        first = http_client.get_client()
+        again = http_client.get_client()
+        await first.aclose()
+        return first, again, http_client.get_client()
+
+    first, again, reopened = asyncio.run(scenario())
+
+    assert again is first
+    assert reopened is not first
+    assert not reopened.is_closed
+
+
+def test_site_client_is_separate_from_tinyfish_client():
+    tinyfish = http_client.get_client()
+    site = http_client.get_site_client()
+
+    assert site is not tinyfish
+    assert site is http_client.get_site_client()
+    assert site.headers["User-Agent"] == http_client.SITE_USER_AGENT
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(settings, "tinyfish_http2", True)
+    monkeypatch.setattr(http_client, "_http2_available", lambda: False)
+
+    client = http_client.create_client()
+
+    assert client._transport._pool._http2 is False
+    asyncio.run(client.aclose())
+
+
+def test_close_client_closes_both_clients():
+    tinyfish = http_client.get_client()
+    site = http_client.get_site_client()
+
+    asyncio.run(http_client.close_client())
+
+    assert tinyfish.is_closed and site.is_closed
+    assert http_client._client is None and http_client._site_client is None
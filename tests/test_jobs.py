@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from backend.config import settings
+from backend.jobs import AuditJobManager, QueueFullError
+from backend.models import AuditStatus
+from backend.sessions import Priority, SessionScheduler
+from tests.conftest import AUDIT, audit_result
+
+URL = "https://shop.example/"
+
+
+@pytest.fixture(autouse=True)
+def no_precheck(monkeypatch):
+    monkeypatch.setattr(settings, "precheck_enabled", False)
+
+
+def test_submitted_job_runs_and_streams_its_events(audit_jobs):
+    async def scenario():
+        jobs = audit_jobs({URL: audit_result(URL, **AUDIT)})
+        job = jobs.submit(URL)
+        queued = job.status
+        await job.wait()
+        # A late subscriber gets the whole history
+        events = [event async for event in job.subscribe()]
+        return queued, job, events
+
+    queued, job, events = asyncio.run(scenario())
+
+    assert queued == AuditStatus.QUEUED
+    assert job.status == AuditStatus.COMPLETED
+    assert job.to_response().result.total_issues == 2
+    assert [event["status"] for event in events] == ["queued", "running", "completed"]
+
+
+def test_failed_run_fails_the_job(audit_jobs):
+    async def scenario():
+        job = audit_jobs({}).submit(URL)
+        return await job.wait()
+
+    job = asyncio.run(scenario())
+
+    assert job.status == AuditStatus.FAILED
+    assert "TinyFish run failed" in job.error
+
+
+def test_queue_is_bounded():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(url, **kwargs):
+            await release.wait()
+            return audit_result(url)
+
+        jobs = AuditJobManager(runner, sessions=SessionScheduler(capacity=1, interactive_reserved=0), queue_size=1)
+        running = jobs.submit("https://a.example/")
+        await asyncio.sleep(0.01)
+        jobs.submit("https://b.example/")
+        with pytest.raises(QueueFullError):
+            jobs.submit("https://c.example/")
+        release.set()
+        await running.wait()
+        await jobs.stop()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_audits_of_one_url_share_a_run():
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(url, **kwargs):
+            calls.append(url)
+            await release.wait()
+            return audit_result(url, **AUDIT)
+
+        jobs = AuditJobManager(runner, sessions=SessionScheduler(capacity=2, interactive_reserved=0))
+        first = jobs.submit(URL)
+        # Same page, written differently
+        second = jobs.submit("HTTPS://Shop.Example")
+        release.set()
+        await first.wait()
+        after = jobs.submit(URL)
+        await after.wait()
+        return first, second, after
+
+    first, second, after = asyncio.run(scenario())
+
+    assert second is first
+    assert after is not first
+    assert len(calls) == 2
+
+
+def test_joining_a_queued_audit_raises_its_priority():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def runner(url, **kwargs):
+            await release.wait()
+            return audit_result(url)
+
+        sessions = SessionScheduler(capacity=1, interactive_reserved=0)
+        jobs = AuditJobManager(runner, sessions=sessions)
+        blocker = jobs.submit("https://other.example/", priority=Priority.BATCH)
+        batch = jobs.submit(URL, priority=Priority.BATCH)
+        await asyncio.sleep(0.01)
+        joined = jobs.submit(URL, priority=Priority.INTERACTIVE)
+        waiting = sessions.waiting(Priority.INTERACTIVE)
+        release.set()
+        await asyncio.gather(blocker.wait(), batch.wait())
+        return batch, joined, waiting
+
+    batch, joined, waiting = asyncio.run(scenario())
+
+    assert joined is batch
+    assert batch.priority == Priority.INTERACTIVE
+    assert waiting == 1
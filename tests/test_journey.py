@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from backend.batch import DomainThrottle
+from backend.journey import JourneyAuditor, combine_pages
+from tests.conftest import AUDIT, audit_result
+
+HOME, CART = "https://shop.example/", "https://shop.example/cart"
+
+
+def item(url: str, status: str = "completed"):
+    return {"url": url, "audit_id": url, "status": status, "cached": False}
+
+
+def test_shared_issues_are_reported_once():
+    home, cart = audit_result(HOME, **AUDIT), audit_result(CART, technical_failures=AUDIT["technical_failures"])
+
+    result = combine_pages(HOME, [(item(HOME), home), (item(CART), cart)])
+
+    assert result.technical_failures[0].location == "Footer (on every page)"
+    assert result.contextual_errors[0].location == "/: Hero"
+    assert [(page.site_wide_issues, page.page_issues) for page in result.pages] == [(1, 1), (1, 0)]
+
+
+def test_combining_no_completed_pages_fails():
+    with pytest.raises(ValueError):
+        combine_pages(HOME, [(item(HOME, "failed"), None), (item(CART, "failed"), None)])
+
+
+def test_journey_with_every_page_failing_is_failed(audit_jobs):
+    async def scenario():
+        auditor = JourneyAuditor(audit_jobs({}))
+        return [line async for line in auditor.run([HOME, CART])]
+
+    lines = asyncio.run(scenario())
+
+    assert [line["status"] for line in lines[:-1]] == ["failed", "failed"]
+    assert lines[-1] == {
+        "type": "journey", "status": "failed", "error": "No page of the journey could be audited", "result": None
+    }
+
+
+def test_journey_combines_completed_pages(audit_jobs):
+    async def scenario():
+        auditor = JourneyAuditor(audit_jobs({HOME: audit_result(HOME, **AUDIT)}))
+        return [line async for line in auditor.run([HOME, CART])]
+
+    journey = asyncio.run(scenario())[-1]
+
+    assert journey["status"] == "completed"
+    assert journey["result"]["summary"]["total_issues"] == 2
+    assert [page["status"] for page in journey["result"]["pages"]] == ["completed", "failed"]
+
+
+def test_throttle_caps_each_domain_and_forgets_idle_ones():
+    async def scenario():
+        throttle = DomainThrottle(2, 0.0)
+        running = {}
+        peaks = {}
+
+        async def audit(domain: str):
+            await throttle.acquire(domain)
+            running[domain] = running.get(domain, 0) + 1
+            peaks[domain] = max(peaks.get(domain, 0), running[domain])
+            await asyncio.sleep(0.01)
+            running[domain] -= 1
+            throttle.release(domain)
+
+        await asyncio.gather(*(audit("shop.example") for _ in range(5)), *(audit(f"site{i}.example") for i in range(20)))
+        return peaks, throttle.domains
+
+    peaks, domains = asyncio.run(scenario())
+
+    assert peaks["shop.example"] == 2
+    assert domains == 0
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+
+from backend.precheck import extract_targets, run_precheck
+from backend.site_fetch import FetchedPage
+
+PAGE = """
+<nav><a href="/ok">Shop</a><a href="/gone">Old sale</a></nav>
+<main><img src="/missing.png" alt="Hero"><a href="mailto:a@shop.example">Mail</a></main>
+<footer><a href="https://partner.example/#top" title="Partner">x</a><a href="http://10.0.0.5/admin">Admin</a></footer>
+<form action="/search"></form>
+"""
+
+
+def test_extract_targets():
+    targets = extract_targets(PAGE + '<a href="/ok">Again</a><a href="http://x:99999/">Bad port</a>', "https://shop.example/")
+
+    assert [(t.kind, t.url, t.location, t.internal) for t in targets] == [
+        ("link", "https://shop.example/ok", "Navigation", True),
+        ("link", "https://shop.example/gone", "Navigation", True),
+        ("image", "https://shop.example/missing.png", "Main content", True),
+        ("link", "https://partner.example/", "Footer", False),
+        ("link", "http://10.0.0.5/admin", "Footer", False),
+        ("form", "https://shop.example/search", "Page body", True),
+    ]
+
+
+def test_run_precheck_reports_broken_targets(site):
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(f"{request.method} {request.url}")
+        if request.url.path in ("/gone", "/missing.png"):
+            return httpx.Response(404)
+        if request.url.path == "/search" and request.method == "HEAD":
+            return httpx.Response(405)
+        return httpx.Response(200)
+
+    site(handler, {"shop.example": True, "partner.example": True, "10.0.0.5": False})
+    page = FetchedPage("https://shop.example/", 200, "text/html; charset=utf-8", PAGE)
+
+    result = asyncio.run(run_precheck(page.url, page))
+
+    assert [(f["error_type"], f["severity"]) for f in result.findings] == [
+        ("broken_link", "high"),
+        ("missing_media", "medium"),
+    ]
+    # The link to the private host is skipped, not counted as checked
+    assert (result.summary().links_checked, result.summary().targets_skipped) == (3, 1)
+    assert result.focused
+    # The private host is never contacted
+    assert not any("10.0.0.5" in line for line in requested)
+    # HEAD failures are confirmed with a GET
+    assert "GET https://shop.example/gone" in requested
+
+
+def test_run_precheck_skips_pages_that_are_not_html():
+    page = FetchedPage("https://shop.example/logo.png", 200, "image/png", "")
+
+    assert asyncio.run(run_precheck(page.url, page)) is None
+    assert asyncio.run(run_precheck("https://shop.example/", None)) is None
+
+
+def test_inconclusive_checks_are_skipped_and_unfocus_the_run(site):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/ok":
+            return httpx.Response(200)
+        raise httpx.PoolTimeout("no free connection", request=request)
+
+    site(handler, {"shop.example": True, "partner.example": True, "10.0.0.5": False})
+    page = FetchedPage("https://shop.example/", 200, "text/html", PAGE)
+
+    result = asyncio.run(run_precheck(page.url, page))
+
+    assert result.findings == []
+    assert result.summary().links_checked == 1
+    assert result.inconclusive == result.summary().targets_skipped == 5
+    assert not result.focused
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    RunDeadlineError,
+    UpstreamError,
+    call_with_resilience,
+    is_retryable,
+    is_upstream_failure,
+)
+
+NO_DELAY = RetryPolicy("test", max_attempts=3, base_delay=0, max_delay=0)
+
+
+def failing(*errors):
+    """Coroutine factory raising `errors` in turn, then returning "ok" """
+    calls = []
+
+    async def fn():
+        calls.append(None)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+
+    return fn, calls
+
+
+def test_error_classification():
+    assert is_retryable(UpstreamError(503, "unavailable"))
+    assert not is_retryable(UpstreamError(400, "bad request"))
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert not is_retryable(RunDeadlineError("deadline"))
+
+    assert is_upstream_failure(UpstreamError(429, "slow down"))
+    assert not is_upstream_failure(UpstreamError(404, "not found"))
+    assert not is_upstream_failure(httpx.PoolTimeout("pool"))
+    assert not is_upstream_failure(RunDeadlineError("deadline"))
+
+
+def test_transient_errors_are_retried():
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=60)
+    fn, calls = failing(UpstreamError(503, "unavailable"), httpx.ReadError("reset"))
+    retries = []
+
+    result = asyncio.run(call_with_resilience(fn, NO_DELAY, breaker, on_retry=lambda *args: retries.append(args[0])))
+
+    assert result == "ok"
+    assert len(calls) == 3
+    assert retries == [1, 2]
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_are_not_retried():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    fn, calls = failing(UpstreamError(400, "bad request"))
+
+    with pytest.raises(UpstreamError):
+        asyncio.run(call_with_resilience(fn, NO_DELAY, breaker))
+
+    assert len(calls) == 1
+    # The upstream answered, so it is healthy
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    fn, calls = failing(*[UpstreamError(502, "bad gateway")] * 3)
+
+    # The second failure opens the circuit, so the third attempt never goes out
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(call_with_resilience(fn, NO_DELAY, breaker))
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(call_with_resilience(fn, NO_DELAY, breaker))
+
+    assert len(calls) == 2
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.snapshot()["rejected_calls"] == 2
+
+
+def test_half_open_allows_one_trial(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("backend.resilience.time.monotonic", lambda: clock[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock[0] += 30
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_after_caps_the_delay():
+    policy = RetryPolicy("test", max_attempts=3, base_delay=1, max_delay=10)
+
+    assert policy.delay(1, UpstreamError(429, "slow down", retry_after=4)) == 4
+    assert policy.delay(1, UpstreamError(429, "slow down", retry_after=60)) == 10
+    assert 0 <= policy.delay(3) <= 4
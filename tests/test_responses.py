@@ -0,0 +1,59 @@
+import asyncio
+import gzip
+import json
+
+from backend import responses
+from backend.config import settings
+from backend.models import AuditResult
+from tests.conftest import audit_result, http_request
+
+
+def test_models_and_plain_data_encode_the_same():
+    result = audit_result("https://shop.example/")
+
+    assert json.loads(responses.dumps(result)) == json.loads(result.model_dump_json())
+    assert json.loads(responses.dumps({1: "a", "b": [2]})) == {"1": "a", "b": [2]}
+
+
+def test_etag_answers_304():
+    first = responses.json_response({"score": 1})
+    etag = first.headers["ETag"]
+
+    again = responses.json_response({"score": 1}, http_request(if_none_match=f'W/{etag}, "other"'))
+    changed = responses.json_response({"score": 2}, http_request(if_none_match=etag))
+
+    assert again.status_code == 304 and again.body == b""
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+
+
+def test_large_bodies_are_compressed(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    monkeypatch.setattr(settings, "response_compress_min_bytes", 100)
+    content = {"issues": ["x" * 10] * 20}
+
+    small = responses.json_response({"ok": True}, http_request(accept_encoding="gzip"))
+    large = responses.json_response(content, http_request(accept_encoding="gzip, deflate"))
+    identity = responses.json_response(content, http_request())
+
+    assert "Content-Encoding" not in small.headers
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(large.body)) == content
+    assert json.loads(identity.body) == content
+
+
+def test_ndjson_stream_is_one_line_per_item(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+
+    async def items():
+        yield {"index": 0}
+        yield audit_result("https://shop.example/")
+
+    async def body(response):
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    response = responses.ndjson_response(items(), http_request(accept_encoding="gzip"))
+    lines = gzip.decompress(asyncio.run(body(response))).splitlines()
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(lines[0]) == {"index": 0}
+    assert AuditResult.model_validate_json(lines[1]).url == "https://shop.example/"
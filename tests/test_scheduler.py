@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from backend.models import MonitorSchedule
+from backend.scheduler import LEADER_LOCK, MonitorScheduler, ScheduleStore
+from backend.shared_state import MemorySharedState
+
+
+class CountingState(MemorySharedState):
+    def __init__(self):
+        super().__init__()
+        self.acquires = 0
+
+    async def acquire(self, name, ttl, owner="this-worker"):
+        self.acquires += 1
+        return await super().acquire(name, ttl, owner)
+
+
+def overdue_schedule() -> MonitorSchedule:
+    now = datetime.now()
+    return MonitorSchedule(
+        url="https://shop.example/", cron="@hourly", schedule_id="s1",
+        created_at=now - timedelta(days=1), next_run_at=now - timedelta(hours=1)
+    )
+
+
+def test_follower_does_not_spin_on_overdue_schedules():
+    async def scenario():
+        state = CountingState()
+        await state.acquire(LEADER_LOCK, 60.0, owner="other-worker")
+        store = ScheduleStore()
+        await store.save(overdue_schedule())
+        scheduler = MonitorScheduler(jobs=None, store=store, state=state)
+        await scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return state.acquires
+
+    # The other worker taking the lease, then one check by the follower
+    assert asyncio.run(scenario()) <= 3
+
+
+def test_unavailable_store_does_not_stop_startup(tmp_path):
+    async def scenario():
+        scheduler = MonitorScheduler(jobs=None, store=ScheduleStore(str(tmp_path / "missing" / "audits.db")))
+        await scheduler.start()
+        schedules = await scheduler.list()
+        await scheduler.stop()
+        return schedules
+
+    assert asyncio.run(scenario()) == []
@@ -0,0 +1,56 @@
+import asyncio
+
+from backend.sessions import Priority, SessionScheduler, SessionTicket
+
+
+def test_tenants_take_turns_within_a_class():
+    async def scenario():
+        scheduler = SessionScheduler(capacity=1, interactive_reserved=0)
+        holder = scheduler.request(Priority.BATCH, "a")
+        big = [scheduler.request(Priority.BATCH, "a") for _ in range(3)]
+        small = [scheduler.request(Priority.BATCH, "b") for _ in range(2)]
+        order = []
+        current = holder
+        for _ in range(5):
+            scheduler.release(current)
+            current = next(t for t in big + small if t.state == SessionTicket.GRANTED)
+            order.append("a" if current in big else "b")
+        return order
+
+    assert asyncio.run(scenario()) == ["a", "b", "a", "b", "a"]
+
+
+def test_interactive_goes_first_and_has_reserved_slots():
+    async def scenario():
+        scheduler = SessionScheduler(capacity=3, interactive_reserved=1)
+        batch = [scheduler.request(Priority.BATCH, "bulk") for _ in range(3)]
+        # One slot stays free for interactive audits
+        granted_batch = sum(t.state == SessionTicket.GRANTED for t in batch)
+        interactive = scheduler.request(Priority.INTERACTIVE, "user")
+        interactive_granted = interactive.state == SessionTicket.GRANTED
+
+        scheduler.release(batch[0])
+        queued = scheduler.request(Priority.INTERACTIVE, "user")
+        scheduler.release(interactive)
+        return granted_batch, interactive_granted, batch[2].state, queued.state
+
+    assert asyncio.run(scenario()) == (2, True, SessionTicket.WAITING, SessionTicket.GRANTED)
+
+
+def test_promotion_and_cancellation():
+    async def scenario():
+        scheduler = SessionScheduler(capacity=1, interactive_reserved=0)
+        holder = scheduler.request(Priority.INTERACTIVE, "a")
+        batch = scheduler.request(Priority.BATCH, "b")
+        scheduled = scheduler.request(Priority.SCHEDULED, "c")
+        cancelled = scheduler.request(Priority.INTERACTIVE, "d")
+
+        waiter = asyncio.create_task(scheduler.acquire(cancelled))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        scheduler.promote(batch, Priority.INTERACTIVE)
+        scheduler.release(holder)
+        return cancelled.state, batch.state, scheduled.state, scheduler.waiting()
+
+    assert asyncio.run(scenario()) == (SessionTicket.CANCELLED, SessionTicket.GRANTED, SessionTicket.WAITING, 1)
@@ -0,0 +1,29 @@
+import asyncio
+
+from backend.shared_state import MemorySharedState
+
+
+def test_memory_state_is_bounded():
+    state = MemorySharedState(max_entries=10, max_bytes=0)
+
+    async def scenario():
+        for i in range(100):
+            await state.set(f"job:{i}", {"status": "completed"}, ttl=3600)
+        return [await state.get(f"job:{i}") for i in range(100)]
+
+    values = asyncio.run(scenario())
+
+    assert len(state._entries) == 10
+    assert values[:90] == [None] * 90
+    assert values[-1] == {"status": "completed"}
+
+
+def test_memory_state_entries_expire():
+    state = MemorySharedState()
+
+    async def scenario():
+        await state.set("news:a", [1], ttl=0)
+        await state.set("news:b", [2], ttl=60)
+        return await state.get("news:a"), await state.get("news:b")
+
+    assert asyncio.run(scenario()) == (None, [2])
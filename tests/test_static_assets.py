@@ -0,0 +1,69 @@
+import gzip
+
+import pytest
+from fastapi import HTTPException
+
+from backend.config import settings
+from backend.static_assets import StaticAssets
+from tests.conftest import http_request
+
+API = "export const get = (url) => fetch(url);\n" * 40
+
+
+def bundle(tmp_path, api: str = API) -> StaticAssets:
+    static = tmp_path / "static"
+    (static / "js").mkdir(parents=True)
+    (static / "js" / "api.js").write_text(api)
+    (static / "js" / "app.js").write_text('import { get } from "./api.js";\nget("/api/audit");\n')
+    (static / "logo.png").write_bytes(b"\x89PNG")
+    (tmp_path / "index.html").write_text('<script type="module" src="/static/js/app.js"></script>')
+    assets = StaticAssets(tmp_path, pages=["index.html"])
+    assets.build()
+    return assets
+
+
+def test_references_point_at_fingerprinted_names(tmp_path):
+    assets = bundle(tmp_path)
+    api, app = assets.manifest["js/api.js"], assets.manifest["js/app.js"]
+
+    page = assets.page_response("index.html", http_request()).body.decode()
+    script = assets.asset_response(app, http_request()).body.decode()
+
+    assert api.startswith("js/api.") and api != "js/api.js"
+    assert f'src="/static/{app}"' in page
+    assert f'from "/static/{api}"' in script
+
+
+def test_changing_an_import_changes_its_importers_hash(tmp_path):
+    before = bundle(tmp_path / "before").manifest
+    after = bundle(tmp_path / "after", api=API + "// v2\n").manifest
+
+    assert after["js/api.js"] != before["js/api.js"]
+    assert after["js/app.js"] != before["js/app.js"]
+    assert after["logo.png"] == before["logo.png"]
+
+
+def test_caching_headers(tmp_path):
+    assets = bundle(tmp_path)
+    hashed = assets.asset_response(assets.manifest["js/app.js"], http_request())
+    logical = assets.asset_response("js/app.js", http_request())
+    page = assets.page_response("index.html", http_request())
+
+    assert hashed.headers["Cache-Control"] == f"public, max-age={settings.static_max_age}, immutable"
+    assert logical.headers["Cache-Control"] == page.headers["Cache-Control"] == "no-cache"
+    assert assets.asset_response("js/app.js", http_request(if_none_match=logical.headers["ETag"])).status_code == 304
+    with pytest.raises(HTTPException):
+        assets.asset_response("js/missing.js", http_request())
+
+
+def test_precompressed_variants(tmp_path, monkeypatch):
+    monkeypatch.setattr("backend.static_assets.brotli", None)
+    monkeypatch.setattr("backend.responses.brotli", None)
+    assets = bundle(tmp_path)
+
+    api = assets.asset_response("js/api.js", http_request(accept_encoding="gzip, br"))
+    logo = assets.asset_response("logo.png", http_request(accept_encoding="gzip"))
+
+    assert api.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(api.body).decode() == API
+    assert "Content-Encoding" not in logo.headers
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from backend.store import MemoryAuditStore, SQLiteAuditStore, decode_cursor, encode_cursor
+from tests.conftest import AUDIT, audit_result
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    clock = iter([100.0, 200.0, 200.0, 300.0, 400.0])
+    monkeypatch.setattr("backend.store.time.time", lambda: next(clock, 500.0))
+    if request.param == "memory":
+        store = MemoryAuditStore(max_entries=100, max_age=10 ** 12)
+    else:
+        store = SQLiteAuditStore(str(tmp_path / "audits.db"), max_entries=100, max_age=10 ** 12)
+    yield store
+    asyncio.run(store.close())
+
+
+def save_all(store, audits):
+    async def scenario():
+        for audit_id, url, issues in audits:
+            await store.save(audit_id, url, audit_result(url, **issues))
+    asyncio.run(scenario())
+
+
+def pages(store, **filters):
+    """All history pages for the filters, as lists of audit ids"""
+    async def scenario():
+        result, cursor = [], None
+        while True:
+            page = await store.history(cursor=cursor, **filters)
+            result.append([item.audit_id for item in page.items])
+            cursor = page.next_cursor
+            if cursor is None:
+                return result
+    return asyncio.run(scenario())
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(1700000000.5, "a|b")) == (1700000000.5, "a|b")
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor("not-a-cursor")
+
+
+def test_history_pages_newest_first_without_gaps(store):
+    save_all(store, [(f"audit-{i}", f"https://shop.example/{i}", {}) for i in range(5)])
+
+    # audit-1 and audit-2 share a timestamp; the id breaks the tie across pages
+    assert pages(store, limit=2) == [["audit-4", "audit-3"], ["audit-2", "audit-1"], ["audit-0"]]
+
+
+def test_history_filters(store):
+    save_all(store, [
+        ("shop", "https://shop.example/cart", AUDIT),
+        ("shop-clean", "https://www.shop.example/", {}),
+        ("other", "https://other.example/", AUDIT),
+    ])
+
+    assert pages(store, domain="shop.example") == [["shop-clean", "shop"]]
+    assert pages(store, error_type="broken_link") == [["other", "shop"]]
+    assert pages(store, domain="shop.example", error_type="seasonal_mismatch") == [["shop"]]
+    assert pages(store, gap_type="missing_reviews") == [[]]
@@ -0,0 +1,56 @@
+import json
+
+from backend.stream_parser import IncrementalAuditParser
+from tests.conftest import AUDIT
+
+
+def feed_in_chunks(parser: IncrementalAuditParser, text: str, size: int):
+    completed = []
+    for start in range(0, len(text), size):
+        completed.extend(parser.feed(text[start:start + size]))
+    return completed
+
+
+def test_issues_complete_as_they_stream():
+    parser = IncrementalAuditParser()
+    text = "Here is the audit: " + json.dumps(AUDIT) + " Done."
+
+    completed = feed_in_chunks(parser, text, 7)
+
+    assert [category for category, _ in completed] == ["technical_failures", "contextual_errors"]
+    assert parser.audit_data() == AUDIT
+    assert parser.malformed == 0
+
+
+def test_truncated_document_keeps_parsed_issues():
+    parser = IncrementalAuditParser()
+    text = json.dumps(AUDIT)
+    # Cut off inside the competitive_gaps list
+    parser.feed(text[:text.index('"competitive_gaps"') + 22])
+
+    assert parser.documents == []
+    assert parser.audit_data() == {
+        "technical_failures": AUDIT["technical_failures"],
+        "contextual_errors": AUDIT["contextual_errors"],
+        "competitive_gaps": [],
+    }
+
+
+def test_documents_are_merged_without_duplicates():
+    parser = IncrementalAuditParser()
+    second = {"technical_failures": AUDIT["technical_failures"], "competitive_gaps": [{"gap_type": "no_api"}]}
+    parser.feed(json.dumps(AUDIT) + "\nand also\n" + json.dumps(second))
+
+    data = parser.audit_data()
+
+    assert data["technical_failures"] == AUDIT["technical_failures"]
+    assert data["competitive_gaps"] == [{"gap_type": "no_api"}]
+
+
+def test_braces_inside_strings_are_ignored():
+    parser = IncrementalAuditParser()
+    audit = {"technical_failures": [{"element": "Button \"{checkout}\" [x]", "severity": "low"}]}
+
+    feed_in_chunks(parser, json.dumps(audit), 3)
+
+    assert parser.audit_data() == audit
@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from backend import http_client, tinyfish_client
+from backend.budget import StepBudget
+from backend.config import settings
+from backend.precheck import PrecheckResult
+from backend.prompts import AUDIT_PROMPT, FOCUSED_AUDIT_PROMPT
+from backend.resilience import tinyfish_breaker
+from backend.tinyfish_client import _run_audit_once, run_audit
+from backend.tracing import tracer
+from tests.conftest import AUDIT, sse
+
+
+def run_once(url: str = "https://shop.example.com"):
+    return asyncio.run(_run_audit_once(url, None, tracer.start(url, None)))
+
+
+def test_truncated_event_does_not_swallow_later_output(tinyfish_stream):
+    text = "Audit finished: " + json.dumps(AUDIT)
+    tinyfish_stream([
+        sse({"type": "STEP", "step": 1, "purpose": "Inspect header"}),
+        'data: {"type": "STEP", "purpose": "truncated\n\n',
+        sse({"type": "STEP", "output": text[:40]}),
+        sse({"type": "STEP", "output": text[40:]}),
+        sse({"type": "COMPLETE"}),
+    ])
+
+    result = run_once()
+
+    assert result.total_issues == 2
+    assert result.technical_failures[0].element == "Footer link"
+    # Result fragments are not agent steps
+    assert result.run.steps_used == 1
+
+
+def test_complete_result_json_is_used(tinyfish_stream):
+    tinyfish_stream([
+        sse({"type": "STEP", "step": 1, "purpose": "Inspect header"}),
+        sse({"type": "COMPLETE", "resultJson": AUDIT}),
+    ])
+
+    result = run_once()
+
+    assert [issue.error_type for issue in result.contextual_errors] == ["seasonal_mismatch"]
+    assert result.run.stopped_early is None
+
+
+def test_deadline_without_output_is_not_retried(monkeypatch):
+    calls = []
+
+    async def stalled():
+        yield sse({"type": "STEP", "step": 1, "purpose": "Inspect header"}).encode()
+        await asyncio.sleep(10)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, content=stalled())
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(settings, "cerebras_api_key", "test")
+    monkeypatch.setattr(tinyfish_client.budget_policy, "budget_for", lambda *args: StepBudget(10, 0.1, "history"))
+    failures = tinyfish_breaker.snapshot()["consecutive_failures"]
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(run_audit("https://shop.example.com"))
+
+    assert raised.value.status_code == 504
+    assert len(calls) == 1
+    assert tinyfish_breaker.snapshot()["consecutive_failures"] == failures
+
+
+def test_mostly_inconclusive_precheck_keeps_the_full_goal(monkeypatch):
+    goals = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        goals.append(json.loads(request.content)["goal"])
+        return httpx.Response(200, text=sse({"type": "COMPLETE", "resultJson": AUDIT}))
+
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(settings, "cerebras_api_key", "test")
+    focused, unfocused = PrecheckResult("https://shop.example.com"), PrecheckResult("https://shop.example.com")
+    focused.checked["link"] = unfocused.checked["link"] = 2
+    unfocused.inconclusive = unfocused.skipped = 5
+
+    asyncio.run(run_audit("https://shop.example.com", precheck=focused))
+    asyncio.run(run_audit("https://shop.example.com", precheck=unfocused))
+
+    assert goals == [FOCUSED_AUDIT_PROMPT, AUDIT_PROMPT]
+
+
+def test_final_result_does_not_resend_streamed_issues(tinyfish_stream):
+    text = json.dumps(AUDIT)
+    tinyfish_stream([
+        sse({"type": "STEP", "output": text[:text.index('"contextual_errors"')]}),
+        sse({"type": "STEP", "result": text}),
+        sse({"type": "COMPLETE"}),
+    ])
+    events = []
+    url = "https://shop.example.com"
+
+    result = asyncio.run(_run_audit_once(url, events.append, tracer.start(url, None)))
+
+    issues = [event["issue"]["error_type"] for event in events if event["type"] == "issue"]
+    assert issues == ["broken_link", "seasonal_mismatch"]
+    assert result.total_issues == 2
+
+
+def test_step_events_carry_the_run_budget(tinyfish_stream):
+    tinyfish_stream([
+        sse({"type": "STEP", "step": 1, "purpose": "Inspect header"}),
+        sse({"type": "COMPLETE", "resultJson": AUDIT}),
+    ])
+    events = []
+    url = "https://shop.example.com"
+
+    asyncio.run(_run_audit_once(url, events.append, tracer.start(url, None), budget=StepBudget(30, 60.0, "history")))
+
+    assert [(e["step"], e["max_steps"]) for e in events if e["type"] == "step"] == [(1, 30)]
@@ -0,0 +1,23 @@
+import pytest
+from pydantic import ValidationError
+
+from backend.models import AuditRequest, BatchAuditRequest
+from backend.urls import normalize_url
+
+
+def test_normalize_url():
+    assert normalize_url("Example.com:443/a/?b=2&a=1#x") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_invalid_port_is_a_value_error():
+    with pytest.raises(ValueError, match="Invalid URL"):
+        normalize_url("http://x:99999")
+
+
+def test_request_models_reject_invalid_urls():
+    with pytest.raises(ValidationError):
+        AuditRequest(url="http://x:99999")
+    with pytest.raises(ValidationError):
+        BatchAuditRequest(urls=["https://a.com", "http://x:abc"])
+    assert AuditRequest(url="https://a.com:8443/x").url == "https://a.com:8443/x"